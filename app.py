@@ -1,21 +1,75 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from config import Config
+from contextlib import contextmanager
+from flask import Flask, g
+from sqlalchemy import create_engine
+from backend.config import Config
 from flask_cors import CORS # Importa Flask-CORS
+from backend.database import engine_options, ensure_sqlite_directory, install_sqlite_pragmas
+from db_routing import READ_BIND
+from models import db
 
 app = Flask(__name__)
 app.config.from_object(Config)
-db = SQLAlchemy(app)
+
+# Stesse opzioni di engine del backend FastAPI (pool, pre-ping, timeout)
+def _engine_options(url):
+    return engine_options(
+        url,
+        pool_size=app.config['DB_POOL_SIZE'], max_overflow=app.config['DB_MAX_OVERFLOW'],
+        pool_timeout=app.config['DB_POOL_TIMEOUT'], pool_recycle=app.config['DB_POOL_RECYCLE'],
+        statement_timeout_ms=app.config['DB_STATEMENT_TIMEOUT_MS'], busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS']
+    )
+
+# Stesso DATABASE_URL del backend FastAPI, già assoluto (vedi backend/config.py)
+ensure_sqlite_directory(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', _engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+if app.config['READ_DATABASE_URL']:
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[READ_BIND] = dict(
+        _engine_options(app.config['READ_DATABASE_URL']), url=app.config['READ_DATABASE_URL']
+    )
+db.init_app(app)
+with app.app_context():
+    for engine in db.engines.values():
+        install_sqlite_pragmas(engine, app.config['DB_STATEMENT_TIMEOUT_MS'], app.config['SQLITE_BUSY_TIMEOUT_MS'])
 CORS(app) # Abilita CORS per tutte le route
 
+def maintenance_engine():
+    """
+    Engine per Alembic e per i job batch (nightly_workouts.py, import_food_dump.py):
+    stesso database e stesse pragma dell'app, ma senza DB_STATEMENT_TIMEOUT_MS, che
+    interromperebbe una migrazione o un blocco di import lunghi. Va chiuso da chi lo crea.
+    """
+    with app.app_context():
+        url = db.engine.url # lo stesso del backend FastAPI (vedi backend/config.py)
+    engine = create_engine(url, **engine_options(url, pool_size=1, max_overflow=0, statement_timeout_ms=0,
+                                                 busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS']))
+    return install_sqlite_pragmas(engine, statement_timeout_ms=0, busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'])
+
+@contextmanager
+def maintenance_context():
+    """app_context in cui db.session lavora su maintenance_engine()."""
+    engine = maintenance_engine()
+    try:
+        with app.app_context():
+            g.db_engine = engine
+            yield
+    finally:
+        engine.dispose()
+
 # Importa i modelli e le route qui
-from models import User, FoodItem, Meal, MealItem, Exercise, GeneratedWorkout
+from models import User, FoodItem, Meal, MealItem, Exercise, GeneratedWorkout, GeneratedWorkoutSegment
 from routes import *
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        print("Database tables created!")
+        # Lo schema è gestito da Alembic (migrations/): crea o aggiorna le tabelle
+        from alembic import command
+        from alembic.config import Config as AlembicConfig
+        command.upgrade(AlembicConfig('alembic.ini'), 'head')
+        print("Database migrated!")
+        from routes import get_food_search_index
+        print(f"Food search index ready ({len(get_food_search_index())} items)")
+        from profile_cache import guest_profile
+        guest_profile() # crea GuestWarrior se manca: da qui in poi il profilo guest è servito dalla memoria
         # Puoi anche inizializzare i dati di base qui se vuoi che siano sempre presenti
         # from routes import seed_food_items, seed_exercises, get_user_profile # Importa anche get_user_profile per assicurare il guest user
         # print("Ensuring Guest Warrior user exists...")
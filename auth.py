@@ -0,0 +1,206 @@
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from time import perf_counter, time
+import jwt # Per i JSON Web Tokens
+from flask import g, jsonify, request
+from app import app, db
+from models import User
+from sqlalchemy import select
+from catalog_cache import USERS, bump_user_version, catalog_cache
+
+# --- JWT CONFIGURATION ---
+JWT_SECRET_KEY = app.config['SECRET_KEY']
+JWT_ALGORITHM = 'HS256'
+JWT_EXPIRATION_SECONDS = 3600 # 1 ora di validità per il token
+
+# Snapshot immutabile dell'utente autenticato, condiviso tra le richieste dello stesso worker
+Principal = namedtuple('Principal', [
+    'id', 'username', 'email', 'gender', 'age', 'weight_kg', 'height_cm',
+    'registration_date', 'profile_picture_url', 'token_version'
+])
+PRINCIPAL_COLUMNS = [getattr(User, field) for field in Principal._fields]
+
+class _LRU:
+    """Dizionario LRU thread-safe e limitato."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# token -> (user_id, token_version, exp): la firma HS256 viene verificata una volta sola
+_verified_tokens = _LRU(app.config['AUTH_TOKEN_CACHE_SIZE'])
+# user_id -> Principal
+_principals = _LRU(app.config['AUTH_PRINCIPAL_CACHE_SIZE'])
+_users_version = None
+_stats_lock = threading.Lock()
+auth_counters = {
+    'requests': 0, 'rejected': 0, 'token_hits': 0, 'token_misses': 0,
+    'principal_hits': 0, 'principal_misses': 0, 'seconds_total': 0.0
+}
+
+def _count(**increments):
+    with _stats_lock:
+        for name, value in increments.items():
+            auth_counters[name] += value
+
+def generate_jwt_token(user):
+    """Genera un JWT per l'autenticazione; 'ver' lega il token alla token_version dell'utente."""
+    payload = {
+        'user_id': user.id,
+        'ver': user.token_version or 0,
+        'exp': datetime.utcnow() + timedelta(seconds=JWT_EXPIRATION_SECONDS),
+        'iat': datetime.utcnow()
+    }
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+def _verify_token(token):
+    """(user_id, token_version) di un token valido e non scaduto, altrimenti None."""
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        user_id, token_version, exp = cached
+        if exp > time():
+            _count(token_hits=1)
+            return user_id, token_version
+        _verified_tokens.pop(token)
+        return None
+
+    _count(token_misses=1)
+    try:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except jwt.InvalidTokenError: # include ExpiredSignatureError
+        return None
+    user_id = payload.get('user_id')
+    if not user_id:
+        return None
+    token_version = payload.get('ver', 0)
+    _verified_tokens.set(token, (user_id, token_version, payload['exp']))
+    return user_id, token_version
+
+def _evict_changed_users(version):
+    """
+    La versione 'user' è cambiata: toglie dalla cache solo gli utenti modificati dopo
+    l'ultima versione vista (User.catalog_version), non tutti i principal del worker.
+    """
+    global _users_version
+    if _users_version is None:
+        _principals.clear()
+    else:
+        changed = db.session.execute(select(User.id).where(User.catalog_version > _users_version)).scalars()
+        for user_id in changed:
+            _principals.pop(user_id)
+    _users_version = version
+
+def _principal(user_id):
+    """Principal dell'utente dalla cache del worker, valido finché l'utente non viene modificato."""
+    version = catalog_cache.version(USERS)
+    if version != _users_version:
+        _evict_changed_users(version)
+
+    principal = _principals.get(user_id)
+    if principal is not None:
+        _count(principal_hits=1)
+        return principal
+    _count(principal_misses=1)
+    row = db.session.query(*PRINCIPAL_COLUMNS).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    principal = Principal(*row[:-1], row[-1] or 0)
+    _principals.set(user_id, principal)
+    return principal
+
+def authenticate(token):
+    """Principal del token se valido, non scaduto e non revocato; altrimenti None."""
+    verified = _verify_token(token)
+    if verified is None:
+        return None
+    user_id, token_version = verified
+    principal = _principal(user_id)
+    if principal is None or principal.token_version != token_version:
+        return None
+    return principal
+
+def decode_jwt_token(token):
+    """Decodifica un JWT: restituisce l'id utente, o None se il token non è valido."""
+    principal = authenticate(token)
+    return principal.id if principal else None
+
+def bearer_token():
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.split(' ')[1]
+
+def current_principal():
+    """Utente autenticato della richiesta corrente (risolto una sola volta da login_required)."""
+    return g.get('principal')
+
+def invalidate_user(user):
+    """
+    Da chiamare nella transazione che modifica un utente: ne registra la versione
+    in User.catalog_version e gli altri worker, alla prossima lettura della
+    versione 'user', tolgono dalla cache solo lui.
+    """
+    user.catalog_version = bump_user_version()
+    _principals.pop(user.id)
+
+def revoke_user_tokens(user):
+    """Invalida tutti i token emessi finora per `user` (logout da ogni dispositivo)."""
+    user.token_version = (user.token_version or 0) + 1
+    invalidate_user(user)
+
+def auth_stats():
+    with _stats_lock:
+        stats = dict(auth_counters)
+    authenticated = stats['requests'] - stats['rejected']
+    stats['avg_ms'] = round(1000 * stats['seconds_total'] / stats['requests'], 4) if stats['requests'] else 0
+    stats['authenticated'] = authenticated
+    stats['cached_tokens'] = len(_verified_tokens)
+    stats['cached_principals'] = len(_principals)
+    return stats
+
+# --- DECORATORE DI AUTENTICAZIONE (per utenti registrati) ---
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        started = perf_counter()
+        token = bearer_token()
+        if not token:
+            _count(requests=1, rejected=1, seconds_total=perf_counter() - started)
+            return jsonify({'message': 'Authorization token is missing or malformed!'}), 401
+
+        principal = authenticate(token)
+        _count(requests=1, rejected=0 if principal else 1, seconds_total=perf_counter() - started)
+        if not principal:
+            return jsonify({'message': 'Invalid or expired token. Please log in again.'}), 401
+
+        g.principal = principal
+        kwargs['user_id'] = principal.id # Passa l'ID utente alla funzione
+        return f(*args, **kwargs)
+    return decorated_function
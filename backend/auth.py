@@ -0,0 +1,47 @@
+"""
+Autenticazione del backend FastAPI con gli stessi JWT dell'app Flask: stessa
+chiave, stesso claim 'ver' confrontato con User.token_version, quindi un
+logout su una delle due API revoca il token anche sull'altra.
+"""
+
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer
+
+from backend.config import Config
+from backend.database import get_db
+from backend.models import User
+
+JWT_SECRET_KEY = Config.SECRET_KEY
+JWT_ALGORITHM = "HS256"
+
+bearer = HTTPBearer(auto_error=False)
+
+
+async def optional_user(credentials=Depends(bearer), db=Depends(get_db)):
+    """Utente del token se valido, non scaduto e non revocato; altrimenti None."""
+    if credentials is None:
+        return None
+    try:
+        payload = jwt.decode(
+            credentials.credentials, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM]
+        )
+    except jwt.InvalidTokenError:  # include ExpiredSignatureError
+        return None
+    user_id = payload.get("user_id")
+    user = await db.get(User, user_id) if user_id else None
+    # Chiude la transazione e restituisce subito la connessione al pool: le route
+    # di lettura ne usano un'altra (replica) e non devono tenerne due a testa
+    await db.commit()
+    if user is None or (user.token_version or 0) != payload.get("ver", 0):
+        return None
+    return user
+
+
+async def current_user(credentials=Depends(bearer), db=Depends(get_db)):
+    if credentials is None:
+        raise HTTPException(401, "Authorization token is missing or malformed!")
+    user = await optional_user(credentials, db)
+    if user is None:
+        raise HTTPException(401, "Invalid or expired token. Please log in again.")
+    return user
@@ -0,0 +1,136 @@
+"""
+Cataloghi in memoria del backend FastAPI (esercizi e indice di ricerca degli
+alimenti), invalidati con la stessa tabella catalog_version dell'app Flask:
+una scrittura su uno dei due lati è vista dall'altro entro check_interval
+secondi.
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import Config
+from backend.models import CatalogVersion, Exercise, FoodItem
+from backend.services.food_search import FoodSearchIndex
+
+EXERCISES = "exercise"
+FOOD_ITEMS = "food_item"
+USERS = "user"
+# Chiave di session.info: la transazione ha incrementato almeno una versione
+BUMPED = "bumped_backend_catalogs"
+
+ExerciseRecord = namedtuple(
+    "ExerciseRecord", "id name acronym kcal_per_kg_per_min description"
+)
+
+
+class AsyncCatalog:
+    def __init__(self, check_interval, clock=time.monotonic):
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._versions = {}
+        self._checked_at = None
+        self._exercises = None  # (versione, tupla di ExerciseRecord)
+        self._search = None  # (versione, FoodSearchIndex)
+
+    async def version(self, db, name):
+        """Versione corrente del catalogo `name` (riletta ogni check_interval)."""
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            rows = await db.execute(select(CatalogVersion.name, CatalogVersion.version))
+            self._versions = dict(rows.all())
+            self._checked_at = now
+        return self._versions.get(name, 1)
+
+    def invalidate(self):
+        self._checked_at = None
+
+    async def exercises(self, db):
+        """Restituisce (versione, tupla di ExerciseRecord ordinati per id)."""
+        version = await self.version(db, EXERCISES)
+        snapshot = self._exercises
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot
+        rows = await db.execute(
+            select(
+                Exercise.id,
+                Exercise.name,
+                Exercise.acronym,
+                Exercise.kcal_per_kg_per_min,
+                Exercise.description,
+            ).order_by(Exercise.id)
+        )
+        self._exercises = (version, tuple(ExerciseRecord(*row) for row in rows))
+        return self._exercises
+
+    async def food_search_index(self, db):
+        """
+        Indice di ricerca degli alimenti. La costruzione (CPU-bound) gira in un
+        thread e una sola richiesta alla volta la esegue: le altre la aspettano.
+        """
+        version = await self.version(db, FOOD_ITEMS)
+        snapshot = self._search
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+        async with self._lock:
+            snapshot = self._search
+            if snapshot is not None and snapshot[0] == version:
+                return snapshot[1]
+            rows = (await db.execute(select(FoodItem.id, FoodItem.name))).all()
+            index = FoodSearchIndex()
+            await run_in_threadpool(index.build, rows)
+            self._search = (version, index)
+            return index
+
+
+catalog = AsyncCatalog(Config.CATALOG_VERSION_CHECK_INTERVAL)
+
+
+async def bump_catalog_version(db, *names):
+    """
+    Incrementa la versione dei cataloghi nella transazione di `db` (il commit lo
+    fa il chiamante), come bump_catalog_version dell'app Flask: al più una volta
+    per catalogo e transazione, e la cache si svuota solo dopo il commit.
+    """
+    bumped = db.info.setdefault(BUMPED, set())
+    for name in names:
+        if name in bumped:
+            continue
+        result = await db.execute(
+            update(CatalogVersion)
+            .where(CatalogVersion.name == name)
+            .values(version=CatalogVersion.version + 1)
+        )
+        if not result.rowcount:
+            db.add(CatalogVersion(name=name, version=2))
+        bumped.add(name)
+
+
+# Sulla Session sincrona che sta sotto ogni AsyncSession
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    if session.info.pop(BUMPED, None):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(BUMPED, None)
+
+
+async def bump_user_version(db):
+    """
+    Come bump_catalog_version(db, USERS), ma restituisce la nuova versione: va
+    scritta in User.catalog_version dell'utente modificato (vedi auth.py di Flask).
+    """
+    await bump_catalog_version(db, USERS)
+    await db.flush()
+    return await db.scalar(
+        select(CatalogVersion.version).where(CatalogVersion.name == USERS)
+    )
@@ -1,12 +1,123 @@
 import os
 
+from sqlalchemy.engine import make_url
+
+# Cartella instance/ dell'app Flask (accanto ad app.py)
+INSTANCE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance"
+)
+
+
+def resolve_database_url(url):
+    """
+    Un percorso SQLite relativo diventa assoluto dentro INSTANCE_DIR, come lo
+    risolverebbe Flask-SQLAlchemy: app Flask, backend FastAPI, Alembic e script
+    aprono lo stesso file qualunque sia la cartella di lavoro.
+    """
+    if not url:
+        return url
+    parsed = make_url(url)
+    database = parsed.database
+    if (
+        parsed.get_backend_name() != "sqlite"
+        or database in (None, "", ":memory:")
+        or database.startswith("file:")
+        or os.path.isabs(database)
+    ):
+        return url
+    parsed = parsed.set(database=os.path.join(INSTANCE_DIR, database))
+    return parsed.render_as_string(hide_password=False)
+
+
+# URL del database, uno solo per le due API: qui usiamo SQLite in locale, tutto
+# open-source e gratuito
+DATABASE_URL = resolve_database_url(
+    os.environ.get("DATABASE_URL") or "sqlite:///calorie_punisher.db"
+)
+READ_DATABASE_URL = resolve_database_url(os.environ.get("READ_DATABASE_URL"))
+
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'DEVI_METTERE_UNA_STRINGA_CASUALE_E_COMPLESSA_QUI!'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///calorie_punisher.db'
+    SECRET_KEY = (
+        os.environ.get("SECRET_KEY")
+        or "DEVI_METTERE_UNA_STRINGA_CASUALE_E_COMPLESSA_QUI!"
+    )
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Replica per le route di sola lettura (opzionale)
+    READ_DATABASE_URL = READ_DATABASE_URL
+    DB_POOL_SIZE = 10  # connessioni tenute aperte per processo
+    DB_MAX_OVERFLOW = 20  # connessioni extra nei picchi
+    DB_POOL_TIMEOUT = 30  # secondi di attesa per una connessione libera
+    DB_POOL_RECYCLE = 1800  # secondi dopo i quali una connessione viene riaperta
+    DB_STATEMENT_TIMEOUT_MS = 15000  # oltre, lo statement viene interrotto
+    # Attesa sui lock SQLite prima di "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS = 5000
     OPEN_FOOD_FACTS_API_URL = "https://world.openfoodfacts.org/api/v0/product/"
-
-import os
-
-# URL del database: qui usiamo SQLite in locale, tutto open-source e gratuito
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./exercise_app.db")
+    OPEN_FOOD_FACTS_TIMEOUT = 5  # secondi
+    OPEN_FOOD_FACTS_POOL_SIZE = 20  # connessioni keep-alive riutilizzabili
+    # Per quanto ricordiamo un barcode inesistente (secondi)
+    BARCODE_NOT_FOUND_TTL = 3600
+    # Richieste parallele verso Open Food Facts nell'import massivo
+    BULK_BARCODE_MAX_CONCURRENCY = 8
+    BULK_BARCODE_BATCH_SIZE = 100  # righe FoodItem salvate per transazione
+    # Attesa massima di un prodotto prima di salvare un blocco incompleto
+    BULK_BARCODE_FLUSH_SECONDS = 1
+    # Projection | selectin | joined | subquery | lazy
+    MEAL_ITEMS_LOADING = os.environ.get("MEAL_ITEMS_LOADING") or "projection"
+    WORKOUT_PLANNER = os.environ.get("WORKOUT_PLANNER") or "optimal"  # optimal | greedy
+    # Con un intero anche la strategia greedy diventa riproducibile
+    WORKOUT_PLANNER_SEED = None
+    # Kcal_to_burn massimo per un singolo workout (oltre si risponde 400)
+    WORKOUT_MAX_KCAL = 20000
+    # Sopra questo target il planner "optimal" passa al greedy (la DP cresce con kcal)
+    WORKOUT_OPTIMAL_MAX_KCAL = 5000
+    # Utenti per transazione nel job nightly_workouts.py
+    NIGHTLY_WORKOUT_CHUNK_SIZE = 5000
+    # Secondi tra due letture di catalog_version (ritardo massimo tra worker)
+    CATALOG_VERSION_CHECK_INTERVAL = 2
+    CATALOG_FOOD_CACHE_SIZE = 50000  # FoodItem tenuti in memoria da ogni worker
+    # Default: <instance>/report_cache
+    REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR")
+    # Oltre questa dimensione si cancellano i PDF meno usati
+    REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    # Processi del pool di rendering (None = numero di CPU)
+    REPORT_EXPORT_PROCESSES = None
+    REPORT_EXPORT_MAX_WORKOUTS = 1000  # report per singolo export
+    # JWT già verificati tenuti in memoria (fino alla loro scadenza)
+    AUTH_TOKEN_CACHE_SIZE = 10000
+    AUTH_PRINCIPAL_CACHE_SIZE = 10000  # utenti autenticati tenuti in memoria
+    PROFILE_CACHE_SIZE = 10000  # risposte di /api/profile tenute in memoria
+    # Formato werkzeug, con tutti i parametri di costo
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD") or "scrypt:32768:8:1"
+    PASSWORD_HASH_PROCESSES = 2  # processi dedicati all'hashing
+    # Hash in attesa oltre a quelli in corso; oltre si risponde 503
+    PASSWORD_HASH_QUEUE_SIZE = 16
+    PASSWORD_HASH_TIMEOUT = 10  # secondi massimi di attesa per un singolo hash
+    PASSWORD_HASH_RETRY_AFTER = 2  # secondi suggeriti al client nel 503
+    API_HOST = os.environ.get("API_HOST") or "127.0.0.1"
+    API_PORT = int(os.environ.get("API_PORT") or 8000)
+    # Processi uvicorn del backend FastAPI
+    API_WORKERS = int(os.environ.get("API_WORKERS") or os.cpu_count())
+    API_BACKLOG = 2048  # connessioni in attesa di accept per processo
+    FOOD_IMPORT_BATCH_SIZE = 5000  # prodotti per transazione in import_food_dump.py
+    # Chi può leggere /metrics (lo scraper gira sulla stessa macchina)
+    METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")
+    # Frazione di richieste sotto cProfile (0 = spento)
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    # Sopra questa durata il profilo della richiesta viene salvato
+    PROFILE_SLOW_REQUEST_MS = 500
+    PROFILE_DIR = os.environ.get("PROFILE_DIR")  # default: <instance>/profiles
+    ANALYTICS_DEFAULT_DAYS = 90  # intervallo di /api/analytics/nutrition senza from
+    ANALYTICS_MAX_DAYS = 5 * 366  # intervallo massimo di una singola analisi
+    # Righe lette per volta dal cursore lato server in /api/meals/export
+    MEAL_EXPORT_STREAM_CHUNK = 1000
+    FOOD_ITEMS_PAGE_SIZE = 100
+    FOOD_ITEMS_MAX_PAGE_SIZE = 1000
+    # Righe lette per volta quando si costruisce lo snapshot del catalogo
+    FOOD_SNAPSHOT_QUERY_CHUNK = 10000
+    # True nei test: superare il budget di query di una route è un errore
+    QUERY_BUDGET_STRICT = False
+    WORKOUT_HISTORY_PAGE_SIZE = 20
+    WORKOUT_HISTORY_MAX_PAGE_SIZE = 200
+    WORKOUT_HISTORY_STREAM_CHUNK = 500  # righe lette per volta dal cursore lato server
@@ -1,15 +1,171 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from .config import DATABASE_URL
-from backend.config import DATABASE_URL
+import os
+import sqlite3
+from time import monotonic
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.util import await_only
+from backend.config import DATABASE_URL, READ_DATABASE_URL, Config
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Pragma applicati a ogni nuova connessione SQLite
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),  # i lettori non si bloccano più dietro alle scritture
+    ("synchronous", "NORMAL"),  # sicuro con WAL, molte meno fsync
+    ("temp_store", "MEMORY"),
+    ("cache_size", "-65536"),  # 64 MB di cache pagine per connessione
+    ("mmap_size", "268435456"),
+)
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Driver asincroni per il backend FastAPI, per dialetto
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def engine_options(
+    url,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_timeout=Config.DB_POOL_TIMEOUT,
+    pool_recycle=Config.DB_POOL_RECYCLE,
+    statement_timeout_ms=Config.DB_STATEMENT_TIMEOUT_MS,
+    busy_timeout_ms=Config.SQLITE_BUSY_TIMEOUT_MS,
+):
+    """
+    Argomenti per create_engine/create_async_engine (o SQLALCHEMY_ENGINE_OPTIONS
+    di Flask-SQLAlchemy) adatti al database di `url`: pool, pre-ping e timeout.
+    """
+    url = make_url(url)
+    options = {"pool_pre_ping": True, "pool_recycle": pool_recycle}
+    if url.get_backend_name() == "sqlite":
+        # Attesa sui lock invece di un "database is locked" immediato
+        options["connect_args"] = {
+            "timeout": busy_timeout_ms / 1000,
+            "check_same_thread": False,
+        }
+        if url.database in (None, "", ":memory:"):
+            return options
+    elif url.get_backend_name() == "postgresql" and statement_timeout_ms:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={int(statement_timeout_ms)}"
+        }
+    options.update(
+        pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout
+    )
+    return options
+
+
+def ensure_sqlite_directory(url):
+    """Crea la cartella del file SQLite di `url` (di default instance/) se manca."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    ):
+        directory = os.path.dirname(url.database)
+        if directory and not url.database.startswith("file:"):
+            os.makedirs(directory, exist_ok=True)
+
+
+def _set_progress_handler(dbapi_connection, handler, n):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.set_progress_handler(handler, n)
+    else:
+        # aiosqlite: l'adattatore di SQLAlchemy non lo espone, lo chiediamo al driver
+        await_only(dbapi_connection.driver_connection.set_progress_handler(handler, n))
+
+
+def install_sqlite_pragmas(
+    engine,
+    statement_timeout_ms=Config.DB_STATEMENT_TIMEOUT_MS,
+    busy_timeout_ms=Config.SQLITE_BUSY_TIMEOUT_MS,
+):
+    """
+    Su un engine SQLite: pragma di SQLITE_PRAGMAS a ogni connessione e timeout
+    degli statement tramite progress handler (SQLite non ha statement_timeout).
+    Non fa nulla sugli altri database.
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        for name, value in SQLITE_PRAGMAS:
+            try:
+                cursor.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.OperationalError:
+                pass  # es. journal_mode su una connessione in sola lettura
+        cursor.close()
+
+        if statement_timeout_ms:
+            deadline = connection_record.info["statement_deadline"] = [None]
+
+            def _check_deadline():
+                # Un valore diverso da zero interrompe lo statement ("interrupted")
+                return int(deadline[0] is not None and monotonic() > deadline[0])
+
+            _set_progress_handler(dbapi_connection, _check_deadline, 10000)
+
+    if statement_timeout_ms:
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _start_deadline(conn, cursor, statement, parameters, context, many):
+            deadline = conn.info.get("statement_deadline")
+            if deadline is not None:
+                deadline[0] = monotonic() + statement_timeout_ms / 1000
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _clear_deadline(conn, cursor, statement, parameters, context, many):
+            deadline = conn.info.get("statement_deadline")
+            if deadline is not None:
+                deadline[0] = None
+
+    return engine
+
+
+def async_url(url):
+    """Lo stesso URL con il driver asincrono del suo dialetto (aiosqlite, asyncpg)."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.drivername != url.get_backend_name():
+        return url  # driver già scelto esplicitamente
+    return url.set(drivername=driver)
+
+
+def make_engine(url, **options):
+    """
+    Engine asincrono per il backend FastAPI: engine_options più i pragma SQLite,
+    installati sull'engine sincrono sottostante.
+    """
+    timeouts = {
+        name: options[name]
+        for name in ("statement_timeout_ms", "busy_timeout_ms")
+        if name in options
+    }
+    ensure_sqlite_directory(url)
+    engine = create_async_engine(async_url(url), **engine_options(url, **options))
+    install_sqlite_pragmas(engine.sync_engine, **timeouts)
+    return engine
+
+
+engine = make_engine(DATABASE_URL)
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+# Engine di sola lettura (replica); senza READ_DATABASE_URL è quello principale
+read_engine = make_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
+ReadSessionLocal = async_sessionmaker(
+    read_engine, expire_on_commit=False, autoflush=False
+)
+
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """Dipendenza FastAPI per gli endpoint di sola lettura."""
+    async with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
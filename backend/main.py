@@ -1,9 +1,47 @@
-from fastapi import FastAPI
-from .routes.meals import router as meals_router
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+
+from backend import workers
+from backend.config import Config
+from backend.database import engine, read_engine
+from backend.routes.foods import router as foods_router
+from backend.routes.meals import router as meals_router
+from backend.routes.profiles import router as profiles_router
+from backend.routes.workouts import router as workouts_router
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    workers.shutdown()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+app = FastAPI(title="Exercise-Suggestion API", version="2.0.0", lifespan=lifespan)
+# Stessi percorsi dell'app Flask: il frontend può puntare all'una o all'altra
+for router in (meals_router, workouts_router, foods_router, profiles_router):
+    app.include_router(router, prefix="/api")
+
+
+@app.exception_handler(HTTPException)
+async def http_exception_handler(request, exc):
+    # Stessa forma degli errori Flask: {'message': ...}
+    return JSONResponse(
+        {"message": exc.detail}, status_code=exc.status_code, headers=exc.headers
+    )
 
-app = FastAPI(title="Exercise-Suggestion API", version="1.0.0")
-app.include_router(meals_router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+
+    uvicorn.run(
+        "backend.main:app",
+        host=Config.API_HOST,
+        port=Config.API_PORT,
+        workers=Config.API_WORKERS,
+        backlog=Config.API_BACKLOG,
+    )
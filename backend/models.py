@@ -0,0 +1,31 @@
+"""
+Modelli del backend FastAPI: sono le stesse classi dichiarative dell'app Flask
+(models.py, nella radice), mappate sullo schema gestito da Alembic in
+migrations/. Le due API restituiscono così lo stesso JSON e una colonna nuova si
+aggiunge in un posto solo.
+
+Con le sessioni asincrone un lazy load implicito fallisce (MissingGreenlet): le
+route caricano con selectinload le relazioni che serializzano.
+"""
+
+from models import (
+    CatalogVersion,
+    Exercise,
+    FoodItem,
+    GeneratedWorkout,
+    GeneratedWorkoutSegment,
+    Meal,
+    MealItem,
+    User,
+)
+
+__all__ = [
+    "CatalogVersion",
+    "Exercise",
+    "FoodItem",
+    "GeneratedWorkout",
+    "GeneratedWorkoutSegment",
+    "Meal",
+    "MealItem",
+    "User",
+]
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+
+from backend.catalog import catalog
+from backend.database import get_read_db
+from backend.models import FoodItem
+
+router = APIRouter(tags=["foods"])
+
+SEARCH_LIMIT = 20
+
+
+@router.get("/fooditems/search")
+async def search_food_items(q: str = "", db=Depends(get_read_db)):
+    if not q.strip():
+        result = await db.scalars(select(FoodItem).limit(SEARCH_LIMIT))
+        return [food_item.to_dict() for food_item in result]
+
+    index = await catalog.food_search_index(db)
+    food_ids = index.search(q, limit=SEARCH_LIMIT)
+    if not food_ids:
+        return []
+    result = await db.scalars(select(FoodItem).where(FoodItem.id.in_(food_ids)))
+    found = {food_item.id: food_item for food_item in result}
+    # Stesso ordine di rilevanza dell'indice
+    return [found[food_id].to_dict() for food_id in food_ids if food_id in found]
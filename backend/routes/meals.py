@@ -1,17 +1,124 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-
-# Importazioni assolute
-from backend.schemas import MealIn, WorkoutPlan
-from backend.services.utility import generate_workout_logic
-from backend.database import get_db
-
-router = APIRouter(prefix="/meals", tags=["meals"])
-
-@router.post("/", response_model=WorkoutPlan)
-def add_meal(meal: MealIn, db: Session = Depends(get_db)):
-    try:
-        plan = generate_workout_logic(meal.dict())
-        return plan
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+
+from backend.auth import current_user
+from backend.database import get_db, get_read_db
+from backend.models import FoodItem, Meal, MealItem
+from backend.schemas import MealBatchIn, MealIn
+from backend.services.utility import compute_meal_item_rows, get_daily_time_range
+
+router = APIRouter(tags=["meals"])
+
+
+async def log_meals(db, user_id, meals):
+    """
+    Registra i pasti in un'unica transazione, con una sola query per gli alimenti.
+    Restituisce [(meal, kcal_totali), ...] con gli elementi già agganciati.
+    """
+    food_item_ids = {item.food_item_id for meal in meals for item in meal.items}
+    result = await db.scalars(select(FoodItem).where(FoodItem.id.in_(food_item_ids)))
+    foods_by_id = {food_item.id: food_item for food_item in result}
+    for food_item_id in food_item_ids - foods_by_id.keys():
+        raise HTTPException(
+            404,
+            f"Food item with ID {food_item_id} not found. "
+            "Is it from another dimension?",
+        )
+
+    now = datetime.utcnow()
+    logged = []
+    for meal in meals:
+        rows, total_kcal = compute_meal_item_rows(
+            [(item.food_item_id, item.grams_consumed) for item in meal.items],
+            foods_by_id,
+        )
+        new_meal = Meal(
+            user_id=user_id,
+            description=meal.description,
+            meal_time=meal.meal_time or now,
+            meal_items=[
+                MealItem(**row, food_item=foods_by_id[row["food_item_id"]])
+                for row in rows
+            ],
+        )
+        db.add(new_meal)
+        logged.append((new_meal, total_kcal))
+    await db.commit()
+    return logged
+
+
+@router.post("/meals", status_code=201)
+async def add_meal(meal: MealIn, user=Depends(current_user), db=Depends(get_db)):
+    [(new_meal, total_meal_kcal)] = await log_meals(db, user.id, [meal])
+    return {
+        "message": "Meal added successfully! Your caloric debt is piling up!",
+        "meal": new_meal.to_dict(include_items=True),
+        "total_meal_kcal": round(total_meal_kcal, 2),
+    }
+
+
+@router.post("/meals/batch", status_code=201)
+async def add_meals_batch(
+    batch: MealBatchIn, user=Depends(current_user), db=Depends(get_db)
+):
+    logged = await log_meals(db, user.id, batch.meals)
+    return {
+        "message": f"{len(logged)} meals added successfully! "
+        "Your caloric debt is piling up!",
+        "meals": [meal.to_dict(include_items=True) for meal, _ in logged],
+        "total_kcal": round(sum(total_kcal for _, total_kcal in logged), 2),
+    }
+
+
+@router.get("/meals/daily")
+async def get_daily_meals(user=Depends(current_user), db=Depends(get_read_db)):
+    start_of_day, end_of_day = get_daily_time_range()
+    rows = await db.execute(
+        select(
+            Meal.id,
+            Meal.description,
+            Meal.meal_time,
+            FoodItem.name,
+            MealItem.grams_consumed,
+            MealItem.kcal_total_item,
+            FoodItem.image_url,
+        )
+        .outerjoin(MealItem, MealItem.meal_id == Meal.id)
+        .outerjoin(FoodItem, FoodItem.id == MealItem.food_item_id)
+        .where(
+            Meal.user_id == user.id,
+            Meal.meal_time >= start_of_day,
+            Meal.meal_time <= end_of_day,
+        )
+        .order_by(Meal.meal_time.asc(), Meal.id.asc(), MealItem.id.asc())
+    )
+
+    meals = []
+    total_daily_kcal = 0
+    for meal_id, description, meal_time, name, grams, kcal, image_url in rows:
+        if not meals or meals[-1]["meal_id"] != meal_id:
+            meals.append(
+                {
+                    "meal_id": meal_id,
+                    "description": description,
+                    "meal_time": meal_time.isoformat(),
+                    "items": [],
+                }
+            )
+        if kcal is not None:
+            meals[-1]["items"].append(
+                {
+                    "food_item_name": name,
+                    "grams_consumed": grams,
+                    "kcal_total": round(kcal, 2),
+                    "image_url": image_url,
+                }
+            )
+            total_daily_kcal += kcal
+    for meal in meals:
+        meal["total_kcal_in_meal"] = round(
+            sum(item["kcal_total"] for item in meal["items"]), 2
+        )
+    return {"meals": meals, "total_daily_kcal_ingested": round(total_daily_kcal, 2)}
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+
+from backend.auth import current_user, optional_user
+from backend.catalog import bump_user_version
+from backend.database import get_db
+from backend.models import User
+from backend.schemas import ProfileUpdate
+from backend.services.utility import calculate_bmr
+
+router = APIRouter(tags=["profiles"])
+
+# Stesso utente guest dell'app Flask (profile_cache.py), creato all'avvio da app.py.
+# Si cerca per username ed email: l'id 1 può essere di un utente vero
+GUEST_USERNAME = "GuestWarrior"
+GUEST_EMAIL = "guest1@caloriepunisher.com"
+
+
+def profile_dict(user, is_guest):
+    bmr = calculate_bmr(user.gender, user.age, user.weight_kg, user.height_cm)
+    return dict(user.to_dict(), bmr=round(bmr, 2), is_guest=is_guest)
+
+
+@router.get("/profile")
+async def get_user_profile(user=Depends(optional_user), db=Depends(get_db)):
+    if user is not None:
+        return profile_dict(user, is_guest=False)
+    guest = await db.scalar(
+        select(User).where(User.username == GUEST_USERNAME, User.email == GUEST_EMAIL)
+    )
+    if guest is None:
+        raise HTTPException(404, "Guest profile not initialized. Start app.py first!")
+    return profile_dict(guest, is_guest=True)
+
+
+@router.put("/profile")
+async def update_user_profile(
+    update: ProfileUpdate, user=Depends(current_user), db=Depends(get_db)
+):
+    for field, value in update.model_dump(exclude_unset=True).items():
+        if value is not None:
+            setattr(user, field, value)
+    # Le cache di auth e profilo dell'app Flask dimenticano questo utente
+    user.catalog_version = await bump_user_version(db)
+    await db.commit()
+    return {"message": "Profile updated successfully!", "user": user.to_dict()}
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+
+from backend.auth import current_user
+from backend.catalog import catalog
+from backend.config import Config
+from backend.database import get_db, get_read_db
+from backend.models import GeneratedWorkout, GeneratedWorkoutSegment
+from backend.schemas import WorkoutRequest
+from backend.services.cursors import InvalidCursor, decode_cursor, encode_cursor
+from backend.services.planner import plan_workout
+from backend.services.reports import render_workout_report
+from backend.workers import run_in_process
+
+router = APIRouter(tags=["workouts"])
+
+WITH_SEGMENTS = selectinload(GeneratedWorkout.segments)
+
+
+@router.post("/generate_workout", status_code=201)
+async def generate_workout(
+    request: WorkoutRequest, user=Depends(current_user), db=Depends(get_db)
+):
+    kcal_to_burn = (
+        request.kcal_to_burn
+    )  # tra 0 e WORKOUT_MAX_KCAL: lo garantisce lo schema
+    catalog_version, exercises = await catalog.exercises(db)
+    if not exercises:
+        raise HTTPException(500, "No exercises defined. How do you expect to suffer?")
+
+    workout_plan, estimated_time = await run_in_threadpool(
+        plan_workout,
+        kcal_to_burn,
+        user.weight_kg,
+        exercises,
+        strategy=Config.WORKOUT_PLANNER,
+        seed=Config.WORKOUT_PLANNER_SEED,
+        catalog_version=catalog_version,
+    )
+    if not workout_plan:
+        raise HTTPException(
+            500,
+            "Could not generate a suitable workout plan. "
+            "Maybe try eating less or add more brutal exercises!",
+        )
+
+    new_workout = GeneratedWorkout(
+        user_id=user.id,
+        kcal_to_burn=kcal_to_burn,
+        estimated_total_time_min=estimated_time,
+        generation_date=datetime.utcnow(),
+        segments=GeneratedWorkoutSegment.from_plan(workout_plan),
+    )
+    db.add(new_workout)
+    await db.commit()
+    return {
+        "message": "Workout generated successfully! Your pain is just beginning!",
+        "workout": new_workout.to_dict(),
+    }
+
+
+@router.get("/workouts/history")
+async def get_workout_history(
+    limit: int = Query(None, ge=1),
+    cursor: str = None,
+    user=Depends(current_user),
+    db=Depends(get_read_db),
+):
+    """
+    Storico dei workout, dal più recente. Con limit/cursor paginazione keyset su
+    (generation_date, id), con gli stessi cursori dell'app Flask.
+    """
+    try:
+        after = decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor. Stop tampering with the timeline!")
+
+    query = (
+        select(GeneratedWorkout)
+        .options(WITH_SEGMENTS)
+        .where(GeneratedWorkout.user_id == user.id)
+        .order_by(GeneratedWorkout.generation_date.desc(), GeneratedWorkout.id.desc())
+    )
+    if after:
+        last_date, last_id = after
+        query = query.where(
+            or_(
+                GeneratedWorkout.generation_date < last_date,
+                and_(
+                    GeneratedWorkout.generation_date == last_date,
+                    GeneratedWorkout.id < last_id,
+                ),
+            )
+        )
+
+    if cursor is None and limit is None:
+        return [workout.to_dict() for workout in await db.scalars(query)]
+
+    limit = min(
+        limit or Config.WORKOUT_HISTORY_PAGE_SIZE, Config.WORKOUT_HISTORY_MAX_PAGE_SIZE
+    )
+    workouts = list(await db.scalars(query.limit(limit + 1)))
+    next_cursor = None
+    if len(workouts) > limit:
+        workouts = workouts[:limit]
+        next_cursor = encode_cursor(workouts[-1].generation_date, workouts[-1].id)
+    return {
+        "workouts": [workout.to_dict() for workout in workouts],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/workout_report/{workout_id}/pdf")
+async def get_workout_pdf_report(
+    workout_id: int, user=Depends(current_user), db=Depends(get_read_db)
+):
+    workout = await db.scalar(
+        select(GeneratedWorkout)
+        .options(WITH_SEGMENTS)
+        .where(GeneratedWorkout.id == workout_id, GeneratedWorkout.user_id == user.id)
+    )
+    if workout is None:
+        raise HTTPException(404, "Workout not found. Did you even train?")
+
+    content = await run_in_process(
+        render_workout_report,
+        username=user.username,
+        generation_date=workout.generation_date,
+        kcal_to_burn=workout.kcal_to_burn,
+        estimated_total_time_min=workout.estimated_total_time_min,
+        workout_details=[segment.to_dict() for segment in workout.segments],
+    )
+    return Response(
+        content,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": "attachment; "
+            f'filename="workout_report_{workout_id}.pdf"',
+            "Cache-Control": "private",
+        },
+    )
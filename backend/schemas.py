@@ -1,17 +1,41 @@
-from pydantic import BaseModel
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+from backend.config import Config
+
+
+class MealItemIn(BaseModel):
+    food_item_id: int
+    grams_consumed: float = Field(gt=0)
+
 
 class MealIn(BaseModel):
-    name: str
-    calories: float
-    protein: float
-    carbs: float
-    fat: float
-
-class WorkoutExercise(BaseModel):
-    name: str
-    duration: int
-
-class WorkoutPlan(BaseModel):
-    total_calories: float
-    exercises: List[WorkoutExercise]
+    description: str = "Pasto non specificato"
+    meal_time: Optional[datetime] = None
+    items: List[MealItemIn] = Field(min_length=1)
+
+    @field_validator("meal_time")
+    @classmethod
+    def meal_time_in_utc(cls, meal_time):
+        # Come meal_logging.parse_meal: nel database le date sono in UTC senza fuso
+        if meal_time is not None and meal_time.tzinfo is not None:
+            meal_time = meal_time.astimezone(timezone.utc).replace(tzinfo=None)
+        return meal_time
+
+
+class MealBatchIn(BaseModel):
+    meals: List[MealIn] = Field(min_length=1)
+
+
+class WorkoutRequest(BaseModel):
+    kcal_to_burn: float = Field(gt=0, le=Config.WORKOUT_MAX_KCAL)
+
+
+class ProfileUpdate(BaseModel):
+    gender: Optional[str] = None
+    age: Optional[int] = None
+    weight_kg: Optional[float] = None
+    height_cm: Optional[float] = None
+    profile_picture_url: Optional[str] = None
@@ -0,0 +1,118 @@
+"""
+Analisi nutrizionali su intervalli lunghi: andamento di kcal e macronutrienti
+per giorno, settimana o mese, bilancio tra kcal mangiate e kcal da bruciare e
+ripartizione per categoria di alimento.
+
+Le funzioni lavorano su righe già proiettate (tuple), non su oggetti ORM: le
+aggregazioni sono groupby/resample di pandas, quindi anni di storico costano
+qualche decina di millisecondi.
+"""
+
+import pandas as pd
+
+# Frequenze di pandas per i periodi supportati (settimane da lunedì)
+FREQUENCIES = {"day": "D", "week": "W-MON", "month": "MS"}
+# Colonne delle righe attese da nutrition_summary
+MEAL_COLUMNS = ("meal_time", "kcal", "carbs", "proteins", "fats", "category")
+WORKOUT_COLUMNS = ("generation_date", "kcal_to_burn")
+MACROS = ("kcal", "carbs", "proteins", "fats")
+# kcal per grammo di macronutriente (fattori di Atwater)
+KCAL_PER_GRAM = {"carbs": 4.0, "proteins": 4.0, "fats": 9.0}
+UNKNOWN_CATEGORY = "Non Specificato"
+
+
+def period_start(moment, period):
+    """Inizio del periodo (giorno, settimana o mese) che contiene `moment`."""
+    day = pd.Timestamp(moment).normalize()
+    if period == "week":
+        return day - pd.Timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _frame(rows, columns, time_column):
+    frame = pd.DataFrame.from_records(list(rows), columns=columns)
+    frame[time_column] = pd.to_datetime(frame[time_column])
+    return frame.set_index(time_column)
+
+
+def _resample(frame, columns, index, period):
+    totals = frame[list(columns)].resample(
+        FREQUENCIES[period], label="left", closed="left"
+    )
+    return totals.sum().reindex(index, fill_value=0.0)
+
+
+def nutrition_summary(meal_rows, workout_rows, date_from, date_to, period="week"):
+    """
+    Serie compatte (una lista per metrica, allineate a `start`) tra `date_from`
+    e `date_to`, più i totali e la ripartizione per categoria.
+    `meal_rows`: tuple MEAL_COLUMNS, una per MealItem.
+    `workout_rows`: tuple WORKOUT_COLUMNS, una per GeneratedWorkout.
+    """
+    if period not in FREQUENCIES:
+        raise ValueError(f"Unknown period {period!r}")
+
+    index = pd.date_range(
+        period_start(date_from, period), date_to, freq=FREQUENCIES[period]
+    )
+    meals = _frame(meal_rows, MEAL_COLUMNS, "meal_time")
+    workouts = _frame(workout_rows, WORKOUT_COLUMNS, "generation_date")
+
+    intake = _resample(meals, MACROS, index, period)
+    burned = _resample(workouts, ("kcal_to_burn",), index, period)["kcal_to_burn"]
+    balance = intake["kcal"] - burned
+
+    categories = (
+        meals.fillna({"category": UNKNOWN_CATEGORY})
+        .groupby("category")[list(MACROS)]
+        .sum()
+        .sort_values("kcal", ascending=False)
+    )
+    total_kcal = float(intake["kcal"].sum())
+    categories["share"] = categories["kcal"] / total_kcal if total_kcal else 0.0
+
+    macro_kcal = pd.Series(
+        {macro: intake[macro].sum() * factor for macro, factor in KCAL_PER_GRAM.items()}
+    )
+    macro_total = macro_kcal.sum()
+    first_day, last_day = pd.Timestamp(date_from), pd.Timestamp(date_to)
+    days = (last_day.normalize() - first_day.normalize()).days + 1
+    total_burned = float(burned.sum())
+
+    return {
+        "period": period,
+        "series": {
+            "start": index.strftime("%Y-%m-%d").tolist(),
+            "kcal_in": intake["kcal"].round(1).tolist(),
+            "carbs_g": intake["carbs"].round(1).tolist(),
+            "proteins_g": intake["proteins"].round(1).tolist(),
+            "fats_g": intake["fats"].round(1).tolist(),
+            "kcal_to_burn": burned.round(1).tolist(),
+            "balance": balance.round(1).tolist(),
+        },
+        "categories": [
+            {
+                "category": row.Index,
+                "kcal": round(row.kcal, 1),
+                "carbs_g": round(row.carbs, 1),
+                "proteins_g": round(row.proteins, 1),
+                "fats_g": round(row.fats, 1),
+                "share": round(row.share, 4),
+            }
+            for row in categories.itertuples()
+        ],
+        "totals": {
+            "kcal_in": round(total_kcal, 1),
+            "kcal_to_burn": round(total_burned, 1),
+            "balance": round(total_kcal - total_burned, 1),
+            "days": days,
+            "days_with_meals": int(meals.index.normalize().nunique()),
+            "avg_daily_kcal_in": round(total_kcal / days, 1),
+            "macro_kcal_share": {
+                macro: round(float(kcal / macro_total), 4) if macro_total else 0.0
+                for macro, kcal in macro_kcal.items()
+            },
+        },
+    }
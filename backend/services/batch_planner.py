@@ -0,0 +1,82 @@
+import numpy as np
+
+from backend.services.planner import PLANNERS
+
+
+class BatchPlan:
+    """
+    Piani di N utenti in forma piatta: un elemento per segmento, raggruppati per
+    utente (`offsets[i]:offsets[i + 1]` sono i segmenti dell'utente i).
+    """
+
+    def __init__(
+        self, offsets, position, exercise_id, duration_min, kcal_burned, total_time
+    ):
+        self.offsets = offsets
+        self.position = position
+        self.exercise_id = exercise_id
+        self.duration_min = duration_min
+        self.kcal_burned_segment = kcal_burned
+        self.total_time = total_time
+
+    def __len__(self):
+        return len(self.total_time)
+
+    def segments_for(self, index):
+        """Segmenti dell'utente `index` nel formato di generate_workout_logic."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return [
+            {
+                "exercise_id": int(self.exercise_id[i]),
+                "duration_min": float(self.duration_min[i]),
+                "kcal_burned_segment": float(self.kcal_burned_segment[i]),
+            }
+            for i in range(start, end)
+        ]
+
+
+def plan_batch(
+    kcal_targets,
+    user_weights_kg,
+    catalog,
+    strategy="optimal",
+    seed=None,
+    max_exercise_duration_min=15,
+):
+    """
+    Piani di un intero insieme di utenti con lo stesso motore di
+    /api/generate_workout (PLANNERS[strategy]): il workout notturno è quello che
+    l'utente otterrebbe chiedendolo a mano. Gli utenti con le stesse kcal e lo
+    stesso peso condividono un solo calcolo; i piani escono già in array NumPy,
+    pronti per gli INSERT multi-riga.
+    """
+    planner = PLANNERS[strategy]
+    kcal = np.asarray(kcal_targets, dtype=np.float64)
+    weights = np.asarray(user_weights_kg, dtype=np.float64)
+
+    computed = {}
+    plans = []
+    for key in zip(kcal.tolist(), weights.tolist()):
+        if key not in computed:
+            computed[key] = planner.plan(*key, catalog, max_exercise_duration_min, seed)
+        plans.append(computed[key])
+
+    users = len(plans)
+    counts = np.fromiter((len(plan) for plan, _ in plans), np.int64, count=users)
+    offsets = np.zeros(users + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    segments = [segment for plan, _ in plans for segment in plan]
+
+    def column(field, dtype):
+        return np.fromiter(
+            (segment[field] for segment in segments), dtype, count=len(segments)
+        )
+
+    return BatchPlan(
+        offsets,
+        np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts),
+        column("exercise_id", np.int64),
+        column("duration_min", np.float64),
+        column("kcal_burned_segment", np.float64),
+        np.fromiter((total for _, total in plans), np.float64, count=users),
+    )
@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    """Cursore di paginazione malformato o manomesso."""
+
+
+def encode_cursor(*values):
+    """Cursore opaco per la paginazione keyset; i datetime diventano ISO 8601."""
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, *converters):
+    """Decodifica un cursore applicando a ogni valore il convertitore corrispondente."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(converters):
+            raise InvalidCursor(token)
+        return tuple(convert(value) for convert, value in zip(converters, values))
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
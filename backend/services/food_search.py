@@ -0,0 +1,199 @@
+import bisect
+import heapq
+import threading
+import unicodedata
+from itertools import repeat
+
+# Pesi usati per il ranking: match esatto > prefisso > match "con typo"
+EXACT_WEIGHT = 3.0
+PREFIX_WEIGHT = 2.0
+FUZZY_WEIGHT = 1.5
+STARTS_WITH_BONUS = 1.0
+
+
+def normalize(text):
+    """Minuscolo, senza accenti e con la punteggiatura trasformata in spazi."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return "".join(ch if ch.isalnum() else " " for ch in text.lower()).strip()
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def trigrams(token):
+    padded = f"${token}$"
+    return {a + b + c for a, b, c in zip(padded, padded[1:], padded[2:])}
+
+
+class FoodSearchIndex:
+    """
+    Indice di ricerca in memoria per i nomi dei FoodItem.
+    Combina un vocabolario ordinato (ricerca per prefisso con bisect), posting list
+    ordinate per lunghezza del nome e un indice a trigrammi sui token per
+    tollerare gli errori di battitura.
+    """
+
+    def __init__(
+        self,
+        max_candidates=200,
+        max_prefix_expansions=64,
+        max_fuzzy_expansions=8,
+        fuzzy_threshold=0.45,
+    ):
+        self.max_candidates = max_candidates
+        self.max_prefix_expansions = max_prefix_expansions
+        self.max_fuzzy_expansions = max_fuzzy_expansions
+        self.fuzzy_threshold = fuzzy_threshold
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.ready = False
+        self._names = {}  # id -> nome normalizzato
+        self._tokens = {}  # id -> tupla di token del nome
+        self._postings = {}  # token -> [(lunghezza nome, id), ...] ordinata
+        self._vocab = []  # token ordinati alfabeticamente
+        self._trigrams = {}  # trigramma -> set di token
+
+    def __len__(self):
+        return len(self._names)
+
+    def build(self, rows):
+        """Ricostruisce l'indice da un iterabile di coppie (id, nome)."""
+        with self._lock:
+            self._reset()
+            for food_id, name in rows:
+                self._index(food_id, name, sort=False)
+            for postings in self._postings.values():
+                postings.sort()
+            self._vocab = sorted(self._postings)
+            self.ready = True
+
+    def ensure_built(self, load_rows):
+        """Costruisce l'indice alla prima chiamata usando `load_rows()`."""
+        if self.ready:
+            return
+        with self._lock:
+            if not self.ready:
+                self.build(load_rows())
+
+    def add(self, food_id, name):
+        """Aggiunge o aggiorna un alimento; ignorato finché l'indice non è pronto."""
+        with self._lock:
+            if not self.ready:
+                return
+            if food_id in self._names:
+                self._unindex(food_id)
+            self._index(food_id, name, sort=True)
+
+    def remove(self, food_id):
+        with self._lock:
+            if food_id in self._names:
+                self._unindex(food_id)
+
+    def _index(self, food_id, name, sort):
+        normalized = normalize(name)
+        tokens = tuple(dict.fromkeys(normalized.split()))
+        self._names[food_id] = normalized
+        self._tokens[food_id] = tokens
+        entry = (len(normalized), food_id)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = []
+                if sort:
+                    bisect.insort(self._vocab, token)
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            if sort:
+                bisect.insort(postings, entry)
+            else:
+                postings.append(entry)
+
+    def _unindex(self, food_id):
+        normalized = self._names.pop(food_id)
+        entry = (len(normalized), food_id)
+        for token in self._tokens.pop(food_id):
+            postings = self._postings[token]
+            postings.pop(bisect.bisect_left(postings, entry))
+            if postings:
+                continue
+            del self._postings[token]
+            self._vocab.pop(bisect.bisect_left(self._vocab, token))
+            for gram in trigrams(token):
+                bucket = self._trigrams.get(gram)
+                if bucket is not None:
+                    bucket.discard(token)
+                    if not bucket:
+                        del self._trigrams[gram]
+
+    def _expand(self, token):
+        """Restituisce {token_vocabolario: peso} per un token della query."""
+        expansions = {}
+        if token in self._postings:
+            expansions[token] = EXACT_WEIGHT
+        start = bisect.bisect_left(self._vocab, token)
+        end = start + self.max_prefix_expansions
+        for candidate in self._vocab[start:end]:
+            if not candidate.startswith(token):
+                break
+            expansions.setdefault(candidate, PREFIX_WEIGHT)
+        if expansions:
+            return expansions
+
+        # Nessun match esatto o per prefisso: probabilmente un typo
+        grams = trigrams(token)
+        counts = {}
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                if abs(len(candidate) - len(token)) <= 2:
+                    counts[candidate] = counts.get(candidate, 0) + 1
+        scored = []
+        for candidate, common in counts.items():
+            similarity = 2.0 * common / (len(grams) + len(candidate))
+            if similarity >= self.fuzzy_threshold:
+                scored.append((similarity, candidate))
+        scored.sort(reverse=True)
+        for similarity, candidate in scored[: self.max_fuzzy_expansions]:
+            expansions[candidate] = FUZZY_WEIGHT * similarity
+        return expansions
+
+    def search(self, query, limit=20):
+        """Restituisce gli id dei migliori `limit` alimenti, ordinati per rilevanza."""
+        normalized_query = normalize(query)
+        query_tokens = list(dict.fromkeys(normalized_query.split()))
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            expansions = [self._expand(token) for token in query_tokens]
+            if not any(expansions):
+                return []
+
+            # Il token più selettivo genera i candidati, gli altri li rifiniscono
+            def posting_size(exp):
+                return sum(len(self._postings[t]) for t in exp) if exp else float("inf")
+
+            driver = min(expansions, key=posting_size)
+            candidates = set()
+            for token in sorted(driver, key=driver.get, reverse=True):
+                for _, food_id in self._postings[token][: self.max_candidates]:
+                    candidates.add(food_id)
+                if len(candidates) >= self.max_candidates:
+                    break
+
+            getters = [exp.get for exp in expansions]
+            ranked = []
+            for food_id in candidates:
+                tokens = self._tokens[food_id]
+                score = 0.0
+                for get in getters:
+                    score += max(map(get, tokens, repeat(0.0)))
+                name = self._names[food_id]
+                if name.startswith(normalized_query):
+                    score += STARTS_WITH_BONUS
+                ranked.append((-score, len(name), food_id))
+
+        return [food_id for _, _, food_id in heapq.nsmallest(limit, ranked)]
@@ -0,0 +1,135 @@
+"""
+Lettura in streaming dei dump di Open Food Facts (CSV/TSV o JSONL, anche .gz):
+un prodotto alla volta, in memoria costante. I campi del FoodItem escono da
+product_to_food_fields, la stessa mappatura della route dei barcode.
+"""
+
+import csv
+import gzip
+import io
+import json
+import math
+
+from .openfoodfacts import product_to_food_fields, text_field
+
+# Nutrienti letti da product_to_food_fields
+NUTRIMENTS = (
+    "energy-kcal_100g",
+    "carbohydrates_100g",
+    "proteins_100g",
+    "fat_100g",
+    "sugars_100g",
+    "fiber_100g",
+    "sodium_100g",
+)
+# Lunghezze delle colonne di FoodItem: nei dump ci sono nomi e URL lunghissimi
+FIELD_LIMITS = {"name": 128, "category": 64, "image_url": 256}
+BARCODE_MAX_LENGTH = 64
+
+csv.field_size_limit(2**31 - 1)
+
+
+def dump_format(path):
+    """'csv' o 'jsonl' in base all'estensione (.gz ignorato)."""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".json", ".ndjson")):
+        return "jsonl"
+    if name.endswith((".csv", ".tsv")):
+        return "csv"
+    raise ValueError(f"Unknown dump format: {path}")
+
+
+def open_dump(path):
+    """
+    Restituisce (file binario grezzo, testo decodificato). La posizione del file
+    grezzo dice quanti byte del dump sono stati letti, anche se è compresso.
+    """
+    raw = open(path, "rb")
+    stream = gzip.GzipFile(fileobj=raw) if path.endswith(".gz") else raw
+    return raw, io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _nutriments(values):
+    numbers = {key: _number(values.get(key)) for key in NUTRIMENTS}
+    return {key: number for key, number in numbers.items() if number is not None}
+
+
+def csv_products(text):
+    """
+    Prodotti di un export CSV. Quello ufficiale è separato da tabulazioni e
+    senza quoting; un CSV con le virgole usa il quoting standard.
+    """
+    header = text.readline()
+    if "\t" in header:
+        options = {"delimiter": "\t", "quoting": csv.QUOTE_NONE}
+    else:
+        options = {"delimiter": ","}
+    columns = next(csv.reader([header], **options))
+    for row in csv.reader(text, **options):
+        values = dict(zip(columns, row))
+        # Solo i campi valorizzati: product_to_food_fields applica i suoi default
+        product = {
+            key: values[key]
+            for key in ("product_name", "product_name_it", "categories", "image_url")
+            if values.get(key)
+        }
+        product["nutriments"] = _nutriments(values)
+        yield values.get("code"), product
+
+
+def jsonl_products(text):
+    """Prodotti di un dump JSONL, un documento per riga (None se illeggibile)."""
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            product = json.loads(line)
+        except ValueError:
+            yield None, None
+            continue
+        if not isinstance(product, dict):
+            yield None, None
+            continue
+        nutriments = product.get("nutriments")
+        product["nutriments"] = _nutriments(
+            nutriments if isinstance(nutriments, dict) else {}
+        )
+        yield product.get("code") or product.get("_id"), product
+
+
+def food_fields(products):
+    """
+    Campi FoodItem per ogni prodotto importabile, troncati alle lunghezze delle
+    colonne. Genera (barcode, campi); campi è None per i prodotti scartati
+    (senza barcode, nome o kcal: inutili per contare le calorie). Un nome null o
+    che non è testo conta come mancante.
+    """
+    for barcode, product in products:
+        barcode = str(barcode).strip() if barcode else ""
+        if (
+            not product
+            or not barcode
+            or len(barcode) > BARCODE_MAX_LENGTH
+            or "energy-kcal_100g" not in product["nutriments"]
+            or not text_field(product, "product_name", "product_name_it")
+        ):
+            yield barcode, None
+            continue
+        fields = product_to_food_fields(product, barcode)
+        for key, limit in FIELD_LIMITS.items():
+            if isinstance(fields[key], str):
+                fields[key] = fields[key].strip()[:limit]
+        yield barcode, fields
+
+
+def read_products(text, fmt):
+    """(barcode, prodotto) dal testo del dump nel formato `fmt` ('csv' o 'jsonl')."""
+    return csv_products(text) if fmt == "csv" else jsonl_products(text)
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .singleflight import SingleFlight
+
+USER_AGENT = "CaloriePunisher/1.0"
+
+
+def text_field(product, *keys, default=None):
+    """
+    Primo tra i campi `keys` che sia una stringa non vuota, altrimenti `default`:
+    nei dump ci sono null, numeri e liste dove ci si aspetterebbe del testo.
+    """
+    for key in keys:
+        value = product.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return default
+
+
+def product_to_food_fields(product, barcode):
+    """Converte un prodotto Open Food Facts nei campi di un FoodItem."""
+    name = text_field(
+        product, "product_name", "product_name_it", default="Nome Sconosciuto"
+    )
+    category = text_field(product, "categories", default="Non Specificato")
+    nutriments = product.get("nutriments", {})
+
+    sodium = nutriments.get("sodium_100g", 0)
+    if sodium > 0:
+        sodium *= 1000
+
+    return {
+        "name": name,
+        "category": category.split(",")[0].strip() or "Non Specificato",
+        "kcal_per_100g": nutriments.get("energy-kcal_100g", 0),
+        "carbs_per_100g": nutriments.get("carbohydrates_100g", 0),
+        "proteins_per_100g": nutriments.get("proteins_100g", 0),
+        "fats_per_100g": nutriments.get("fat_100g", 0),
+        "sugars_per_100g": nutriments.get("sugars_100g", 0),
+        "fiber_per_100g": nutriments.get("fiber_100g", 0),
+        "sodium_mg_per_100g": sodium,
+        "image_url": text_field(product, "image_url", "image_front_url"),
+        "barcode_upc": barcode,
+    }
+
+
+class TTLCache:
+    """Piccola cache thread-safe con scadenza per chiave e numero massimo di voci."""
+
+    def __init__(self, ttl_seconds, max_entries=100_000, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, self._clock() + self.ttl_seconds)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def build_session(pool_size):
+    """Sessione HTTP keep-alive con un pool di connessioni riutilizzabili."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class OpenFoodFactsClient:
+    """
+    Client per le API prodotto di Open Food Facts.
+    Riusa le connessioni, ricorda per `not_found_ttl` secondi i barcode
+    inesistenti e unisce le richieste concorrenti per lo stesso barcode.
+    Gli errori di rete (requests.RequestException) vengono propagati.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        timeout=5,
+        pool_size=20,
+        not_found_ttl=3600,
+        not_found_max_entries=100_000,
+        session=None,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = session or build_session(pool_size)
+        self.not_found = TTLCache(not_found_ttl, not_found_max_entries)
+        self._flights = SingleFlight()
+
+    def fetch_product(self, barcode):
+        """Restituisce il dict del prodotto, oppure None se non esiste."""
+        if self.not_found.get(barcode):
+            return None
+        return self._flights.do(barcode, self._fetch, barcode)
+
+    def _fetch(self, barcode):
+        response = self.session.get(
+            f"{self.base_url}{barcode}.json", timeout=self.timeout
+        )
+        if response.status_code == 404:
+            self.not_found.set(barcode, True)
+            return None
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("status") == 1 and "product" in data:
+            return data["product"]
+        self.not_found.set(barcode, True)
+        return None
+
+    def close(self):
+        self.session.close()
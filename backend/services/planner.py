@@ -0,0 +1,340 @@
+import math
+import random
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.config import Config
+
+
+def catalog_from_exercises(exercises):
+    """Catalogo compatto e hashable: ((id, acronimo, nome, kcal/kg/min), ...)."""
+    return tuple(
+        (ex.id, ex.acronym, ex.name, ex.kcal_per_kg_per_min)
+        for ex in sorted(exercises, key=lambda ex: ex.id)
+    )
+
+
+def _tenths(duration_min):
+    """Durata arrotondata per eccesso al decimo di minuto (come viene mostrata)."""
+    return math.ceil(round(duration_min * 10, 6)) / 10
+
+
+def _total_time(workout_plan):
+    """Tempo totale: la somma esatta delle durate dei segmenti."""
+    return round(sum(segment["duration_min"] for segment in workout_plan), 1)
+
+
+def _segment(exercise, duration_min, kcal_per_minute):
+    exercise_id, acronym, name, _ = exercise
+    return {
+        "exercise_id": exercise_id,
+        "exercise_acronym": acronym,
+        "exercise_name": name,
+        "duration_min": round(duration_min, 1),
+        "kcal_burned_segment": round(kcal_per_minute * duration_min, 2),
+    }
+
+
+class Planner:
+    """Interfaccia comune dei motori di pianificazione dei workout."""
+
+    name = None
+
+    def plan(
+        self,
+        kcal_to_burn,
+        user_weight_kg,
+        catalog,
+        max_exercise_duration_min=15,
+        seed=None,
+    ):
+        """Restituisce (lista di segmenti, tempo totale stimato in minuti)."""
+        raise NotImplementedError
+
+
+class GreedyPlanner(Planner):
+    """
+    La strategia storica: esercizi mescolati e presi uno alla volta, ogni
+    segmento di almeno 5 minuti. Con un seed il risultato è riproducibile.
+    """
+
+    name = "greedy"
+
+    def plan(
+        self,
+        kcal_to_burn,
+        user_weight_kg,
+        catalog,
+        max_exercise_duration_min=15,
+        seed=None,
+    ):
+        if not catalog or kcal_to_burn <= 0:
+            return [], 0
+
+        rng = random.Random(seed)
+        workout_plan = []
+        remaining_kcal_to_burn = kcal_to_burn
+
+        sorted_exercises = sorted(catalog, key=lambda ex: ex[3], reverse=True)
+        if all(ex[3] * user_weight_kg <= 0 for ex in sorted_exercises):
+            return [], 0
+
+        exercise_pool = []
+        while remaining_kcal_to_burn > 0:
+            if not exercise_pool:
+                exercise_pool = list(sorted_exercises)
+                rng.shuffle(exercise_pool)
+                exercise_pool.reverse()
+
+            current_exercise = exercise_pool.pop()
+            kcal_per_minute_for_user = current_exercise[3] * user_weight_kg
+            if kcal_per_minute_for_user <= 0:
+                continue
+
+            required_duration = remaining_kcal_to_burn / kcal_per_minute_for_user
+            # Al decimo di minuto, per eccesso: il segmento salvato è quello bruciato
+            duration_min = max(
+                5.0, min(max_exercise_duration_min, _tenths(required_duration))
+            )
+
+            segment = _segment(current_exercise, duration_min, kcal_per_minute_for_user)
+            workout_plan.append(segment)
+            remaining_kcal_to_burn -= kcal_per_minute_for_user * duration_min
+
+        return workout_plan, _total_time(workout_plan)
+
+
+class KnapsackPlanner(Planner):
+    """
+    Pianificazione ottima come knapsack a gruppi: per ogni esercizio si sceglie
+    quanti minuti farlo in totale (0 oppure una durata divisibile in segmenti
+    tra `min_segment_min` e la durata massima), minimizzando
+    sforamento_kcal + minute_weight * minuti_totali con il vincolo di bruciare
+    almeno le kcal richieste. La programmazione dinamica è vettorizzata con NumPy.
+    Tempo e memoria crescono con le kcal (uno stato per kcal, per esercizio):
+    sopra `max_target_kcal` (WORKOUT_OPTIMAL_MAX_KCAL) si passa alla strategia
+    greedy.
+    """
+
+    name = "optimal"
+
+    def __init__(
+        self,
+        min_segment_min=5.0,
+        step_min=0.5,
+        minute_weight=1.0,
+        max_target_kcal=Config.WORKOUT_OPTIMAL_MAX_KCAL,
+    ):
+        self.min_segment_min = min_segment_min
+        self.step_min = step_min
+        self.minute_weight = minute_weight
+        self.max_target_kcal = max_target_kcal
+
+    def _durations(self, rounds, max_duration):
+        """Durate totali ammesse per un esercizio, da spezzare in segmenti validi."""
+        durations = []
+        steps = int(round(rounds * max_duration / self.step_min))
+        for i in range(1, steps + 1):
+            total = i * self.step_min
+            segments = math.ceil(total / max_duration - 1e-9)
+            if total >= self.min_segment_min * segments:
+                durations.append(total)
+        return durations
+
+    def plan(
+        self,
+        kcal_to_burn,
+        user_weight_kg,
+        catalog,
+        max_exercise_duration_min=15,
+        seed=None,
+    ):
+        exercises = [ex for ex in catalog if ex[3] * user_weight_kg > 0]
+        if not exercises or kcal_to_burn <= 0:
+            return [], 0
+        if (
+            max_exercise_duration_min < self.min_segment_min
+            or kcal_to_burn > self.max_target_kcal
+        ):
+            return GreedyPlanner().plan(
+                kcal_to_burn, user_weight_kg, catalog, max_exercise_duration_min, seed
+            )
+
+        rates = [ex[3] * user_weight_kg for ex in exercises]
+        target = int(math.ceil(kcal_to_burn))
+        # Quanti "giri" completi servono perché il target sia raggiungibile
+        full_round_kcal = sum(rates) * max_exercise_duration_min
+        rounds = max(1, math.ceil(kcal_to_burn / full_round_kcal))
+        durations = self._durations(rounds, max_exercise_duration_min)
+
+        # Stati: kcal intere bruciate (per difetto); l'ultimo raccoglie gli sforamenti
+        window = int(math.ceil(max(rates) * max_exercise_duration_min))
+        size = target + window + 1
+        cap = size - 1
+        dp = np.full(size, np.inf)
+        dp[0] = 0.0
+        layers = []
+
+        for rate in rates:
+            new = dp.copy()
+            choice = np.full(size, -1, dtype=np.int32)
+            prev = np.arange(size, dtype=np.int32)
+            for index, duration in enumerate(durations):
+                value = int(math.floor(rate * duration + 1e-9))
+                if value <= 0:
+                    continue
+                if value < cap:
+                    candidate = dp[: cap - value] + duration
+                    target_slice = slice(value, cap)
+                    better = candidate < new[target_slice]
+                    new[target_slice] = np.where(better, candidate, new[target_slice])
+                    choice[target_slice] = np.where(better, index, choice[target_slice])
+                    prev[target_slice] = np.where(
+                        better,
+                        np.arange(0, cap - value, dtype=np.int32),
+                        prev[target_slice],
+                    )
+                low = max(0, cap - value)
+                best = low + int(np.argmin(dp[low:]))
+                if dp[best] + duration < new[cap]:
+                    new[cap] = dp[best] + duration
+                    choice[cap] = index
+                    prev[cap] = best
+            layers.append((choice, prev))
+            dp = new
+
+        reached = dp[target:]
+        cost = np.arange(len(reached)) + self.minute_weight * reached
+        if not np.isfinite(cost).any():
+            return GreedyPlanner().plan(
+                kcal_to_burn, user_weight_kg, catalog, max_exercise_duration_min, seed
+            )
+
+        state = target + int(np.argmin(cost))
+        totals = [0.0] * len(exercises)
+        for position in range(len(exercises) - 1, -1, -1):
+            choice, prev = layers[position]
+            if choice[state] >= 0:
+                totals[position] = durations[choice[state]]
+            state = int(prev[state])
+
+        # Ogni totale viene diviso in segmenti quasi uguali, in decimi di minuto
+        # che sommano esattamente al totale, alternando gli esercizi
+        per_exercise = []
+        for exercise, rate, total in sorted(
+            zip(exercises, rates, totals), key=lambda item: (-item[1], item[0][0])
+        ):
+            if total <= 0:
+                continue
+            count = math.ceil(total / max_exercise_duration_min - 1e-9)
+            base, extra = divmod(int(round(total * 10)), count)
+            per_exercise.append(
+                [(exercise, rate, (base + (i < extra)) / 10) for i in range(count)]
+            )
+
+        workout_plan = []
+        for round_index in range(max((len(s) for s in per_exercise), default=0)):
+            for segments in per_exercise:
+                if round_index < len(segments):
+                    exercise, rate, duration = segments[round_index]
+                    workout_plan.append(_segment(exercise, duration, rate))
+        if seed is not None:
+            random.Random(seed).shuffle(workout_plan)
+
+        return workout_plan, _total_time(workout_plan)
+
+
+class PlanCache:
+    """LRU thread-safe dei piani già calcolati."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+PLANNERS = {
+    KnapsackPlanner.name: KnapsackPlanner(),
+    GreedyPlanner.name: GreedyPlanner(),
+}
+
+plan_cache = PlanCache()
+
+
+def register_planner(planner):
+    PLANNERS[planner.name] = planner
+
+
+def plan_workout(
+    kcal_to_burn,
+    user_weight_kg,
+    exercises,
+    max_exercise_duration_min=15,
+    strategy="optimal",
+    seed=None,
+    catalog_version=None,
+):
+    """
+    Calcola un piano con il motore `strategy`. Per i motori deterministici
+    (o con un seed) il risultato viene memoizzato per
+    (kcal, peso, versione del catalogo); senza `catalog_version` la versione è
+    il contenuto stesso del catalogo. Il piano è sempre quello del target
+    esatto: arrotondarlo farebbe bruciare più kcal del richiesto.
+    """
+    planner = PLANNERS[strategy]
+    catalog = catalog_from_exercises(exercises)
+    if not catalog or kcal_to_burn <= 0:
+        return [], 0
+
+    if strategy == GreedyPlanner.name and seed is None:
+        # Senza seed la strategia greedy è casuale: niente memoizzazione
+        return planner.plan(
+            kcal_to_burn, user_weight_kg, catalog, max_exercise_duration_min
+        )
+
+    key = (
+        strategy,
+        kcal_to_burn,
+        user_weight_kg,
+        catalog_version if catalog_version is not None else catalog,
+        max_exercise_duration_min,
+        seed,
+    )
+    cached = plan_cache.get(key)
+    if cached is None:
+        workout_plan, total_time = planner.plan(
+            kcal_to_burn, user_weight_kg, catalog, max_exercise_duration_min, seed
+        )
+        cached = (tuple(tuple(s.items()) for s in workout_plan), total_time)
+        plan_cache.set(key, cached)
+
+    segments, total_time = cached
+    return [dict(segment) for segment in segments], total_time
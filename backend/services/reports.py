@@ -0,0 +1,124 @@
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+# Da incrementare a ogni modifica grafica: invalida i PDF già in cache
+TEMPLATE_VERSION = 2
+
+
+def _draw_background(p, width, height):
+    """Sfondo nero comune a tutte le pagine, registrato una volta come form XObject."""
+    p.beginForm("background")
+    p.setFillColor("black")
+    p.rect(0, 0, width, height, fill=1)
+    p.endForm()
+
+
+def _draw_report(
+    p,
+    width,
+    height,
+    username,
+    generation_date,
+    kcal_to_burn,
+    estimated_total_time_min,
+    workout_details,
+):
+    """Disegna un report a partire dalla pagina corrente del canvas."""
+    p.doForm("background")
+    p.setFillColor("white")
+
+    p.setFont("Helvetica-Bold", 24)
+    p.drawCentredString(width / 2, height - inch, "🔥 IL TUO REPORT DI BATTAGLIA 🔥")
+
+    p.setStrokeColorRGB(1, 0, 0)
+    p.line(inch, height - inch - 0.2 * inch, width - inch, height - inch - 0.2 * inch)
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(inch, height - inch - 0.7 * inch, f"Guerriero: {username}")
+    p.drawString(
+        inch,
+        height - inch - 1.0 * inch,
+        f"Data del Giudizio: {generation_date.strftime('%d/%m/%Y %H:%M')}",
+    )
+
+    p.setFont("Helvetica", 14)
+    p.drawString(inch, height - inch - 1.5 * inch, "Kcal da Bruciare (Il Tuo Debito):")
+    p.setFont("Helvetica-Bold", 20)
+    p.setFillColor("red")
+    p.drawString(
+        inch + 0.5 * inch, height - inch - 1.9 * inch, f"{kcal_to_burn:.2f} Kcal"
+    )
+    p.setFillColor("white")
+
+    p.setFont("Helvetica", 14)
+    p.drawString(inch, height - inch - 2.5 * inch, "Tempo Stimato di Agonia:")
+    p.setFont("Helvetica-Bold", 20)
+    p.setFillColor("red")
+    p.drawString(
+        inch + 0.5 * inch,
+        height - inch - 2.9 * inch,
+        f"{estimated_total_time_min:.1f} minuti",
+    )
+    p.setFillColor("white")
+
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(inch, height - inch - 3.5 * inch, "💀 IL TUO PIANO DI TORTURA 💀")
+
+    y_position = height - inch - 4.0 * inch
+    p.setFont("Helvetica", 12)
+
+    for item in workout_details:
+        if y_position < inch:
+            p.showPage()
+            p.doForm("background")
+            p.setFillColor("white")
+            y_position = height - inch
+            p.setFont("Helvetica-Bold", 18)
+            p.drawString(inch, y_position, "💀 CONTINUA IL PIANO 💀")
+            y_position -= 0.5 * inch
+            p.setFont("Helvetica", 12)
+
+        p.drawString(
+            inch + 0.2 * inch,
+            y_position,
+            f"• {item['exercise_name']} ({item['exercise_acronym']}): "
+            f"{item['duration_min']:.1f} minuti "
+            f"(Brucerai: {item['kcal_burned_segment']:.2f} kcal)",
+        )
+        y_position -= 0.25 * inch
+
+    p.showPage()
+
+
+def render_workout_report(**report):
+    """
+    Disegna il report di un workout e restituisce i byte del PDF.
+    Non tocca il database: riceve già tutti i valori da stampare
+    (username, generation_date, kcal_to_burn, estimated_total_time_min,
+    workout_details).
+    """
+    buffer = BytesIO()
+    # invariant: niente data di creazione né ID casuale, stessi dati -> stessi byte
+    p = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+    width, height = A4
+    _draw_background(p, width, height)
+    _draw_report(p, width, height, **report)
+    p.save()
+    return buffer.getvalue()
+
+
+def render_workout_reports_to_file(reports, path):
+    """
+    Disegna più report in un unico PDF scritto su `path`. Lo sfondo è un solo
+    form XObject condiviso da tutte le pagine del documento.
+    """
+    p = canvas.Canvas(path, pagesize=A4, invariant=1)
+    width, height = A4
+    _draw_background(p, width, height)
+    for report in reports:
+        _draw_report(p, width, height, **report)
+    p.save()
+    return path
@@ -0,0 +1,72 @@
+"""
+Fixture condivise. L'app Flask (moduli nella radice del repository) e il backend
+FastAPI leggono DATABASE_URL all'import: qui punta a un file SQLite temporaneo,
+creato con le migrazioni Alembic prima del primo test.
+"""
+
+import os
+import tempfile
+from itertools import count
+
+import pytest
+
+_workdir = tempfile.mkdtemp(prefix="calorie_punisher_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["REPORT_CACHE_DIR"] = os.path.join(_workdir, "report_cache")
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"  # i test non misurano scrypt
+os.environ.pop("READ_DATABASE_URL", None)
+
+from alembic import command  # noqa: E402
+from alembic.config import Config as AlembicConfig  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from profile_cache import guest_profile  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_usernames = count(1)
+
+
+def alembic_config():
+    # Senza file di configurazione: fileConfig disattiverebbe i logger dell'app
+    config = AlembicConfig()
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    return config
+
+
+@pytest.fixture(scope="session")
+def app():
+    with flask_app.app_context():
+        command.upgrade(alembic_config(), "head")
+        guest_profile()  # GuestWarrior (id 1) prima di qualunque registrazione
+    # Una route che supera il suo query_budget solleva QueryBudgetExceeded
+    flask_app.config["QUERY_BUDGET_STRICT"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """Registra un utente nuovo e restituisce (id, header Authorization)."""
+
+    def _register(**fields):
+        username = f"tester{next(_usernames)}"
+        user = dict(
+            username=username,
+            email=f"{username}@example.com",
+            password="punish-me",
+            gender="F",
+            age=30,
+            weight_kg=60.0,
+            height_cm=165.0,
+        )
+        user.update(fields)
+        response = client.post("/api/register", json=user)
+        assert response.status_code == 201, response.get_json()
+        body = response.get_json()
+        return body["user"]["id"], {"Authorization": f"Bearer {body['token']}"}
+
+    return _register
@@ -0,0 +1,109 @@
+"""
+Backend FastAPI (backend/main.py) sullo stesso database dei test: gli utenti si
+registrano con l'app Flask, come in produzione, e il token vale per entrambe.
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+
+from backend.database import engine
+from backend.main import app as api
+from backend.routes import profiles
+from app import db
+from models import FoodItem, Meal
+
+
+def call(method, url, **kwargs):
+    async def _call():
+        transport = httpx.ASGITransport(app=api)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await client.request(method, url, **kwargs)
+        finally:
+            await engine.dispose()  # le connessioni aiosqlite restano legate al loop
+
+    return asyncio.run(_call())
+
+
+def test_anonymous_profile_is_the_guest(app, register):
+    register()  # un utente vero in più non cambia chi è il guest
+
+    response = call("GET", "/api/profile")
+
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["is_guest"]
+    assert (profile["username"], profile["email"]) == (
+        profiles.GUEST_USERNAME,
+        profiles.GUEST_EMAIL,
+    )
+
+
+def test_missing_guest_is_404_not_another_user(app, register, monkeypatch):
+    register()
+    monkeypatch.setattr(profiles, "GUEST_EMAIL", "nobody@caloriepunisher.com")
+
+    assert call("GET", "/api/profile").status_code == 404
+
+
+def test_generate_workout_bounds_kcal(app, client, register):
+    client.post("/api/seed_exercises")
+    _, headers = register()
+
+    for kcal_to_burn in (0, -1, app.config["WORKOUT_MAX_KCAL"] + 1, 1e9):
+        response = call(
+            "POST",
+            "/api/generate_workout",
+            headers=headers,
+            json={"kcal_to_burn": kcal_to_burn},
+        )
+        assert response.status_code == 422, kcal_to_burn
+    response = call(
+        "POST", "/api/generate_workout", headers=headers, json={"kcal_to_burn": 300}
+    )
+    assert response.status_code == 201
+
+
+def test_generated_workout_reads_back_the_same_from_both_apps(app, client, register):
+    client.post("/api/seed_exercises")
+    _, headers = register()
+
+    response = call(
+        "POST", "/api/generate_workout", headers=headers, json={"kcal_to_burn": 300}
+    )
+    assert response.status_code == 201
+    workout = response.json()["workout"]
+    assert workout["workout_details"]
+
+    assert call("GET", "/api/workouts/history", headers=headers).json() == [workout]
+    flask_history = client.get("/api/workouts/history", headers=headers)
+    assert flask_history.get_json() == [workout]
+
+
+def test_meal_time_offset_is_stored_as_naive_utc(app, client, register):
+    client.post("/api/seed_food_items")
+    _, headers = register()
+    with app.app_context():
+        food_id = FoodItem.query.filter_by(name="Pizza Margherita (Fetta)").one().id
+
+    response = call(
+        "POST",
+        "/api/meals",
+        headers=headers,
+        json={
+            "meal_time": "2026-03-01T01:30:00+02:00",
+            "items": [{"food_item_id": food_id, "grams_consumed": 150}],
+        },
+    )
+
+    assert response.status_code == 201
+    meal = response.json()["meal"]
+    assert meal["meal_time"] == "2026-02-28T23:30:00"
+    assert meal["items"][0]["food_item_details"]["id"] == food_id
+    with app.app_context():
+        stored = db.session.get(Meal, meal["id"]).meal_time
+    assert stored == datetime(2026, 2, 28, 23, 30)
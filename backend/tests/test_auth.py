@@ -0,0 +1,34 @@
+"""Cache dei principal di auth.py: si invalida per utente, non per worker."""
+
+import auth
+from catalog_cache import catalog_cache
+
+
+def test_profile_update_evicts_only_the_edited_user(client, register):
+    alice_id, alice = register()
+    _, bob = register()
+    client.get("/api/profile", headers=alice)
+    client.get("/api/profile", headers=bob)
+    stale = auth._principals.get(alice_id)
+    seen_version = auth._users_version
+
+    assert (
+        client.put("/api/profile", headers=alice, json={"weight_kg": 59.0}).status_code
+        == 200
+    )
+    # Come un altro worker: ha ancora il principal vecchio e la versione precedente
+    auth._principals.set(alice_id, stale)
+    auth._users_version = seen_version
+    catalog_cache.invalidate()
+    hits = auth.auth_counters["principal_hits"]
+
+    assert client.get("/api/profile", headers=bob).status_code == 200
+    assert auth.auth_counters["principal_hits"] == hits + 1
+    assert client.get("/api/profile", headers=alice).get_json()["weight_kg"] == 59.0
+
+
+def test_logout_revokes_tokens(client, register):
+    _, headers = register()
+
+    assert client.post("/api/logout", headers=headers).status_code == 200
+    assert client.get("/api/meals/daily", headers=headers).status_code == 401
@@ -0,0 +1,161 @@
+"""
+Barcode contro un finto Open Food Facts (http.server in un thread): chiamate
+concorrenti unite in una sola, barcode inesistenti ricordati per il TTL, timeout,
+import massivo che salva a blocchi piccoli e non si ferma su una riga sbagliata.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import barcode_resolver
+from app import app
+from backend.services.openfoodfacts import OpenFoodFactsClient
+
+SLOW_BARCODE = "0000000000001"
+MISSING_BARCODE = "0000000000404"
+# Prodotti che OFF restituisce ma che non si possono salvare così come sono
+BAD_NUTRIMENTS = {
+    "0000000000422": {"sodium_100g": None},  # non convertibile
+    "0000000000423": {"energy-kcal_100g": None},  # kcal_per_100g è NOT NULL
+}
+
+
+class _StubOFF(BaseHTTPRequestHandler):
+    hits = Counter()
+
+    def do_GET(self):
+        barcode = self.path.rsplit("/", 1)[-1].removesuffix(".json")
+        self.hits[barcode] += 1
+        if barcode == MISSING_BARCODE:
+            self.send_error(404)
+            return
+        time.sleep(1.0 if barcode == SLOW_BARCODE else 0.2)  # tempo per accodarsi
+        body = json.dumps(
+            {
+                "status": 1,
+                "product": {
+                    "product_name": f"Stub {barcode}",
+                    "categories": "Snack, Test",
+                    "nutriments": {
+                        "energy-kcal_100g": 123.0,
+                        "sodium_100g": 0.5,
+                        **BAD_NUTRIMENTS.get(barcode, {}),
+                    },
+                },
+            }
+        ).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):  # il client è andato in timeout
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def off_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOFF)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api/v0/product/"
+    server.shutdown()
+
+
+@pytest.fixture
+def off_client(client, off_url, monkeypatch):
+    """Client con timeout corto, al posto di quello di barcode_resolver."""
+    client.post("/api/seed_food_items")  # il seed salta se trova già un alimento
+    _StubOFF.hits.clear()
+    client = OpenFoodFactsClient(off_url, timeout=0.5, pool_size=4, not_found_ttl=60)
+    monkeypatch.setattr(barcode_resolver, "_client", client)
+    yield client
+    client.close()
+
+
+def test_concurrent_lookups_hit_the_api_once(client, off_client):
+    barcode = "8001234567890"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        products = list(
+            executor.map(lambda _: off_client.fetch_product(barcode), range(8))
+        )
+
+    assert _StubOFF.hits[barcode] == 1
+    assert all(product == products[0] for product in products)
+
+    response = client.get(f"/api/fooditems/barcode/{barcode}")
+    assert response.status_code == 200
+    assert response.get_json()["sodium_mg_per_100g"] == 500.0
+    # Ora è nel database: niente più chiamate esterne
+    assert client.get(f"/api/fooditems/barcode/{barcode}").status_code == 200
+    assert _StubOFF.hits[barcode] == 2
+
+
+def test_not_found_is_remembered_for_the_ttl(client, off_client):
+    now = [0.0]
+    off_client.not_found._clock = lambda: now[0]
+
+    for _ in range(3):
+        assert (
+            client.get(f"/api/fooditems/barcode/{MISSING_BARCODE}").status_code == 404
+        )
+    assert _StubOFF.hits[MISSING_BARCODE] == 1
+
+    now[0] += 61
+    assert off_client.fetch_product(MISSING_BARCODE) is None
+    assert _StubOFF.hits[MISSING_BARCODE] == 2
+
+
+def test_timeout_is_an_error_not_a_missing_product(client, off_client):
+    with pytest.raises(requests.Timeout):
+        off_client.fetch_product(SLOW_BARCODE)
+    assert off_client.not_found.get(SLOW_BARCODE) is None
+
+    response = client.get(f"/api/fooditems/barcode/{SLOW_BARCODE}")
+    assert response.status_code == 500
+    assert "Error contacting external API" in response.get_json()["message"]
+
+
+def test_bulk_import_saves_without_waiting_for_a_full_batch(off_client):
+    barcodes = ["8001234567001", "8001234567002"]
+    with app.app_context():
+        results = barcode_resolver.bulk_resolve(
+            barcodes, concurrency=1, batch_size=100, flush_interval=0
+        )
+        barcode, status, food_item = next(results)
+        assert (barcode, status) == (barcodes[0], "created")
+        assert _StubOFF.hits[barcodes[1]] == 0  # salvato prima di chiedere il secondo
+        assert [status for _, status, _ in results] == ["created"]
+
+
+def test_bulk_import_reports_bad_rows_and_keeps_going(client, register, off_client):
+    _, headers = register()
+    barcodes = [*BAD_NUTRIMENTS, "8001234567003", MISSING_BARCODE]
+
+    response = client.post(
+        "/api/fooditems/barcode/bulk?concurrency=1", headers=headers, json=barcodes
+    )
+
+    assert response.status_code == 200
+    lines = {
+        line["barcode"]: line
+        for line in map(json.loads, response.get_data(as_text=True).splitlines())
+    }
+    assert [lines[barcode]["status"] for barcode in barcodes] == [
+        "error",
+        "error",
+        "created",
+        "not_found",
+    ]
+    assert all(lines[barcode]["message"] for barcode in BAD_NUTRIMENTS)
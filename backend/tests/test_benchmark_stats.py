@@ -0,0 +1,41 @@
+"""Confronto con la baseline dei benchmark (benchmarks/stats.py): codici di uscita."""
+
+import argparse
+
+import pytest
+
+from benchmarks import stats
+
+PARAMS = {"iterations": 10, "seed": 42}
+
+
+def _args(*argv):
+    parser = argparse.ArgumentParser()
+    stats.add_baseline_arguments(parser, default_name="test")
+    return parser.parse_args(argv)
+
+
+def _results(p95_ms):
+    return {"plan": stats.summarize([p95_ms / 1000] * 20)}
+
+
+@pytest.fixture(autouse=True)
+def baselines(tmp_path, monkeypatch):
+    monkeypatch.setattr(stats, "BASELINE_DIR", str(tmp_path))
+
+
+def test_missing_baseline_fails_only_in_check_mode(capsys):
+    assert stats.finish("micro", _results(1.0), PARAMS, _args()) == 0
+    assert stats.finish("micro", _results(1.0), PARAMS, _args("--check")) == 2
+    assert "No baseline" in capsys.readouterr().out
+
+
+def test_check_against_a_saved_baseline():
+    assert stats.finish("micro", _results(1.0), PARAMS, _args("--save-baseline")) == 0
+
+    assert stats.finish("micro", _results(1.1), PARAMS, _args("--check")) == 0
+    assert stats.finish("micro", _results(2.0), PARAMS, _args("--check")) == 1
+
+    other = dict(PARAMS, iterations=20)
+    assert stats.finish("micro", _results(1.0), other, _args()) == 0
+    assert stats.finish("micro", _results(1.0), other, _args("--check")) == 2
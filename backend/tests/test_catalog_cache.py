@@ -0,0 +1,82 @@
+"""
+Versioni di catalog_version: un solo incremento per transazione, cache svuotate
+solo dopo il commit, e il nome di ripiego dei barcode senza un secondo incremento.
+"""
+
+import pytest
+
+from app import db
+from barcode_resolver import insert_food_item
+from catalog_cache import (
+    EXERCISES,
+    FOOD_ITEMS,
+    bump_catalog_version,
+    bump_food_version,
+    catalog_cache,
+    current_food_version,
+)
+from models import FoodItem
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+def _food_fields(barcode, name):
+    return dict(
+        name=name,
+        barcode_upc=barcode,
+        category="Test",
+        kcal_per_100g=100,
+        carbs_per_100g=10,
+        proteins_per_100g=5,
+        fats_per_100g=2,
+    )
+
+
+def test_one_bump_per_transaction(ctx):
+    before = current_food_version()
+
+    version = bump_food_version()
+    assert bump_food_version() == version == before + 1
+    bump_catalog_version(FOOD_ITEMS, EXERCISES)
+    db.session.commit()
+
+    assert current_food_version() == before + 1
+    assert bump_food_version() == before + 2
+    db.session.rollback()
+    assert current_food_version() == before + 1
+
+
+def test_cache_is_invalidated_after_commit_only(ctx):
+    catalog_cache.version(FOOD_ITEMS)
+    assert catalog_cache._checked_at is not None
+
+    bump_food_version()
+    assert catalog_cache._checked_at is not None  # altri lettori: ancora la vecchia
+    db.session.rollback()
+    assert catalog_cache._checked_at is not None
+
+    bump_food_version()
+    db.session.commit()
+    assert catalog_cache._checked_at is None
+
+
+def test_name_clash_fallback_bumps_once(ctx):
+    first, created = insert_food_item(_food_fields("9700000000001", "Clash Snack"))
+    assert created
+    before = current_food_version()
+
+    food, created = insert_food_item(_food_fields("9700000000002", "Clash Snack"))
+
+    assert created
+    assert food.name == "Clash Snack (9700000000002)"
+    assert food.catalog_version == current_food_version() == before + 1
+
+    again, created = insert_food_item(_food_fields("9700000000002", "Clash Snack"))
+    assert (again.id, created) == (food.id, False)
+    assert current_food_version() == before + 1
+    assert FoodItem.query.filter_by(barcode_upc="9700000000002").count() == 1
@@ -0,0 +1,28 @@
+"""Un solo DATABASE_URL per l'app Flask, il backend FastAPI e gli script."""
+
+import os
+
+from app import app, db
+from backend import database
+from backend.config import INSTANCE_DIR, resolve_database_url
+
+
+def test_relative_sqlite_paths_resolve_into_the_instance_folder():
+    assert resolve_database_url("sqlite:///calorie_punisher.db") == (
+        f"sqlite:///{os.path.join(INSTANCE_DIR, 'calorie_punisher.db')}"
+    )
+    assert INSTANCE_DIR == app.instance_path
+    for url in (
+        "sqlite:////tmp/absolute.db",
+        "sqlite://",
+        "sqlite:///:memory:",
+        "postgresql://user:secret@db/calories",
+        None,
+    ):
+        assert resolve_database_url(url) == url
+
+
+def test_flask_and_fastapi_share_the_database(app):
+    with app.app_context():
+        flask_url = db.engine.url
+    assert database.engine.url.database == flask_url.database
@@ -0,0 +1,38 @@
+"""Parametri from/to (pagination.parse_datetime_arg): con o senza fuso orario."""
+
+import pytest
+
+ROUTES = [
+    "/api/meals/export",
+    "/api/workouts/history",
+    "/api/workouts/stats",
+    "/api/analytics/nutrition",
+]
+
+
+@pytest.fixture
+def headers(register):
+    return register()[1]
+
+
+@pytest.mark.parametrize("url", ROUTES)
+@pytest.mark.parametrize(
+    "date_from, date_to",
+    [
+        ("2026-01-01T00:00:00%2B02:00", "2026-01-05"),
+        ("2026-01-01", "2026-01-05T23:00:00Z"),
+        ("2026-01-01T08:00:00-05:00", "2026-01-05T08:00:00%2B09:00"),
+    ],
+)
+def test_offsets_are_accepted(client, headers, url, date_from, date_to):
+    response = client.get(f"{url}?from={date_from}&to={date_to}", headers=headers)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def test_offsets_are_converted_to_utc(client, headers):
+    # 00:30 a Roma è il 1 gennaio alle 23:30 UTC: prima di "to", non dopo
+    query = "from=2026-01-02T00:30:00%2B01:00&to=2026-01-01T23:45:00Z"
+    response = client.get(f"/api/analytics/nutrition?{query}", headers=headers)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
@@ -0,0 +1,127 @@
+"""
+/api/fooditems: snapshot compresso con ETag e 304, delta con ?since= e pagine
+che restano sulla versione del catalogo della prima pagina.
+"""
+
+import gzip
+import json
+
+import pytest
+
+from app import app, db
+from catalog_cache import bump_food_version
+from food_catalog import food_snapshot
+from models import FoodItem
+
+URL = "/api/fooditems"
+
+
+@pytest.fixture
+def catalog(client):
+    client.post("/api/seed_food_items")
+
+
+def _add_food(name, **fields):
+    with app.app_context():
+        food = FoodItem(
+            name=name,
+            kcal_per_100g=100,
+            carbs_per_100g=10,
+            proteins_per_100g=5,
+            fats_per_100g=2,
+            catalog_version=bump_food_version(),
+            **fields,
+        )
+        db.session.add(food)
+        db.session.commit()
+        return food.to_dict()
+
+
+def _all_items(client):
+    return client.get(URL, query_string={"limit": 10000}).get_json()["items"]
+
+
+def test_snapshot_is_the_full_catalog_in_every_encoding(client, catalog):
+    items = _all_items(client)
+
+    plain = client.get(URL)
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_json() == items
+
+    gzipped = client.get(URL, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(gzipped.get_data())) == items
+
+    for response in (plain, gzipped):
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.headers["Cache-Control"] == "no-cache"
+        version = response.headers["X-Catalog-Version"]
+        assert response.headers["ETag"] == f'W/"food-{version}"'
+
+
+def test_snapshot_in_brotli(client, catalog):
+    brotli = pytest.importorskip("brotli")
+    response = client.get(URL, headers={"Accept-Encoding": "br, gzip"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(response.get_data())) == _all_items(client)
+
+
+def test_etag_gives_304_until_the_catalog_changes(client, catalog):
+    etag = client.get(URL).headers["ETag"]
+    builds = food_snapshot.counters["builds"]
+    not_modified = food_snapshot.counters["not_modified"]
+
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert response.headers["ETag"] == etag
+    assert food_snapshot.counters["not_modified"] == not_modified + 1
+    assert food_snapshot.counters["builds"] == builds
+
+    added = _add_food("Catalogo Snapshot Nuovo")
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert added in response.get_json()
+    assert food_snapshot.counters["builds"] == builds + 1
+
+
+def test_since_returns_only_newer_rows(client, catalog):
+    version = client.get(URL, query_string={"limit": 1}).get_json()["catalog_version"]
+
+    added = _add_food("Catalogo Delta Aggiunto", barcode_upc="9600000000001")
+    delta = client.get(URL, query_string={"since": version}).get_json()
+    assert delta["items"] == [added]
+    assert delta["catalog_version"] == version + 1
+
+    newer = delta["catalog_version"]
+    assert client.get(URL, query_string={"since": newer}).get_json()["items"] == []
+
+    with app.app_context():
+        food = FoodItem.query.filter_by(barcode_upc="9600000000001").one()
+        food.catalog_version = bump_food_version()
+        food.kcal_per_100g = 123
+        db.session.commit()
+    delta = client.get(URL, query_string={"since": newer, "fields": "kcal_per_100g"})
+    assert delta.get_json()["items"] == [{"id": added["id"], "kcal_per_100g": 123}]
+
+    response = client.get(URL, query_string={"since": "ieri"})
+    assert response.status_code == 400
+
+
+def test_pages_stay_on_the_version_of_the_first_page(client, catalog):
+    first = client.get(URL, query_string={"limit": 2}).get_json()
+    late = _add_food("Catalogo Arrivato Dopo")
+
+    items = list(first["items"])
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(URL, query_string={"limit": 2, "cursor": cursor}).get_json()
+        assert page["catalog_version"] == first["catalog_version"]
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+
+    assert late not in items
+    assert items == [item for item in _all_items(client) if item != late]
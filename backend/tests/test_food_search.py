@@ -0,0 +1,102 @@
+"""Indice di ricerca degli alimenti: typo, prefissi, ranking e aggiornamenti."""
+
+import pytest
+
+from app import app, db
+from catalog_cache import bump_food_version
+from models import FoodItem
+from backend.services.food_search import FoodSearchIndex
+
+FOODS = [
+    (1, "Pasta alla Carbonara"),
+    (2, "Pasta al Pomodoro"),
+    (3, "Insalata di Pasta Fredda"),
+    (4, "Pizza Margherita"),
+    (5, "Tiramisù"),
+    (6, "Patatine Fritte"),
+]
+
+
+@pytest.fixture
+def index():
+    index = FoodSearchIndex()
+    index.build(FOODS)
+    return index
+
+
+def test_search_tolerates_typos_and_accents(index):
+    assert index.search("carbonra") == [1]
+    assert index.search("pizaa margerita")[0] == 4
+    assert index.search("TIRAMISU") == [5]
+
+
+def test_prefix_matching(index):
+    assert index.search("marg") == [4]
+    assert set(index.search("pa")) == {1, 2, 3, 6}
+
+
+def test_ranking_prefers_exact_words_and_names_starting_with_the_query(index):
+    # "pasta" esatto batte "patatine" per prefisso; chi inizia con "pasta" batte
+    # l'insalata, e a parità vince il nome più corto
+    assert index.search("pasta") == [2, 1, 3]
+    assert index.search("pasta pomodoro")[0] == 2
+    assert index.search("pasta", limit=1) == [2]
+
+
+def test_add_update_and_remove(index):
+    index.add(7, "Pasta e Fagioli")
+    assert index.search("fagioli") == [7]
+
+    index.add(7, "Minestrone")  # stesso id: il vecchio nome sparisce
+    assert index.search("fagioli") == []
+    assert index.search("minestrone") == [7]
+
+    index.remove(7)
+    index.remove(7)
+    assert index.search("minestrone") == []
+    assert len(index) == len(FOODS)
+
+
+def test_unbuilt_index_ignores_adds():
+    index = FoodSearchIndex()
+    index.add(1, "Pasta")
+    assert not index.ready
+    assert index.search("pasta") == []
+
+
+def test_route_follows_renamed_and_deleted_foods(client):
+    client.post("/api/seed_food_items")
+
+    def search(query):
+        response = client.get("/api/fooditems/search", query_string={"q": query})
+        assert response.status_code == 200
+        return [food["name"] for food in response.get_json()]
+
+    with app.app_context():
+        version = bump_food_version()
+        food = FoodItem(
+            name="Zuppa Inglese Ricercata",
+            kcal_per_100g=250,
+            carbs_per_100g=30,
+            proteins_per_100g=5,
+            fats_per_100g=10,
+            catalog_version=version,
+        )
+        db.session.add(food)
+        db.session.commit()
+        food_id = food.id
+    assert search("ricercata") == ["Zuppa Inglese Ricercata"]
+
+    with app.app_context():
+        food = db.session.get(FoodItem, food_id)
+        food.catalog_version = bump_food_version()
+        food.name = "Zuppa Ritrovata"
+        db.session.commit()
+    assert search("ricercata") == []
+    assert search("ritrovata") == ["Zuppa Ritrovata"]
+
+    with app.app_context():
+        bump_food_version()
+        db.session.delete(db.session.get(FoodItem, food_id))
+        db.session.commit()
+    assert search("ritrovata") == []
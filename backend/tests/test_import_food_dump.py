@@ -0,0 +1,113 @@
+"""
+Import dei dump di Open Food Facts: inserimento, aggiornamento sul barcode già
+presente, nomi già usati da altri alimenti e righe scartate (anche con null).
+"""
+
+import io
+import json
+
+import import_food_dump
+from app import app
+from models import FoodItem
+
+
+def _jsonl(path, *products):
+    path.write_text("\n".join(map(json.dumps, products)) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _run(path, fmt=None):
+    with app.app_context():
+        return import_food_dump.run(path, fmt, batch_size=2, out=io.StringIO())
+
+
+def _food(barcode):
+    with app.app_context():
+        return FoodItem.query.filter_by(barcode_upc=barcode).one()
+
+
+def test_jsonl_dump_inserts_updates_and_skips(app, tmp_path):
+    first = _jsonl(
+        tmp_path / "first.jsonl",
+        {
+            "code": "9800000000001",
+            "product_name": "Dump Biscotti",
+            "categories": "Snack, Dolci",
+            "nutriments": {"energy-kcal_100g": 450, "sodium_100g": 0.2},
+        },
+        # Categoria e immagine null: valori di default, la riga si importa
+        {
+            "code": "9800000000002",
+            "product_name": "Dump Cracker",
+            "categories": None,
+            "image_url": None,
+            "nutriments": {"energy-kcal_100g": "410"},
+        },
+        {"code": "9800000000003", "product_name": None, "nutriments": {}},
+        {
+            "code": "9800000000004",
+            "product_name": None,
+            "nutriments": {"energy-kcal_100g": 100},
+        },
+        {"code": "9800000000005", "product_name": 42, "nutriments": {"fat_100g": 1}},
+        {"product_name": "Dump Senza Barcode", "nutriments": {"energy-kcal_100g": 1}},
+        "non un prodotto",
+    )
+    with open(first, "a", encoding="utf-8") as dump:
+        dump.write("{rotto\n")
+
+    assert _run(first) == {"read": 8, "inserted": 2, "updated": 0, "skipped": 6}
+    cracker = _food("9800000000002")
+    assert (cracker.category, cracker.image_url) == ("Non Specificato", None)
+    assert cracker.kcal_per_100g == 410
+    assert _food("9800000000001").sodium_mg_per_100g == 200
+
+    second = _jsonl(
+        tmp_path / "second.jsonl",
+        # Barcode già presente: nutrienti aggiornati, nome invariato
+        {
+            "code": "9800000000001",
+            "product_name": "Dump Biscotti Rinominati",
+            "nutriments": {"energy-kcal_100g": 470},
+        },
+        # Nome già usato da un altro alimento: diventa "nome (barcode)"
+        {
+            "code": "9800000000006",
+            "product_name": "Dump Biscotti",
+            "nutriments": {"energy-kcal_100g": 300},
+        },
+        # Ripetuto nello stesso blocco: vince l'ultima riga, l'altra è scartata
+        {
+            "code": "9800000000007",
+            "product_name": "Dump Grissini",
+            "nutriments": {"energy-kcal_100g": 380},
+        },
+        {
+            "code": "9800000000007",
+            "product_name": "Dump Grissini",
+            "nutriments": {"energy-kcal_100g": 390},
+        },
+    )
+
+    assert _run(second) == {"read": 4, "inserted": 2, "updated": 1, "skipped": 1}
+    biscotti = _food("9800000000001")
+    assert (biscotti.name, biscotti.kcal_per_100g) == ("Dump Biscotti", 470)
+    assert biscotti.category == "Non Specificato"
+    assert _food("9800000000006").name == "Dump Biscotti (9800000000006)"
+    assert _food("9800000000007").kcal_per_100g == 390
+
+
+def test_csv_dump(app, tmp_path):
+    dump = tmp_path / "dump.tsv"
+    dump.write_text(
+        "code\tproduct_name\tcategories\tenergy-kcal_100g\tsodium_100g\n"
+        "9800000000101\tDump Tarallo\tSnack\t480\t0.7\n"
+        "9800000000102\t\tSnack\t480\t0.7\n"
+        "9800000000103\tDump Senza Kcal\tSnack\tnan\t0.7\n",
+        encoding="utf-8",
+    )
+
+    assert _run(str(dump)) == {"read": 3, "inserted": 1, "updated": 0, "skipped": 2}
+    tarallo = _food("9800000000101")
+    assert (tarallo.name, tarallo.category) == ("Dump Tarallo", "Snack")
+    assert tarallo.sodium_mg_per_100g == 700
@@ -0,0 +1,21 @@
+"""Engine dei job batch e di Alembic: niente timeout sugli statement."""
+
+from app import db, maintenance_context
+
+
+def _statement_deadline(connection):
+    # install_sqlite_pragmas la mette nelle info della connessione se c'è un timeout
+    return "statement_deadline" in connection.connection.info
+
+
+def test_maintenance_context_skips_the_statement_timeout(app):
+    with app.app_context():
+        assert _statement_deadline(db.session.connection())
+        db.session.remove()
+
+    with maintenance_context():
+        connection = db.session.connection()
+        assert connection.engine is not db.engine
+        assert connection.engine.url == db.engine.url
+        assert not _statement_deadline(connection)
+        db.session.remove()
@@ -0,0 +1,160 @@
+"""
+Export del diario dei pasti (/api/meals/export): contenuto del CSV e
+dell'NDJSON, intervallo di date e CSV spedito a pezzi.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from meal_export import CSV_COLUMNS, CSV_FLUSH_BYTES, csv_chunks, meal_documents
+
+URL = "/api/meals/export"
+
+
+@pytest.fixture
+def diary(client, register):
+    client.post("/api/seed_food_items")
+    user_id, headers = register()
+    foods = client.get("/api/fooditems", query_string={"limit": 2}).get_json()["items"]
+    meals = []
+    for meal_time, grams in (
+        ("2026-02-02T20:00:00", [300]),
+        ("2026-02-01T08:00:00", [50, 120]),  # registrato dopo, ma viene prima
+        ("2026-03-01T12:00:00", [80]),
+    ):
+        response = client.post(
+            "/api/meals",
+            headers=headers,
+            json={
+                "description": f"Pasto del {meal_time[:10]}",
+                "meal_time": meal_time,
+                "items": [
+                    {"food_item_id": food["id"], "grams_consumed": g}
+                    for food, g in zip(foods, grams)
+                ],
+            },
+        )
+        meals.append(response.get_json()["meal"])
+    meals.sort(key=lambda meal: meal["meal_time"])
+    return user_id, headers, meals, {food["id"]: food["name"] for food in foods}
+
+
+def _documents(meals, names):
+    keys = ("id", "food_item_id", "grams_consumed", "kcal_total_item")
+    keys += ("carbs_item", "proteins_item", "fats_item")
+    return [
+        {
+            "id": meal["id"],
+            "meal_time": meal["meal_time"],
+            "description": meal["description"],
+            "items": [
+                dict(
+                    {key: item[key] for key in keys},
+                    food_item_name=names[item["food_item_id"]],
+                )
+                for item in meal["items"]
+            ],
+        }
+        for meal in meals
+    ]
+
+
+def test_csv_has_one_row_per_item_in_meal_order(client, diary):
+    user_id, headers, meals, names = diary
+
+    response = client.get(URL, headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert (
+        response.headers["Content-Disposition"]
+        == f"attachment; filename=meals_{user_id}.csv"
+    )
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert tuple(rows[0]) == CSV_COLUMNS
+    expected = [
+        [
+            str(meal["id"]),
+            meal["meal_time"],
+            meal["description"],
+            str(item["id"]),
+            str(item["food_item_id"]),
+            names[item["food_item_id"]],
+            str(item["grams_consumed"]),
+            str(item["kcal_total_item"]),
+            str(item["carbs_item"]),
+            str(item["proteins_item"]),
+            str(item["fats_item"]),
+        ]
+        for meal in meals
+        for item in meal["items"]
+    ]
+    assert rows[1:] == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"query_string": {"format": "ndjson"}},
+        {"headers": {"Accept": "application/x-ndjson"}},
+    ],
+)
+def test_ndjson_has_one_meal_per_line(client, diary, kwargs):
+    user_id, headers, meals, names = diary
+    headers = dict(headers, **kwargs.pop("headers", {}))
+
+    response = client.get(URL, headers=headers, **kwargs)
+
+    assert response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"].endswith(f"{user_id}.ndjson")
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == _documents(meals, names)
+
+
+def test_date_range_and_unknown_format(client, diary):
+    _, headers, meals, names = diary
+
+    response = client.get(
+        URL,
+        query_string={"format": "ndjson", "from": "2026-02-01", "to": "2026-02-02"},
+        headers=headers,
+    )
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == _documents(meals[:2], names)
+
+    response = client.get(URL, query_string={"format": "xlsx"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_csv_is_sent_in_chunks():
+    meal_time = datetime(2026, 1, 1, 12, 0)
+    rows = [
+        (i, meal_time, "Pasto " + "x" * 100, i, 1, "Pizza", 100.0, 250.0, 1.0, 2.0, 3.0)
+        for i in range(2000)
+    ]
+
+    chunks = list(csv_chunks(iter(rows)))
+
+    assert len(chunks) > 2
+    assert all(len(chunk) >= CSV_FLUSH_BYTES for chunk in chunks[:-1])
+    parsed = list(csv.reader(io.StringIO("".join(chunks))))
+    assert len(parsed) == len(rows) + 1
+    assert parsed[-1][:2] == ["1999", "2026-01-01T12:00:00"]
+
+
+def test_meal_without_items_keeps_an_empty_list():
+    meal_time = datetime(2026, 1, 1)
+    rows = [(1, meal_time, "Digiuno", *[None] * 8)]
+
+    assert list(meal_documents(rows)) == [
+        {
+            "id": 1,
+            "meal_time": "2026-01-01T00:00:00",
+            "description": "Digiuno",
+            "items": [],
+        }
+    ]
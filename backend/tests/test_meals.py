@@ -0,0 +1,86 @@
+"""Registrazione dei pasti sull'app Flask (meal_logging.py)."""
+
+import pytest
+
+import auth
+from app import db
+from catalog_cache import catalog_cache
+from models import Meal
+
+
+@pytest.fixture
+def foods(client):
+    client.post("/api/seed_food_items")
+    return [
+        item["id"] for item in client.get("/api/fooditems?limit=2").get_json()["items"]
+    ]
+
+
+def test_add_meal_fits_budget_with_cold_caches(
+    app, client, register, foods, monkeypatch
+):
+    monkeypatch.setitem(app.config, "QUERY_BUDGET_STRICT", True)
+    _, headers = register()
+    auth._principals.clear()
+    catalog_cache.invalidate()
+
+    response = client.post(
+        "/api/meals",
+        headers=headers,
+        json={
+            "description": "Colazione",
+            "meal_time": "2026-01-02T08:30:00+01:00",
+            "items": [
+                {"food_item_id": foods[0], "grams_consumed": 150},
+                {"food_item_id": foods[1], "grams_consumed": 42.5},
+            ],
+        },
+    )
+
+    assert response.status_code == 201
+    meal = response.get_json()["meal"]
+    assert meal["meal_time"] == "2026-01-02T07:30:00"
+    with app.app_context():
+        # Stesso JSON che darebbe il pasto riletto dal database
+        stored = db.session.get(Meal, meal["id"]).to_dict(include_items=True)
+        assert app.json.dumps(meal) == app.json.dumps(stored)
+
+
+def test_batch_keeps_meals_in_payload_order(client, register, foods):
+    _, headers = register()
+    meals = [
+        {
+            "description": f"Pasto {n}",
+            "items": [{"food_item_id": foods[n % 2], "grams_consumed": n + 1}],
+        }
+        for n in range(5)
+    ]
+
+    response = client.post("/api/meals/batch", headers=headers, json={"meals": meals})
+
+    assert response.status_code == 201
+    logged = response.get_json()["meals"]
+    assert [meal["description"] for meal in logged] == [
+        meal["description"] for meal in meals
+    ]
+    assert [meal["items"][0]["grams_consumed"] for meal in logged] == [
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+        5.0,
+    ]
+
+
+@pytest.mark.parametrize("food_item_id", ["1", [1], {"id": 1}, True, 0, -3, 1.5, None])
+def test_food_item_id_must_be_a_positive_int(client, register, foods, food_item_id):
+    _, headers = register()
+
+    response = client.post(
+        "/api/meals",
+        headers=headers,
+        json={"items": [{"food_item_id": food_item_id, "grams_consumed": 100}]},
+    )
+
+    assert response.status_code == 400
+    assert "Invalid food item details" in response.get_json()["message"]
@@ -0,0 +1,129 @@
+"""
+Metriche Prometheus (metrics.py): formato di Counter e Histogram, tempo nel
+database per richiesta, chiamate a Open Food Facts e scrape di /metrics.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app import app, db
+from metrics import (
+    OPEN_FOOD_FACTS_SECONDS,
+    REQUEST_DB_SECONDS,
+    Counter,
+    Histogram,
+    timed_fetch,
+)
+
+SEARCH = ("GET", "/api/fooditems/search")
+
+
+def _scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def _state(histogram, *labelvalues):
+    """(conteggio, somma) attuali di una serie dell'istogramma."""
+    state = histogram._values.get(labelvalues, [None, 0.0, 0])
+    return state[2], state[1]
+
+
+def test_counter_exposition():
+    counter = Counter("punishments", "Punishments handed out.", ("kind", "note"))
+    counter.inc("burpees", 'say "hi"\\now')
+    counter.inc("burpees", 'say "hi"\\now', amount=2)
+    counter.inc("abs", "x")
+
+    assert counter.render() == [
+        "# HELP punishments Punishments handed out.",
+        "# TYPE punishments counter",
+        'punishments_total{kind="abs",note="x"} 1',
+        'punishments_total{kind="burpees",note="say \\"hi\\"\\\\now"} 3',
+    ]
+
+
+def test_histogram_exposition():
+    histogram = Histogram("lap_seconds", "Laps.", ("track",), buckets=(1, 2.5))
+    for value in (0.5, 1.0, 2.0, 7.0):
+        histogram.observe(value, "monza")
+
+    assert histogram.render() == [
+        "# HELP lap_seconds Laps.",
+        "# TYPE lap_seconds histogram",
+        'lap_seconds_bucket{track="monza",le="1"} 2',
+        'lap_seconds_bucket{track="monza",le="2.5"} 3',
+        'lap_seconds_bucket{track="monza",le="+Inf"} 4',
+        'lap_seconds_sum{track="monza"} 10.5',
+        'lap_seconds_count{track="monza"} 4',
+    ]
+
+
+def test_histogram_time_observes_even_on_errors():
+    histogram = Histogram("block_seconds", "Blocks.")
+    with pytest.raises(ZeroDivisionError):
+        with histogram.time():
+            1 / 0
+
+    count, total = _state(histogram)
+    assert count == 1 and total >= 0
+
+
+@pytest.mark.parametrize("outcome, fails", [("found", False), ("error", True)])
+def test_timed_fetch_records_the_outcome(outcome, fails):
+    before, _ = _state(OPEN_FOOD_FACTS_SECONDS, outcome)
+
+    try:
+        with timed_fetch() as result:
+            if fails:
+                raise ConnectionError("Open Food Facts is down")
+            result[0] = outcome
+    except ConnectionError:
+        pass
+
+    assert _state(OPEN_FOOD_FACTS_SECONDS, outcome)[0] == before + 1
+
+
+def test_db_time_is_counted_only_inside_requests(client):
+    # Senza q la ricerca legge sempre dal database (nessuna cache)
+    client.get("/api/fooditems/search")
+    before = _state(REQUEST_DB_SECONDS, *SEARCH)
+
+    with app.app_context():  # niente richiesta: nessuna serie toccata
+        db.session.execute(text("SELECT 1"))
+    assert _state(REQUEST_DB_SECONDS, *SEARCH) == before
+
+    client.get("/api/fooditems/search")
+    count, total = _state(REQUEST_DB_SECONDS, *SEARCH)
+    assert count == before[0] + 1
+    assert total > before[1]
+
+
+def test_metrics_scrape_after_a_request(client):
+    client.post("/api/seed_food_items")
+    labels = 'method="GET",route="/api/fooditems/search"'
+    before = _scrape(client)
+
+    response = client.get("/api/fooditems/search", query_string={"q": "pasta"})
+    assert response.status_code == 200
+    after = _scrape(client)
+
+    def delta(name):
+        return after[name] - before.get(name, 0)
+
+    assert delta(f'http_requests_total{{{labels},status="200"}}') == 1
+    assert delta(f"http_request_duration_seconds_count{{{labels}}}") == 1
+    assert delta(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}') == 1
+    assert delta(f"http_request_sql_statements_count{{{labels}}}") == 1
+    assert delta(f"http_request_db_seconds_count{{{labels}}}") == 1
+    assert delta(f"http_request_db_seconds_sum{{{labels}}}") >= 0
+    # Anche lo scrape precedente è una richiesta misurata
+    assert delta('http_requests_total{method="GET",route="/metrics",status="200"}') == 1
+    assert 'app_stat{component="catalog_cache",stat="food_hits"}' in after
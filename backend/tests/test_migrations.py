@@ -0,0 +1,93 @@
+"""
+Migrazione 0002 su un database con i vecchi blob workout_details_json: nomi e
+acronimi restano quelli della generazione, gli esercizi cancellati perdono solo
+l'id, e il downgrade ricostruisce gli stessi blob.
+"""
+
+import json
+
+import sqlalchemy as sa
+from alembic import command
+
+from .conftest import alembic_config
+
+LEGACY_DETAILS = [
+    # Esercizio rinominato dopo la generazione
+    {
+        "exercise_id": 1,
+        "exercise_acronym": "BUR",
+        "exercise_name": "Burpees",
+        "duration_min": 15.0,
+        "kcal_burned_segment": 180.0,
+    },
+    # Esercizio cancellato
+    {
+        "exercise_id": 99,
+        "exercise_acronym": "OLD",
+        "exercise_name": "Esercizio Dimenticato",
+        "duration_min": 5.0,
+        "kcal_burned_segment": 40.5,
+    },
+]
+
+
+def _migrate(connection, action, revision):
+    config = alembic_config()
+    config.attributes["connection"] = connection
+    action(config, revision)
+
+
+def test_segments_keep_the_names_of_the_legacy_blobs(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        _migrate(connection, command.upgrade, "0001")
+        connection.execute(
+            sa.text(
+                "INSERT INTO user (id, username, email, password_hash, gender, age,"
+                " weight_kg, height_cm) VALUES (1, 'old', 'old@example.com', 'x',"
+                " 'M', 40, 80, 180)"
+            )
+        )
+        connection.execute(
+            sa.text(
+                "INSERT INTO exercise (id, name, acronym, kcal_per_kg_per_min)"
+                " VALUES (1, 'Burpees Infernali', 'BURX', 0.15)"
+            )
+        )
+        connection.execute(
+            sa.text(
+                "INSERT INTO generated_workout (id, user_id, kcal_to_burn,"
+                " estimated_total_time_min, workout_details_json)"
+                " VALUES (1, 1, 220, 20, :details), (2, 1, 0, 0, '[]')"
+            ),
+            {"details": json.dumps(LEGACY_DETAILS)},
+        )
+
+        _migrate(connection, command.upgrade, "0002")
+        segments = connection.execute(
+            sa.text(
+                "SELECT workout_id, position, exercise_id, exercise_acronym,"
+                " exercise_name, duration_min, kcal_burned_segment"
+                " FROM generated_workout_segment ORDER BY workout_id, position"
+            )
+        ).all()
+        assert segments == [
+            (1, 0, 1, "BUR", "Burpees", 15.0, 180.0),
+            (1, 1, None, "OLD", "Esercizio Dimenticato", 5.0, 40.5),
+        ]
+
+        _migrate(connection, command.downgrade, "0001")
+        blobs = dict(
+            connection.execute(
+                sa.text(
+                    "SELECT id, workout_details_json FROM generated_workout"
+                    " ORDER BY id"
+                )
+            ).all()
+        )
+        assert json.loads(blobs[1]) == [
+            dict(item, exercise_id=None) if item["exercise_id"] == 99 else item
+            for item in LEGACY_DETAILS
+        ]
+        assert json.loads(blobs[2]) == []
+    engine.dispose()
@@ -0,0 +1,95 @@
+"""
+Job notturno (nightly_workouts.py): rilanciarlo non duplica i workout e i piani
+sono quelli che l'utente otterrebbe da /api/generate_workout.
+"""
+
+from datetime import date
+
+import pytest
+
+import nightly_workouts
+from app import db
+from backend.services.batch_planner import plan_batch
+from backend.services.planner import PLANNERS, plan_workout
+from models import Exercise, GeneratedWorkout, User
+
+DAY = date(2025, 3, 14)
+
+
+@pytest.fixture
+def eaters(client, register):
+    client.post("/api/seed_food_items")
+    client.post("/api/seed_exercises")
+    users = {}
+    for grams in (100, 400):
+        user_id, headers = register()
+        response = client.post(
+            "/api/meals",
+            headers=headers,
+            json={
+                "meal_time": f"{DAY.isoformat()}T12:00:00",
+                "items": [{"food_item_id": 1, "grams_consumed": grams}],
+            },
+        )
+        users[user_id] = response.get_json()["total_meal_kcal"]
+    return users
+
+
+def test_rerun_does_not_duplicate_workouts(app, eaters):
+    with app.app_context():
+        assert nightly_workouts.run(DAY) >= len(eaters)
+        assert nightly_workouts.run(DAY) == 0
+
+        generation_date = nightly_workouts.nightly_generation_date(DAY)
+        workouts = GeneratedWorkout.query.filter(
+            GeneratedWorkout.user_id.in_(eaters),
+            GeneratedWorkout.generation_date == generation_date,
+        ).all()
+        assert len(workouts) == len(eaters)
+        # Ogni workout è quello del suo utente, qualunque sia l'ordine di RETURNING
+        for workout in workouts:
+            assert workout.kcal_to_burn == pytest.approx(eaters[workout.user_id])
+            assert workout.segments
+
+
+CATALOG = ((1, "BUR", "Burpees", 0.15), (2, "PU", "Pull-ups", 0.10), (3, "X", "X", 0))
+SEGMENT_KEYS = ("exercise_id", "duration_min", "kcal_burned_segment")
+
+
+@pytest.mark.parametrize("strategy, seed", [("optimal", None), ("greedy", 7)])
+def test_batch_uses_the_configured_planner(strategy, seed):
+    kcal = [0, 250.0, 1234.5, 250.0, 4800.0]
+    weights = [70.0, 70.0, 82.5, 70.0, 90.0]
+
+    batch = plan_batch(kcal, weights, CATALOG, strategy, seed)
+
+    assert len(batch) == len(kcal)
+    for i, (target, weight) in enumerate(zip(kcal, weights)):
+        plan, total = PLANNERS[strategy].plan(target, weight, CATALOG, seed=seed)
+        start, end = batch.offsets[i], batch.offsets[i + 1]
+        assert batch.position[start:end].tolist() == list(range(len(plan)))
+        assert batch.segments_for(i) == [
+            {key: segment[key] for key in SEGMENT_KEYS} for segment in plan
+        ]
+        assert batch.total_time[i] == total
+    assert batch.offsets[1] == 0  # niente kcal, niente workout
+
+
+def test_nightly_workout_matches_generate_workout(app, eaters):
+    with app.app_context():
+        nightly_workouts.run(DAY)
+        exercises = Exercise.query.all()
+        for user_id in eaters:
+            workout = GeneratedWorkout.query.filter_by(
+                user_id=user_id,
+                generation_date=nightly_workouts.nightly_generation_date(DAY),
+            ).one()
+            plan, total = plan_workout(
+                workout.kcal_to_burn,
+                db.session.get(User, user_id).weight_kg,
+                exercises,
+                strategy=app.config["WORKOUT_PLANNER"],
+                seed=app.config["WORKOUT_PLANNER_SEED"],
+            )
+            assert workout.to_dict()["workout_details"] == plan
+            assert workout.estimated_total_time_min == total
@@ -0,0 +1,122 @@
+"""
+Paginazione keyset di /api/fooditems e dello storico dei workout: le pagine
+ricompongono l'elenco completo, i cursori e i limit non validi sono un 400 e
+lo stream NDJSON contiene le stesse righe.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.services.cursors import decode_cursor, encode_cursor
+
+TAMPERED = [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b"[1]").decode(),  # un valore in meno
+    base64.urlsafe_b64encode(b'["uno", 2]').decode(),
+    base64.urlsafe_b64encode(b'{"id": 3}').decode(),
+]
+
+
+@pytest.fixture
+def history(client, register):
+    client.post("/api/seed_exercises")
+    _, headers = register()
+    for kcal_to_burn in (150, 200, 250, 300, 350):
+        response = client.post(
+            "/api/generate_workout",
+            headers=headers,
+            json={"kcal_to_burn": kcal_to_burn},
+        )
+        assert response.status_code == 201
+    return headers
+
+
+def _pages(client, url, key, **kwargs):
+    """Segue next_cursor fino all'ultima pagina; restituisce le pagine."""
+    pages = []
+    params = dict(kwargs.pop("query_string", {}))
+    while True:
+        body = client.get(url, query_string=params, **kwargs).get_json()
+        pages.append(body[key])
+        if body["next_cursor"] is None:
+            return pages
+        params["cursor"] = body["next_cursor"]
+
+
+def test_cursor_encoding_round_trips():
+    moment = datetime(2026, 3, 1, 12, 30, 5, 123456)
+    cursor = encode_cursor(moment, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, datetime.fromisoformat, int) == (moment, 42)
+
+
+def test_food_pages_rebuild_the_catalog(client):
+    client.post("/api/seed_food_items")
+    full = client.get("/api/fooditems", query_string={"limit": 10000}).get_json()
+
+    pages = _pages(client, "/api/fooditems", "items", query_string={"limit": 3})
+
+    assert all(len(page) == 3 for page in pages[:-1])
+    assert [item for page in pages for item in page] == full["items"]
+
+
+def test_workout_history_pages_and_ndjson(client, history):
+    full = client.get("/api/workouts/history", headers=history).get_json()
+    assert len(full) == 5
+
+    pages = _pages(
+        client,
+        "/api/workouts/history",
+        "workouts",
+        query_string={"limit": 2},
+        headers=history,
+    )
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [workout for page in pages for workout in page] == full
+
+    for kwargs in (
+        {"query_string": {"format": "ndjson"}},
+        {"headers": {"Accept": "application/x-ndjson"}},
+    ):
+        headers = dict(history, **kwargs.pop("headers", {}))
+        response = client.get("/api/workouts/history", headers=headers, **kwargs)
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == full
+
+
+@pytest.mark.parametrize("cursor", TAMPERED)
+def test_tampered_cursors_are_rejected(client, history, cursor):
+    response = client.get("/api/fooditems", query_string={"cursor": cursor})
+    assert response.status_code == 400
+
+    response = client.get(
+        "/api/workouts/history", query_string={"cursor": cursor}, headers=history
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("limit", ["-3", "0", "abc", "", "2.5"])
+def test_invalid_limit_is_rejected(client, history, limit):
+    response = client.get("/api/fooditems", query_string={"limit": limit})
+    assert response.status_code == 400
+    assert "limit" in response.get_json()["message"]
+
+    response = client.get(
+        "/api/workouts/history", query_string={"limit": limit}, headers=history
+    )
+    assert response.status_code == 400
+
+
+def test_limit_is_capped(app, client, history, monkeypatch):
+    monkeypatch.setitem(app.config, "WORKOUT_HISTORY_MAX_PAGE_SIZE", 2)
+    response = client.get(
+        "/api/workouts/history", query_string={"limit": 10**6}, headers=history
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body["workouts"]) == 2
+    assert body["next_cursor"]
@@ -0,0 +1,63 @@
+"""Hash delle password nel pool dedicato: rehash al login e 503 a pool saturo."""
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User
+from password_hashing import PasswordHasher, password_hasher
+
+
+def test_shorthand_method_is_compared_in_full():
+    hasher = PasswordHasher("scrypt", 1, 0, 5, 2)
+
+    assert hasher.method == "scrypt:32768:8:1"
+    assert not hasher.needs_rehash(generate_password_hash("x", "scrypt"))
+    assert hasher.needs_rehash(generate_password_hash("x", "pbkdf2:sha256:1000"))
+
+
+def test_login_rehashes_an_outdated_hash_once(client, register):
+    user_id, _ = register(password="old-school")
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.password_hash = generate_password_hash("old-school", "pbkdf2:sha256:500")
+        db.session.commit()
+        username = user.username
+
+    def login():
+        response = client.post(
+            "/api/login", json={"username": username, "password": "old-school"}
+        )
+        assert response.status_code == 200
+        with app.app_context():
+            return db.session.get(User, user_id).password_hash
+
+    rehashed = password_hasher.counters["rehashed"]
+    new_hash = login()
+    assert new_hash.startswith(f"{password_hasher.method}$")
+    assert password_hasher.counters["rehashed"] == rehashed + 1
+
+    assert login() == new_hash
+    assert password_hasher.counters["rehashed"] == rehashed + 1
+
+
+def test_saturated_pool_answers_503_with_retry_after(client, register):
+    register(username="busy", email="busy@example.com")
+    held = 0
+    while password_hasher._slots.acquire(blocking=False):
+        held += 1
+    try:
+        response = client.post(
+            "/api/login", json={"username": "busy", "password": "punish-me"}
+        )
+    finally:
+        for _ in range(held):
+            password_hasher._slots.release()
+
+    assert held == app.config["PASSWORD_HASH_PROCESSES"] + (
+        app.config["PASSWORD_HASH_QUEUE_SIZE"]
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(
+        app.config["PASSWORD_HASH_RETRY_AFTER"]
+    )
+    assert "Catch your breath" in response.get_json()["message"]
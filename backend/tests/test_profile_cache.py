@@ -0,0 +1,26 @@
+"""Profilo guest di profile_cache.py: in memoria, legato alla versione 'user'."""
+
+import profile_cache
+from catalog_cache import catalog_cache
+
+
+def test_guest_profile_follows_user_version(client):
+    stale = profile_cache._guest_profile
+    token = client.post(
+        "/api/login", json={"username": "GuestWarrior", "password": "guestpassword"}
+    ).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    weight = client.get("/api/profile").get_json()["weight_kg"] + 1
+
+    assert (
+        client.put(
+            "/api/profile", headers=headers, json={"weight_kg": weight}
+        ).status_code
+        == 200
+    )
+    # Come un altro worker: ha ancora il profilo guest calcolato prima della modifica
+    profile_cache._guest_profile = stale
+    catalog_cache.invalidate()
+
+    profile = client.get("/api/profile").get_json()
+    assert profile["is_guest"] and profile["weight_kg"] == weight
@@ -0,0 +1,63 @@
+"""
+Budget di statement SQL (query_budget.py): nei test sono in modalità strict
+(conftest.py), quindi una route che li supera fallisce con QueryBudgetExceeded.
+Ogni route con budget gira qui nel caso peggiore: cache del worker fredde e
+versione 'user' appena cambiata.
+"""
+
+import pytest
+from sqlalchemy import text
+
+import auth
+from app import db
+from catalog_cache import catalog_cache
+from query_budget import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def cold(app):
+    def _cold():
+        auth._principals.clear()
+        auth._users_version = 0  # un'altra versione: rilegge gli utenti modificati
+        catalog_cache.invalidate()
+
+    assert app.config["QUERY_BUDGET_STRICT"]
+    return _cold
+
+
+@pytest.fixture
+def headers(client, register):
+    client.post("/api/seed_food_items")
+    return register()[1]
+
+
+MEAL = {"description": "Budget", "items": [{"food_item_id": 1, "grams_consumed": 80}]}
+
+
+@pytest.mark.parametrize(
+    "method, url, body, expected",
+    [
+        ("POST", "/api/meals", MEAL, 201),
+        ("POST", "/api/meals/batch", {"meals": [MEAL, MEAL, MEAL]}, 201),
+        ("GET", "/api/meals/daily", None, 200),
+        ("GET", "/api/analytics/nutrition?period=week", None, 200),
+    ],
+)
+def test_budgeted_routes_with_cold_caches(
+    client, headers, cold, method, url, body, expected
+):
+    cold()
+    response = client.open(url, method=method, headers=headers, json=body)
+    assert response.status_code == expected, response.get_data(as_text=True)
+
+
+def test_budget_overrun_raises_in_strict_mode(app):
+    @query_budget(1)
+    def view():
+        db.session.execute(text("SELECT 1"))
+        db.session.execute(text("SELECT 2"))
+        return "ok"
+
+    with app.test_request_context():
+        with pytest.raises(QueryBudgetExceeded, match="executed 2 SQL statements"):
+            view()
@@ -0,0 +1,8 @@
+"""EXPLAIN QUERY PLAN su tutte le query delle route, come check_query_plans.py."""
+
+import check_query_plans
+
+
+def test_route_queries_avoid_full_scans(app):
+    check_query_plans.run_scenario(app.test_client())
+    assert check_query_plans.check() == []
@@ -0,0 +1,171 @@
+"""
+Export dei report (/api/workout_report/export): nomi delle voci dello ZIP, PDF
+già in cache riusati senza ridisegnarli, PDF unico nell'ordine dei workout e
+file temporanei cancellati anche quando il rendering fallisce.
+"""
+
+import io
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+
+import report_export
+from report_cache import report_cache
+
+EXPORT = "/api/workout_report/export"
+
+
+class SpyPool:
+    """Il pool vero, che però ricorda cosa gli viene chiesto di disegnare."""
+
+    def __init__(self, pool, fail=False):
+        self.pool = pool
+        self.fail = fail
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args[0])
+        if self.fail:
+            future = Future()
+            future.set_exception(RuntimeError("ReportLab on fire"))
+            return future
+        return self.pool.submit(fn, *args)
+
+
+@pytest.fixture
+def workouts(client, register):
+    client.post("/api/seed_exercises")
+    _, headers = register()
+    ids = []
+    for kcal_to_burn in (150, 250, 350):
+        response = client.post(
+            "/api/generate_workout",
+            headers=headers,
+            json={"kcal_to_burn": kcal_to_burn},
+        )
+        ids.append(response.get_json()["workout"]["id"])
+    return ids, headers
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    spy = SpyPool(report_export.get_render_pool())
+    monkeypatch.setattr(report_export, "get_render_pool", lambda: spy)
+    return spy
+
+
+@pytest.fixture
+def temp_files(monkeypatch):
+    """Path dei file creati con tempfile.mkstemp durante il test."""
+    created = []
+    mkstemp = tempfile.mkstemp
+
+    def recording(*args, **kwargs):
+        fd, path = mkstemp(*args, **kwargs)
+        created.append(path)
+        return fd, path
+
+    monkeypatch.setattr(tempfile, "mkstemp", recording)
+    return created
+
+
+def _forget(workout_ids):
+    for workout_id in workout_ids:
+        try:
+            os.remove(report_cache.path_for(workout_id))
+        except FileNotFoundError:
+            pass
+
+
+def _pages(pdf):
+    return len(re.findall(rb"/Type /Page[^s]", pdf))
+
+
+def test_zip_has_one_pdf_per_workout_and_reuses_the_cache(client, workouts, pool):
+    ids, headers = workouts
+    _forget(ids)
+    cached = b"%PDF-1.4 already rendered"
+    report_cache.store(ids[0], cached)
+
+    response = client.get(EXPORT, headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert sorted(archive.namelist()) == sorted(
+        f"workout_report_{workout_id}.pdf" for workout_id in ids
+    )
+    assert archive.read(f"workout_report_{ids[0]}.pdf") == cached
+    assert sorted(pool.submitted) == ids[1:]
+    for workout_id in ids[1:]:
+        content = archive.read(f"workout_report_{workout_id}.pdf")
+        assert content.startswith(b"%PDF")
+        assert report_cache.read(workout_id) == content  # ora anche in cache
+
+    pool.submitted.clear()
+    client.get(EXPORT, headers=headers).get_data()
+    assert pool.submitted == []
+
+
+def test_combined_pdf_follows_the_workouts_and_reuses_the_cache(
+    client, workouts, pool, temp_files
+):
+    pypdf = pytest.importorskip("pypdf")
+    ids, headers = workouts
+    _forget(ids)
+    client.get(f"/api/workout_report/{ids[1]}/pdf", headers=headers)
+
+    response = client.get(EXPORT, query_string={"format": "pdf"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/pdf"
+    pdf = response.get_data()
+    assert _pages(pdf) == len(ids)
+    assert sorted(pool.submitted) == [ids[0], ids[2]]
+    # Le pagine sono nell'ordine dei workout (kcal crescenti)
+    pages = pypdf.PdfReader(io.BytesIO(pdf)).pages
+    for page, kcal in zip(pages, ("150", "250", "350")):
+        assert kcal in page.extract_text()
+
+    response.close()
+    assert temp_files and not any(os.path.exists(path) for path in temp_files)
+
+
+def test_combined_pdf_without_pypdf_is_drawn_in_one_process(
+    client, workouts, pool, monkeypatch, temp_files
+):
+    ids, headers = workouts
+    monkeypatch.setattr(report_export, "PdfWriter", None)
+
+    response = client.get(EXPORT, query_string={"format": "pdf"}, headers=headers)
+
+    assert response.status_code == 200
+    assert _pages(response.get_data()) == len(ids)
+    [reports] = pool.submitted
+    assert [report["kcal_to_burn"] for report in reports] == [150, 250, 350]
+    response.close()
+    assert temp_files and not any(os.path.exists(path) for path in temp_files)
+
+
+@pytest.mark.parametrize("pypdf", [True, False])
+def test_temp_file_is_removed_when_rendering_fails(
+    app, workouts, monkeypatch, temp_files, pypdf
+):
+    ids, _ = workouts
+    _forget(ids)
+    if not pypdf:
+        monkeypatch.setattr(report_export, "PdfWriter", None)
+    monkeypatch.setattr(
+        report_export, "get_render_pool", lambda: SpyPool(None, fail=True)
+    )
+    reports = [(workout_id, {}) for workout_id in ids]
+
+    with pytest.raises(RuntimeError):
+        report_export.render_combined_pdf(reports)
+
+    assert temp_files
+    assert not any(os.path.exists(path) for path in temp_files)
@@ -0,0 +1,66 @@
+"""PDF dei workout (report_cache.py): ETag stabili e file spariti per l'LRU."""
+
+import os
+
+import pytest
+
+from report_cache import report_cache
+
+
+@pytest.fixture
+def workout(client, register):
+    client.post("/api/seed_exercises")
+    _, headers = register()
+    response = client.post(
+        "/api/generate_workout", headers=headers, json={"kcal_to_burn": 250}
+    )
+    return response.get_json()["workout"]["id"], headers
+
+
+def _pdf(client, workout_id, headers):
+    response = client.get(f"/api/workout_report/{workout_id}/pdf", headers=headers)
+    assert response.status_code == 200
+    return response
+
+
+def test_rerendered_pdf_keeps_its_etag(client, workout):
+    workout_id, headers = workout
+    first = _pdf(client, workout_id, headers)
+
+    # Come un altro worker, o dopo un'eviction: stesso workout disegnato da capo
+    os.remove(report_cache.path_for(workout_id))
+    report_cache._etags.clear()
+    second = _pdf(client, workout_id, headers)
+
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.get_data() == first.get_data()
+
+
+def test_file_evicted_during_lookup_is_a_miss(client, workout, monkeypatch):
+    workout_id, headers = workout
+    _pdf(client, workout_id, headers)
+    report_cache._etags.clear()
+    etag_for = report_cache._etag_for
+
+    def evicted_first(path):
+        monkeypatch.setattr(report_cache, "_etag_for", etag_for)
+        os.remove(path)
+        return etag_for(path)
+
+    monkeypatch.setattr(report_cache, "_etag_for", evicted_first)
+    _pdf(client, workout_id, headers)
+
+
+def test_file_evicted_before_sending_is_rerendered(client, workout, monkeypatch):
+    workout_id, headers = workout
+    _pdf(client, workout_id, headers)
+    get_or_render = report_cache.get_or_render
+
+    def evicted_after_lookup(*args):
+        monkeypatch.setattr(report_cache, "get_or_render", get_or_render)
+        path, etag = get_or_render(*args)
+        os.remove(path)
+        return path, etag
+
+    monkeypatch.setattr(report_cache, "get_or_render", evicted_after_lookup)
+    _pdf(client, workout_id, headers)
@@ -0,0 +1,34 @@
+"""
+serializers.py contro jsonify + to_dict, byte per byte: gli stessi controlli di
+check_serializers.py, con orjson (se installato) e con il json della libreria standard.
+"""
+
+import pytest
+
+import check_serializers
+import serializers
+
+ENCODERS = {"orjson": serializers.orjson, "json": None}
+
+
+@pytest.fixture(scope="module")
+def headers(app):
+    return check_serializers.seed()
+
+
+@pytest.mark.parametrize("encoder", list(ENCODERS))
+def test_serializers_match_jsonify(headers, monkeypatch, encoder):
+    if encoder == "orjson" and ENCODERS[encoder] is None:
+        pytest.skip("orjson non installato")
+    monkeypatch.setattr(serializers, "orjson", ENCODERS[encoder])
+    monkeypatch.setattr(check_serializers, "_failures", [])
+
+    check_serializers.check_encoder()
+    check_serializers.check_routes(headers)
+    assert check_serializers._failures == []
+
+
+def test_non_finite_floats_are_written_like_jsonify(app):
+    value = {"kcal": float("nan"), "max": float("inf"), "min": float("-inf")}
+
+    assert serializers.dumps(value) == b'{"kcal":NaN,"max":Infinity,"min":-Infinity}'
@@ -0,0 +1,73 @@
+"""Generazione dei workout: limiti sulle kcal e scelta del planner."""
+
+import pytest
+
+from backend.services.planner import (
+    PLANNERS,
+    GreedyPlanner,
+    KnapsackPlanner,
+    catalog_from_exercises,
+    plan_workout,
+)
+from catalog_cache import ExerciseRecord
+
+CATALOG = ((1, "BUR", "Burpees", 0.15), (2, "RUN", "Corsa", 0.12))
+
+
+@pytest.fixture
+def headers(client, register):
+    client.post("/api/seed_exercises")
+    return register()[1]
+
+
+def test_generate_workout(client, headers):
+    response = client.post(
+        "/api/generate_workout", headers=headers, json={"kcal_to_burn": 300}
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["workout"]["workout_details"]
+
+
+@pytest.mark.parametrize("kcal_to_burn", [0, -5, "300", True, 20001, 1e9])
+def test_generate_workout_rejects_bad_kcal(app, client, headers, kcal_to_burn):
+    assert app.config["WORKOUT_MAX_KCAL"] == 20000
+    response = client.post(
+        "/api/generate_workout", headers=headers, json={"kcal_to_burn": kcal_to_burn}
+    )
+
+    assert response.status_code == 400
+
+
+def test_knapsack_falls_back_to_greedy_above_the_dp_threshold():
+    planner = KnapsackPlanner(max_target_kcal=1000)
+
+    assert planner.plan(1001, 70, CATALOG, seed=3) == GreedyPlanner().plan(
+        1001, 70, CATALOG, seed=3
+    )
+    assert planner.plan(1000, 70, CATALOG) == KnapsackPlanner().plan(1000, 70, CATALOG)
+
+
+@pytest.mark.parametrize("strategy", ["optimal", "greedy"])
+@pytest.mark.parametrize("kcal_to_burn", [50.5, 123.4, 999.9, 4321.0])
+def test_plan_targets_the_exact_kcal(strategy, kcal_to_burn):
+    exercises = [
+        ExerciseRecord(id, name, acronym, rate, None)
+        for id, acronym, name, rate in CATALOG
+    ]
+    plan, total_time = plan_workout(
+        kcal_to_burn, 70.3, exercises, strategy=strategy, seed=1
+    )
+
+    burned = sum(segment["kcal_burned_segment"] for segment in plan)
+    assert kcal_to_burn - 0.05 <= burned
+    # Mai più di un segmento minimo (5 minuti) dell'esercizio più intenso
+    assert burned - kcal_to_burn < 5 * 0.15 * 70.3
+    assert (plan, total_time) == PLANNERS[strategy].plan(
+        kcal_to_burn, 70.3, catalog_from_exercises(exercises), seed=1
+    )
+    assert total_time == round(sum(segment["duration_min"] for segment in plan), 1)
+
+
+def test_optimal_cut_over_comes_from_config(app):
+    assert PLANNERS["optimal"].max_target_kcal == app.config["WORKOUT_OPTIMAL_MAX_KCAL"]
@@ -0,0 +1,36 @@
+"""
+Lavoro CPU-bound fuori dall'event loop. La pianificazione dei workout (NumPy,
+in gran parte senza GIL) va nel pool di thread di Starlette; il rendering dei
+PDF (ReportLab, puro Python) in un pool di processi dedicato.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from backend.config import Config
+
+_pool = None
+
+
+def get_process_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=Config.REPORT_EXPORT_PROCESSES or os.cpu_count()
+        )
+    return _pool
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Esegue fn(*args, **kwargs) nel pool di processi senza bloccare il loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,186 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app import app, db
+from models import FoodItem
+from catalog_cache import bump_food_version
+from backend.services.openfoodfacts import OpenFoodFactsClient, product_to_food_fields
+from backend.services.singleflight import SingleFlight
+from metrics import timed_fetch
+
+_client = None
+_client_lock = threading.Lock()
+_flights = SingleFlight()
+
+def get_off_client():
+    """Client Open Food Facts condiviso da tutto il processo (sessione HTTP in pool)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenFoodFactsClient(
+                    app.config['OPEN_FOOD_FACTS_API_URL'],
+                    timeout=app.config['OPEN_FOOD_FACTS_TIMEOUT'],
+                    pool_size=app.config['OPEN_FOOD_FACTS_POOL_SIZE'],
+                    not_found_ttl=app.config['BARCODE_NOT_FOUND_TTL'],
+                )
+    return _client
+
+def insert_food_item(fields):
+    """
+    Inserisce un FoodItem tollerando le corse con altri worker.
+    Se il barcode è già stato inserito da qualcun altro restituisce quella riga.
+    Ritorna la coppia (food_item, created).
+    """
+    # Una sola versione anche per il nome di ripiego: il primo tentativo gira in un
+    # savepoint, così il suo fallimento non annulla l'incremento
+    version = bump_food_version()
+    food_item = FoodItem(**fields, catalog_version=version)
+    try:
+        with db.session.begin_nested():
+            db.session.add(food_item)
+        db.session.commit()
+        return food_item, True
+    except IntegrityError:
+        pass
+
+    existing = FoodItem.query.filter_by(barcode_upc=fields['barcode_upc']).first()
+    if existing:
+        db.session.rollback() # niente da scrivere: annulla anche l'incremento
+        return existing, False
+
+    # Il nome è unico: se un altro prodotto lo usa già, lo distinguiamo col barcode
+    food_item = FoodItem(**dict(fields, name=f"{fields['name']} ({fields['barcode_upc']})"), catalog_version=version)
+    db.session.add(food_item)
+    try:
+        db.session.commit()
+        return food_item, True
+    except IntegrityError:
+        # Un altro worker ha inserito lo stesso barcode nel frattempo (anche lui col nome di ripiego)
+        db.session.rollback()
+        existing = FoodItem.query.filter_by(barcode_upc=fields['barcode_upc']).first()
+        if existing is None:
+            raise
+        return existing, False
+
+def _fetch_product(client, barcode):
+    """fetch_product con la durata registrata in metrics (esito found, not_found o error)."""
+    with timed_fetch() as outcome:
+        product = client.fetch_product(barcode)
+        outcome[0] = 'found' if product is not None else 'not_found'
+    return product
+
+def _fetch_and_store(barcode):
+    product = _fetch_product(get_off_client(), barcode)
+    if product is None:
+        return None, False
+    food_item, created = insert_food_item(product_to_food_fields(product, barcode))
+    return food_item.id, created
+
+def resolve_barcode(barcode):
+    """
+    Cerca il barcode nel DB locale e, se manca, su Open Food Facts.
+    Le richieste concorrenti per lo stesso barcode fanno una sola chiamata esterna
+    e un solo insert. Ritorna (food_item, created); food_item è None se il prodotto
+    non esiste. Gli errori di rete (requests.RequestException) vengono propagati.
+    """
+    food_item = FoodItem.query.filter_by(barcode_upc=barcode).first()
+    if food_item:
+        return food_item, False
+
+    food_item_id, created = _flights.do(barcode, _fetch_and_store, barcode)
+    if food_item_id is None:
+        return None, False
+    # Il leader ha inserito con la sua sessione: ricarichiamo con quella del thread corrente
+    return db.session.get(FoodItem, food_item_id), created
+
+def _store_batch(batch):
+    """
+    Salva un blocco di prodotti in un'unica transazione; se fallisce riga per riga,
+    e una riga che non si salva diventa un 'error' invece di fermare tutto l'import.
+    Genera tuple (barcode, status, food_item_or_error) come bulk_resolve.
+    """
+    version = bump_food_version()
+    food_items = [FoodItem(**fields, catalog_version=version) for _, fields in batch]
+    db.session.add_all(food_items)
+    try:
+        db.session.commit()
+        for (barcode, _), food_item in zip(batch, food_items):
+            yield barcode, 'created', food_item
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+    for barcode, fields in batch:
+        try:
+            food_item, created = insert_food_item(fields)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            yield barcode, 'error', str(e)
+        else:
+            yield barcode, 'created' if created else 'exists', food_item
+
+def bulk_resolve(barcodes, concurrency=8, batch_size=100, flush_interval=1.0):
+    """
+    Risolve molti barcode: quelli già nel DB vengono letti in blocco, gli altri
+    interrogati su Open Food Facts con al massimo `concurrency` richieste in volo
+    e salvati in transazioni da `batch_size` righe, o da meno se il primo prodotto
+    in attesa aspetta da `flush_interval` secondi (con OFF lento il client vede
+    comunque arrivare i 'created').
+    Genera tuple (barcode, status, food_item_or_error) man mano che sono pronte;
+    status è 'exists', 'created', 'not_found' oppure 'error'.
+    """
+    unknown = []
+    for start in range(0, len(barcodes), 500):
+        chunk = barcodes[start:start + 500]
+        found = {item.barcode_upc: item for item in FoodItem.query.filter(FoodItem.barcode_upc.in_(chunk))}
+        for barcode in chunk:
+            if barcode in found:
+                yield barcode, 'exists', found[barcode]
+            else:
+                unknown.append(barcode)
+
+    client = get_off_client()
+    pending_batch = []
+    flush_at = None # scadenza del blocco in attesa
+    queue = iter(unknown)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        try:
+            while True:
+                # Teniamo al massimo `concurrency` richieste in volo
+                while len(in_flight) < concurrency:
+                    barcode = next(queue, None)
+                    if barcode is None:
+                        break
+                    in_flight[executor.submit(_fetch_product, client, barcode)] = barcode
+                if not in_flight:
+                    break
+
+                timeout = None if flush_at is None else max(0, flush_at - time.monotonic())
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    barcode = in_flight.pop(future)
+                    try:
+                        product = future.result()
+                        fields = product_to_food_fields(product, barcode) if product is not None else None
+                    except Exception as e: # anche un prodotto con dati che non sappiamo convertire
+                        yield barcode, 'error', str(e)
+                        continue
+                    if fields is None:
+                        yield barcode, 'not_found', None
+                    else:
+                        if not pending_batch:
+                            flush_at = time.monotonic() + flush_interval
+                        pending_batch.append((barcode, fields))
+
+                if pending_batch and (len(pending_batch) >= batch_size or time.monotonic() >= flush_at):
+                    yield from _store_batch(pending_batch)
+                    pending_batch = []
+                    flush_at = None
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    if pending_batch:
+        yield from _store_batch(pending_batch)
@@ -0,0 +1,12 @@
+"""
+Benchmark del progetto:
+- generate_data: database sintetici realistici (fino a 100k utenti, 10M MealItem)
+- micro: micro-benchmark di pianificazione, BMR e serializzatori
+- load: carico HTTP con un mix realistico di richieste verso un server locale
+
+Ogni suite stampa p50/p95/p99 e throughput e può confrontarsi con una baseline
+salvata in benchmarks/baselines/ (uscita con codice 1 se c'è una regressione).
+Le baseline dipendono dalla macchina e non sono nel repository: si salvano con
+--save-baseline sulla macchina che fa il controllo, che va lanciato con --check
+(codice 2 se la baseline manca o è stata presa con altri parametri).
+"""
@@ -0,0 +1,382 @@
+"""
+Generatore di database sintetici per i benchmark. Lo schema viene creato con le
+migrazioni Alembic (come in produzione), poi i dati vengono caricati a blocchi
+con INSERT multi-riga e id espliciti, così il carico di load.py sa a priori
+quali workout appartengono a quale utente.
+
+Preset:
+- small: 1k utenti, 10k FoodItem, 100k MealItem
+- large: 100k utenti, 1M FoodItem, 10M MealItem
+
+Tutti gli utenti si chiamano bench_user_<n>, hanno password BENCH_PASSWORD e
+token_version 0. L'utente 1 è GuestWarrior, come nell'app.
+
+Uso: python -m benchmarks.generate_data --url sqlite:///bench.db --preset large
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+
+PRESETS = {
+    "small": {"users": 1_000, "food_items": 10_000, "meal_items": 100_000},
+    "large": {"users": 100_000, "food_items": 1_000_000, "meal_items": 10_000_000},
+}
+BENCH_PASSWORD = "benchmark"
+CHUNK_SIZE = 50_000
+FIRST_USER_ID = 2  # 1 è GuestWarrior
+
+# Stesso catalogo di /api/seed_exercises: (nome, acronimo, kcal/kg/min)
+EXERCISES = [
+    ("Burpees", "BUR", 0.15),
+    ("Thrusters", "THR", 0.18),
+    ("Rowing (Intenso)", "ROW", 0.13),
+    ("Pull-ups", "PU", 0.10),
+    ("Box Jumps", "BJ", 0.12),
+    ("Kettlebell Swings", "KBS", 0.14),
+    ("Wall Balls", "WB", 0.16),
+    ("Deadlifts", "DL", 0.17),
+]
+
+# Parole dei nomi degli alimenti: le usa anche load.py per le ricerche
+FOOD_WORDS = (
+    "pizza pasta carbonara margherita tiramisu cornetto crema pollo "
+    "grigliato salmone forno insalata mista hamburger formaggio mela banana "
+    "yogurt greco biscotti cioccolato riso basmati lasagna ragu gnocchi "
+    "pesto mozzarella prosciutto crudo bresaola tonno olio pane integrale "
+    "gelato pistacchio nocciola cereali avena latte uova"
+).split()
+FOOD_CATEGORIES = ["Pizza", "Pasta", "Carne", "Pesce", "Dolce", "Frutta", "Verdura"]
+
+
+def migrate(url):
+    """
+    Crea lo schema e restituisce l'URL risolto come lo vedrà il server (un file
+    SQLite relativo finisce in instance/, vedi backend/config.py).
+    """
+    os.environ["DATABASE_URL"] = url
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+    from app import app
+
+    with app.app_context():
+        command.upgrade(AlembicConfig("alembic.ini"), "head")
+    return app.config["SQLALCHEMY_DATABASE_URI"]
+
+
+def insert_chunks(conn, table, rows_iter, label):
+    """Inserisce le righe a blocchi di CHUNK_SIZE; restituisce il numero di righe."""
+    total = 0
+    chunk = []
+    for row in rows_iter:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+            print(f"\r{label}: {total:,}", end="", flush=True)
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        total += len(chunk)
+    print(f"\r{label}: {total:,}")
+    return total
+
+
+def user_rows(users, password_hash, now, rng):
+    yield {
+        "id": 1,
+        "username": "GuestWarrior",
+        "email": "guest1@caloriepunisher.com",
+        "password_hash": password_hash,
+        "gender": "M",
+        "age": 30,
+        "weight_kg": 75.0,
+        "height_cm": 175.0,
+        "registration_date": now,
+        "token_version": 0,
+    }
+    genders = rng.choice(["M", "F"], size=users)
+    ages = rng.integers(18, 75, size=users)
+    weights = rng.normal(75, 14, size=users).clip(45, 160).round(1)
+    heights = rng.normal(172, 10, size=users).clip(145, 210).round(1)
+    for n in range(users):
+        yield {
+            "id": FIRST_USER_ID + n,
+            "username": f"bench_user_{n}",
+            "email": f"bench_user_{n}@example.com",
+            "password_hash": password_hash,
+            "gender": str(genders[n]),
+            "age": int(ages[n]),
+            "weight_kg": float(weights[n]),
+            "height_cm": float(heights[n]),
+            "registration_date": now - timedelta(days=int(ages[n])),
+            "token_version": 0,
+        }
+
+
+def food_nutrients(food_items, rng):
+    """Colonne (kcal, carbo, proteine, grassi) per 100 g di tutti gli alimenti."""
+    return (
+        rng.uniform(15, 600, size=food_items).round(1),
+        rng.uniform(0, 80, size=food_items).round(1),
+        rng.uniform(0, 35, size=food_items).round(1),
+        rng.uniform(0, 40, size=food_items).round(1),
+    )
+
+
+def food_rows(food_items, nutrients, rng):
+    kcal, carbs, proteins, fats = nutrients
+    words = rng.integers(0, len(FOOD_WORDS), size=(food_items, 3))
+    categories = rng.integers(0, len(FOOD_CATEGORIES), size=food_items)
+    for n in range(food_items):
+        name = " ".join(FOOD_WORDS[w] for w in words[n]).capitalize()
+        yield {
+            "id": n + 1,
+            "name": f"{name} {n + 1}",  # il numero rende il nome unico
+            "category": FOOD_CATEGORIES[categories[n]],
+            "kcal_per_100g": float(kcal[n]),
+            "carbs_per_100g": float(carbs[n]),
+            "proteins_per_100g": float(proteins[n]),
+            "fats_per_100g": float(fats[n]),
+            "sugars_per_100g": 0.0,
+            "fiber_per_100g": 0.0,
+            "sodium_mg_per_100g": 0.0,
+            "image_url": None,
+            "barcode_upc": f"{800_000_000_000 + n:013d}",
+        }
+
+
+def meal_rows(meal_count, users, days, now, rng):
+    """Pasti sparsi sugli ultimi `days` giorni, oggi compreso."""
+    for start in range(0, meal_count, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, meal_count - start)
+        user_ids = rng.integers(FIRST_USER_ID, FIRST_USER_ID + users, size=size)
+        ages = rng.uniform(0, days * 86400, size=size)
+        for n in range(size):
+            yield {
+                "id": start + n + 1,
+                "user_id": int(user_ids[n]),
+                "meal_time": now - timedelta(seconds=float(ages[n])),
+                "description": "Pasto sintetico",
+            }
+
+
+def meal_item_rows(meal_items, meal_count, nutrients, rng):
+    """In media meal_items / meal_count elementi per pasto, con macro calcolate."""
+    kcal, carbs, proteins, fats = nutrients
+    item_id = 0
+    for start in range(0, meal_items, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, meal_items - start)
+        meal_ids = np.sort(rng.integers(1, meal_count + 1, size=size))
+        food_ids = rng.integers(1, len(kcal) + 1, size=size)
+        grams = rng.uniform(20, 400, size=size).round(0)
+        factor = grams / 100
+        columns = (
+            kcal[food_ids - 1] * factor,
+            carbs[food_ids - 1] * factor,
+            proteins[food_ids - 1] * factor,
+            fats[food_ids - 1] * factor,
+        )
+        for n in range(size):
+            item_id += 1
+            yield {
+                "id": item_id,
+                "meal_id": int(meal_ids[n]),
+                "food_item_id": int(food_ids[n]),
+                "grams_consumed": float(grams[n]),
+                "kcal_total_item": float(columns[0][n]),
+                "carbs_item": float(columns[1][n]),
+                "proteins_item": float(columns[2][n]),
+                "fats_item": float(columns[3][n]),
+            }
+
+
+def workout_id(user_index, position, workouts_per_user):
+    """Id del workout `position` di bench_user_<user_index> (usato da load.py)."""
+    return user_index * workouts_per_user + position + 1
+
+
+def workout_rows(users, workouts_per_user, days, now, rng):
+    for user_index in range(users):
+        for position in range(workouts_per_user):
+            yield {
+                "id": workout_id(user_index, position, workouts_per_user),
+                "user_id": FIRST_USER_ID + user_index,
+                "generation_date": now
+                - timedelta(seconds=float(rng.uniform(0, days * 86400))),
+                "kcal_to_burn": float(rng.uniform(150, 1200)),
+                "estimated_total_time_min": 0.0,  # aggiornato dai segmenti qui sotto
+            }
+
+
+def segment_rows(workouts, segments_per_workout, rng):
+    segment_id = 0
+    for start in range(0, workouts, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, workouts - start)
+        exercise_ids = rng.integers(
+            1, len(EXERCISES) + 1, size=(size, segments_per_workout)
+        )
+        durations = rng.uniform(5, 15, size=(size, segments_per_workout)).round(1)
+        for n in range(size):
+            for position in range(segments_per_workout):
+                segment_id += 1
+                exercise_id = int(exercise_ids[n][position])
+                yield {
+                    "id": segment_id,
+                    "workout_id": start + n + 1,
+                    "position": position,
+                    "exercise_id": exercise_id,
+                    "exercise_acronym": EXERCISES[exercise_id - 1][1],
+                    "exercise_name": EXERCISES[exercise_id - 1][0],
+                    "duration_min": float(durations[n][position]),
+                    "kcal_burned_segment": round(
+                        EXERCISES[exercise_id - 1][2]
+                        * 75
+                        * float(durations[n][position]),
+                        2,
+                    ),
+                }
+
+
+def generate(url, users, food_items, meal_items, workouts_per_user, days, seed):
+    from werkzeug.security import generate_password_hash
+
+    from backend.config import Config
+    from backend.database import engine_options, install_sqlite_pragmas
+    from backend.models import (
+        Exercise,
+        FoodItem,
+        GeneratedWorkout,
+        GeneratedWorkoutSegment,
+        Meal,
+        MealItem,
+        User,
+    )
+
+    engine = install_sqlite_pragmas(create_engine(url, **engine_options(url)))
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    meal_count = max(1, meal_items // 3)
+    workouts = users * workouts_per_user
+    started = perf_counter()
+
+    with engine.begin() as conn:
+        if conn.scalar(select(func.count()).select_from(User.__table__)):
+            sys.exit(f"{url} already has users: generate into an empty database.")
+        password_hash = generate_password_hash(
+            BENCH_PASSWORD, method=Config.PASSWORD_HASH_METHOD
+        )
+        conn.execute(
+            Exercise.__table__.insert(),
+            [
+                {
+                    "id": n + 1,
+                    "name": name,
+                    "acronym": acronym,
+                    "kcal_per_kg_per_min": kcal,
+                }
+                for n, (name, acronym, kcal) in enumerate(EXERCISES)
+            ],
+        )
+        insert_chunks(
+            conn, User.__table__, user_rows(users, password_hash, now, rng), "users"
+        )
+        nutrients = food_nutrients(food_items, rng)
+        insert_chunks(
+            conn,
+            FoodItem.__table__,
+            food_rows(food_items, nutrients, rng),
+            "food items",
+        )
+        insert_chunks(
+            conn, Meal.__table__, meal_rows(meal_count, users, days, now, rng), "meals"
+        )
+        insert_chunks(
+            conn,
+            MealItem.__table__,
+            meal_item_rows(meal_items, meal_count, nutrients, rng),
+            "meal items",
+        )
+        insert_chunks(
+            conn,
+            GeneratedWorkout.__table__,
+            workout_rows(users, workouts_per_user, days, now, rng),
+            "workouts",
+        )
+        insert_chunks(
+            conn,
+            GeneratedWorkoutSegment.__table__,
+            segment_rows(workouts, 3, rng),
+            "workout segments",
+        )
+        totals = (
+            select(
+                GeneratedWorkoutSegment.workout_id,
+                func.sum(GeneratedWorkoutSegment.duration_min).label("total"),
+            )
+            .group_by(GeneratedWorkoutSegment.workout_id)
+            .subquery()
+        )
+        conn.execute(
+            GeneratedWorkout.__table__.update().values(
+                estimated_total_time_min=select(totals.c.total)
+                .where(totals.c.workout_id == GeneratedWorkout.id)
+                .scalar_subquery()
+            )
+        )
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "ANALYZE"
+            )  # statistiche per il planner, come in produzione
+    engine.dispose()
+    print(f"Done in {perf_counter() - started:.1f}s.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build a synthetic benchmark database."
+    )
+    parser.add_argument(
+        "--url", required=True, help="Target database URL (must be empty)"
+    )
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--food-items", type=int)
+    parser.add_argument("--meal-items", type=int)
+    parser.add_argument("--workouts-per-user", type=int, default=5)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=30,
+        help="Spread meals and workouts over this many days",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    sizes = dict(PRESETS[args.preset])
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+    url = migrate(args.url)
+    generate(
+        url,
+        workouts_per_user=args.workouts_per_user,
+        days=args.days,
+        seed=args.seed,
+        **sizes,
+    )
+    print(
+        f"Load test with: python -m benchmarks.load --users {sizes['users']} "
+        f"--food-items {sizes['food_items']} "
+        f"--workouts-per-user {args.workouts_per_user}"
+    )
+
+
+if __name__ == "__main__":
+    main()
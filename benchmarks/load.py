@@ -0,0 +1,210 @@
+"""
+Carico HTTP su un server locale (app Flask o backend FastAPI: stessi percorsi)
+con un mix realistico di richieste, su un database creato da generate_data.
+
+I JWT vengono firmati qui con la stessa SECRET_KEY del server (variabile
+d'ambiente SECRET_KEY), così il login e il suo hash scrypt non falsano i numeri.
+
+Uso:
+    python -m benchmarks.generate_data --url sqlite:///bench.db
+    DATABASE_URL=sqlite:///bench.db python -m backend.main
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --baseline-name fastapi --check
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import httpx
+import jwt
+
+from backend.auth import JWT_ALGORITHM, JWT_SECRET_KEY
+from benchmarks import stats
+from benchmarks.generate_data import FIRST_USER_ID, FOOD_WORDS, PRESETS, workout_id
+
+DEFAULT_MIX = "search=40,meal_add=15,daily=20,history=20,pdf=5"
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+def token_for(user_id):
+    now = datetime.utcnow()
+    payload = {
+        "user_id": user_id,
+        "ver": 0,
+        "exp": now + timedelta(hours=2),
+        "iat": now,
+    }
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+
+class Scenario:
+    """Sceglie utenti, alimenti e workout a caso tra quelli di generate_data."""
+
+    def __init__(self, users, food_items, workouts_per_user, seed):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.food_items = food_items
+        self.workouts_per_user = workouts_per_user
+        self._tokens = {}
+
+    def user(self):
+        index = self.rng.randrange(self.users)
+        user_id = FIRST_USER_ID + index
+        if user_id not in self._tokens:
+            self._tokens[user_id] = {"Authorization": f"Bearer {token_for(user_id)}"}
+        return index, self._tokens[user_id]
+
+    def search_query(self):
+        word = self.rng.choice(FOOD_WORDS)
+        kind = self.rng.random()
+        if kind < 0.3:
+            return word[: self.rng.randint(2, len(word))]  # mentre si digita
+        if kind < 0.4 and len(word) > 4:
+            cut = self.rng.randrange(1, len(word) - 1)
+            return word[:cut] + word[cut:][1:]  # errore di battitura
+        return f"{word} {self.rng.choice(FOOD_WORDS)}"
+
+
+async def search(client, scenario):
+    return await client.get(
+        "/api/fooditems/search", params={"q": scenario.search_query()}
+    )
+
+
+async def meal_add(client, scenario):
+    _, headers = scenario.user()
+    items = [
+        {
+            "food_item_id": scenario.rng.randint(1, scenario.food_items),
+            "grams_consumed": scenario.rng.randint(30, 400),
+        }
+        for _ in range(scenario.rng.randint(1, 4))
+    ]
+    return await client.post(
+        "/api/meals", headers=headers, json={"description": "Load", "items": items}
+    )
+
+
+async def daily(client, scenario):
+    _, headers = scenario.user()
+    return await client.get("/api/meals/daily", headers=headers)
+
+
+async def history(client, scenario):
+    _, headers = scenario.user()
+    return await client.get(
+        "/api/workouts/history", headers=headers, params={"limit": 20}
+    )
+
+
+async def pdf(client, scenario):
+    index, headers = scenario.user()
+    position = scenario.rng.randrange(scenario.workouts_per_user)
+    workout = workout_id(index, position, scenario.workouts_per_user)
+    return await client.get(f"/api/workout_report/{workout}/pdf", headers=headers)
+
+
+OPERATIONS = {
+    "search": search,
+    "meal_add": meal_add,
+    "daily": daily,
+    "history": history,
+    "pdf": pdf,
+}
+
+
+async def run(base_url, mix, concurrency, duration, warmup, scenario):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker(deadline, record):
+            while perf_counter() < deadline:
+                name = scenario.rng.choices(names, weights)[0]
+                started = perf_counter()
+                try:
+                    response = await OPERATIONS[name](client, scenario)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if record:
+                    latencies[name].append(perf_counter() - started)
+                    errors[name] += not ok
+
+        if warmup:
+            deadline = perf_counter() + warmup
+            await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+        started = perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+        elapsed = perf_counter() - started
+
+    results = {
+        name: stats.summarize(latencies[name], elapsed, errors[name]) for name in names
+    }
+    results["all"] = stats.summarize(
+        [latency for name in names for latency in latencies[name]],
+        elapsed,
+        sum(errors.values()),
+    )
+    return results
+
+
+def main(argv=None):
+    small = PRESETS["small"]
+    parser = argparse.ArgumentParser(description="HTTP load test with a realistic mix.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds")
+    parser.add_argument("--users", type=int, default=small["users"])
+    parser.add_argument("--food-items", type=int, default=small["food_items"])
+    parser.add_argument("--workouts-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    stats.add_baseline_arguments(parser, default_name="default")
+    args = parser.parse_args(argv)
+
+    scenario = Scenario(args.users, args.food_items, args.workouts_per_user, args.seed)
+    results = asyncio.run(
+        run(
+            args.base_url,
+            args.mix,
+            args.concurrency,
+            args.duration,
+            args.warmup,
+            scenario,
+        )
+    )
+    params = {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "users": args.users,
+        "food_items": args.food_items,
+    }
+    return stats.finish("load", results, params, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
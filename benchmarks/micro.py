@@ -0,0 +1,174 @@
+"""
+Micro-benchmark delle funzioni calde: pianificazione dei workout, BMR e
+serializzatori to_dict. Non serve un database: i modelli sono oggetti transienti
+di backend.models (gli stessi modelli dell'app Flask).
+
+Uso: python -m benchmarks.micro [--iterations N] [--save-baseline | --check]
+"""
+
+import argparse
+import random
+import sys
+from collections import namedtuple
+from datetime import datetime
+from time import perf_counter
+
+from backend.models import (
+    Exercise,
+    FoodItem,
+    GeneratedWorkout,
+    GeneratedWorkoutSegment,
+    Meal,
+    MealItem,
+)
+from backend.services.planner import plan_cache
+from backend.services.utility import calculate_bmr, generate_workout_logic
+from benchmarks import stats
+
+ExerciseRow = namedtuple("ExerciseRow", "id name acronym kcal_per_kg_per_min")
+
+# Stesso catalogo di /api/seed_exercises
+EXERCISES = [
+    ExerciseRow(1, "Burpees", "BUR", 0.15),
+    ExerciseRow(2, "Thrusters", "THR", 0.18),
+    ExerciseRow(3, "Rowing (Intenso)", "ROW", 0.13),
+    ExerciseRow(4, "Pull-ups", "PU", 0.10),
+    ExerciseRow(5, "Box Jumps", "BJ", 0.12),
+    ExerciseRow(6, "Kettlebell Swings", "KBS", 0.14),
+    ExerciseRow(7, "Wall Balls", "WB", 0.16),
+    ExerciseRow(8, "Deadlifts", "DL", 0.17),
+]
+
+
+def measure(fn, inputs):
+    """Latenza di ogni chiamata fn(*args) per gli argomenti in `inputs`."""
+    latencies = []
+    for args in inputs:
+        started = perf_counter()
+        fn(*args)
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def _food_item(rng, food_id):
+    return FoodItem(
+        id=food_id,
+        name=f"Food {food_id}",
+        category="Bench",
+        kcal_per_100g=rng.uniform(20, 600),
+        carbs_per_100g=rng.uniform(0, 80),
+        proteins_per_100g=rng.uniform(0, 40),
+        fats_per_100g=rng.uniform(0, 50),
+        sugars_per_100g=0.0,
+        fiber_per_100g=0.0,
+        sodium_mg_per_100g=0.0,
+        image_url=None,
+        barcode_upc=None,
+    )
+
+
+def sample_meal(rng, meal_id, items=3):
+    meal = Meal(id=meal_id, user_id=1, meal_time=datetime.utcnow(), description="x")
+    meal.meal_items = [
+        MealItem(
+            id=meal_id * 10 + position,
+            meal_id=meal_id,
+            food_item_id=position,
+            grams_consumed=100.0,
+            kcal_total_item=250.0,
+            carbs_item=30.0,
+            proteins_item=10.0,
+            fats_item=8.0,
+            food_item=_food_item(rng, position),
+        )
+        for position in range(items)
+    ]
+    return meal
+
+
+def sample_workout(rng, workout_id, segments=4):
+    exercises = {row.id: Exercise(**row._asdict()) for row in EXERCISES}
+    workout = GeneratedWorkout(
+        id=workout_id,
+        user_id=1,
+        generation_date=datetime.utcnow(),
+        kcal_to_burn=500.0,
+        estimated_total_time_min=40.0,
+    )
+    workout.segments = [
+        GeneratedWorkoutSegment(
+            position=position,
+            exercise_id=exercise_id,
+            exercise_acronym=exercises[exercise_id].acronym,
+            exercise_name=exercises[exercise_id].name,
+            duration_min=10.0,
+            kcal_burned_segment=120.0,
+        )
+        for position, exercise_id in enumerate(rng.sample(sorted(exercises), segments))
+    ]
+    return workout
+
+
+def run(iterations, seed):
+    rng = random.Random(seed)
+    targets = [
+        (rng.uniform(100, 1500), rng.uniform(50, 120)) for _ in range(iterations)
+    ]
+    results = {}
+
+    def plan_cold(kcal, weight):
+        plan_cache.clear()
+        generate_workout_logic(kcal, weight, EXERCISES, catalog_version=1)
+
+    results["plan.optimal.cold"] = stats.summarize(measure(plan_cold, targets))
+
+    # Cache già calda: tutte le chiamate sono hit
+    def plan_cached(kcal, weight):
+        generate_workout_logic(kcal, weight, EXERCISES, catalog_version=1)
+
+    plan_cache.clear()
+    measure(plan_cached, targets)
+    results["plan.optimal.cached"] = stats.summarize(measure(plan_cached, targets))
+    results["plan.greedy"] = stats.summarize(
+        measure(
+            lambda kcal, weight: generate_workout_logic(
+                kcal, weight, EXERCISES, strategy="greedy"
+            ),
+            targets,
+        )
+    )
+
+    people = [
+        (rng.choice("MF"), rng.randint(18, 80), weight, rng.uniform(150, 200))
+        for _, weight in targets
+    ]
+    results["calculate_bmr"] = stats.summarize(measure(calculate_bmr, people))
+
+    foods = [(_food_item(rng, i),) for i in range(iterations)]
+    results["to_dict.food_item"] = stats.summarize(
+        measure(lambda food: food.to_dict(), foods)
+    )
+    meals = [(sample_meal(rng, i),) for i in range(iterations)]
+    results["to_dict.meal_with_items"] = stats.summarize(
+        measure(lambda meal: meal.to_dict(include_items=True), meals)
+    )
+    workouts = [(sample_workout(rng, i),) for i in range(iterations)]
+    results["to_dict.workout"] = stats.summarize(
+        measure(lambda workout: workout.to_dict(), workouts)
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the hot paths.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    stats.add_baseline_arguments(parser, default_name="default")
+    args = parser.parse_args(argv)
+    results = run(args.iterations, args.seed)
+    params = {"iterations": args.iterations, "seed": args.seed}
+    return stats.finish("micro", results, params, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Percentili, report e confronto con la baseline, comuni a tutte le suite."""
+
+import json
+import os
+import platform
+from datetime import datetime
+
+import numpy as np
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+# Regressione se p95 peggiora (o il throughput cala) oltre questa frazione
+DEFAULT_TOLERANCE = 0.15
+
+
+def summarize(latencies_s, elapsed_s=None, errors=0):
+    """
+    Riassunto di una serie di latenze in secondi: percentili in millisecondi e
+    throughput (operazioni al secondo sul tempo totale `elapsed_s`, se dato,
+    altrimenti sulla somma delle latenze).
+    """
+    samples = np.asarray(latencies_s, dtype=float) * 1000
+    if not len(samples):
+        return {"count": 0, "errors": errors}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    elapsed_s = elapsed_s if elapsed_s is not None else samples.sum() / 1000
+    return {
+        "count": int(len(samples)),
+        "errors": errors,
+        "mean_ms": round(float(samples.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "throughput_per_s": round(len(samples) / elapsed_s, 2) if elapsed_s else None,
+    }
+
+
+def print_table(results):
+    print(
+        f"{'benchmark':<32} {'count':>8} {'p50 ms':>10} {'p95 ms':>10}"
+        f" {'p99 ms':>10} {'ops/s':>12} {'errors':>7}"
+    )
+    for name, row in results.items():
+        if not row.get("count"):
+            print(f"{name:<32} {'-':>8}")
+            continue
+        print(
+            f"{name:<32} {row['count']:>8} {row['p50_ms']:>10.3f}"
+            f" {row['p95_ms']:>10.3f} {row['p99_ms']:>10.3f}"
+            f" {row['throughput_per_s'] or 0:>12.1f} {row['errors']:>7}"
+        )
+
+
+def baseline_path(suite, name):
+    return os.path.join(BASELINE_DIR, f"{suite}-{name}.json")
+
+
+def save_results(path, suite, results, params):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    document = {
+        "suite": suite,
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Confronta i risultati con quelli della baseline. Restituisce le regressioni
+    come stringhe leggibili (lista vuota se è tutto in linea).
+    """
+    regressions = []
+    for name, old in baseline["results"].items():
+        new = results.get(name)
+        if not new or not new.get("count"):
+            regressions.append(f"{name}: missing from this run")
+            continue
+        if not old.get("count"):
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {new['p95_ms']:.3f} ms vs {old['p95_ms']:.3f} ms"
+            )
+        old_rate, new_rate = old.get("throughput_per_s"), new.get("throughput_per_s")
+        if old_rate and new_rate and new_rate < old_rate * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {new_rate:.1f}/s vs {old_rate:.1f}/s"
+            )
+        if new.get("errors", 0) > old.get("errors", 0):
+            regressions.append(f"{name}: {new['errors']} errors vs {old['errors']}")
+    return regressions
+
+
+def add_baseline_arguments(parser, default_name):
+    parser.add_argument(
+        "--baseline-name",
+        default=default_name,
+        help="Baseline file name in benchmarks/baselines/ (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store this run as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Allowed slowdown before failing (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Fail (exit 2) when there is no baseline, or it was taken with other"
+        " parameters, instead of only printing a warning",
+    )
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+
+
+def finish(suite, results, params, args):
+    """
+    Stampa, salva e confronta: restituisce il codice di uscita del processo (1 se
+    c'è una regressione). Con --check una baseline mancante o presa con altri
+    parametri è un errore (2): un controllo senza niente da confrontare non deve
+    passare in silenzio.
+    """
+    print_table(results)
+    if args.output:
+        save_results(args.output, suite, results, params)
+    path = baseline_path(suite, args.baseline_name)
+    if args.save_baseline:
+        save_results(path, suite, results, params)
+        print(f"Baseline saved to {path}")
+        return 0
+    if not os.path.exists(path):
+        print(f"No baseline at {path}: run again with --save-baseline to create it.")
+        return 2 if args.check else 0
+    baseline = load_results(path)
+    if baseline.get("params") != params:
+        print(f"Warning: baseline parameters differ: {baseline.get('params')}")
+        if args.check:
+            return 2
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("Regressions against the baseline:")
+        print("\n".join(f"  {line}" for line in regressions))
+        return 1
+    print(f"No regressions against {path} (tolerance {args.tolerance:.0%}).")
+    return 0
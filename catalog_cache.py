@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event, update
+from app import app, db
+from db_routing import RoutingSession
+from models import CatalogVersion, Exercise, FoodItem
+
+EXERCISES = 'exercise'
+FOOD_ITEMS = 'food_item'
+USERS = 'user' # usata da auth.py per i principal in cache (vedi User.catalog_version)
+BUMPED = 'bumped_catalogs' # chiave di session.info: cataloghi incrementati nella transazione
+
+# Snapshot immutabili e compatti: stessi attributi dei modelli, niente sessione ORM
+ExerciseRecord = namedtuple('ExerciseRecord', 'id name acronym kcal_per_kg_per_min description')
+FoodRecord = namedtuple('FoodRecord', [
+    'id', 'name', 'category', 'kcal_per_100g', 'carbs_per_100g', 'proteins_per_100g', 'fats_per_100g',
+    'sugars_per_100g', 'fiber_per_100g', 'sodium_mg_per_100g', 'image_url', 'barcode_upc'
+])
+
+def _to_dict(record):
+    return dict(record._asdict())
+
+ExerciseRecord.to_dict = _to_dict
+FoodRecord.to_dict = _to_dict
+
+def _food_record(food_item):
+    return FoodRecord(*(getattr(food_item, field) for field in FoodRecord._fields))
+
+def bump_catalog_version(*names):
+    """
+    Incrementa la versione dei cataloghi nella transazione corrente (il commit lo fa
+    il chiamante, insieme alla scrittura che ha reso vecchie le cache).
+    Al più un UPDATE per catalogo e transazione: la riga resta bloccata fino al
+    commit comunque, e tutte le righe scritte nella transazione prendono la stessa
+    versione. Le cache locali si svuotano solo dopo il commit (_invalidate_committed):
+    prima, chi rilegge la versione troverebbe ancora quella vecchia e la terrebbe.
+    """
+    bumped = db.session.info.setdefault(BUMPED, set())
+    for name in names:
+        if name in bumped:
+            continue
+        result = db.session.execute(
+            update(CatalogVersion).where(CatalogVersion.name == name).values(version=CatalogVersion.version + 1)
+        )
+        if not result.rowcount:
+            db.session.add(CatalogVersion(name=name, version=2))
+        bumped.add(name)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_committed(session):
+    names = session.info.pop(BUMPED, None)
+    if names:
+        catalog_cache.invalidate(*names)
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _forget_rolled_back(session, transaction):
+    if transaction.parent is None: # rollback (o commit già gestito): gli incrementi non valgono più
+        session.info.pop(BUMPED, None)
+
+def bump_food_version():
+    """
+    Come bump_catalog_version(FOOD_ITEMS), ma restituisce la nuova versione: va scritta
+    in FoodItem.catalog_version delle righe inserite o aggiornate nella stessa
+    transazione, così chi sincronizza con /api/fooditems?since= le vede tutte.
+    Va chiamata prima di aggiungere le righe alla sessione (il flush le scriverebbe).
+    """
+    bump_catalog_version(FOOD_ITEMS)
+    db.session.flush()
+    return current_food_version()
+
+def bump_user_version():
+    """Come bump_food_version, per 'user': la nuova versione va in User.catalog_version dell'utente modificato."""
+    bump_catalog_version(USERS)
+    db.session.flush()
+    return db.session.query(CatalogVersion.version).filter_by(name=USERS).scalar()
+
+def current_food_version():
+    """Versione di 'food_item' letta dal database, senza passare dalla cache."""
+    return db.session.query(CatalogVersion.version).filter_by(name=FOOD_ITEMS).scalar() or 1
+
+class CatalogCache:
+    """
+    Cache in-process di esercizi e alimenti, valida finché la riga di catalog_version
+    non cambia. La versione viene riletta dal database al massimo ogni
+    `check_interval` secondi, quindi gli altri worker vedono una scrittura con al più
+    quel ritardo; il worker che scrive si invalida subito.
+    """
+    def __init__(self, check_interval=2.0, max_food_items=50000, clock=time.monotonic):
+        self.check_interval = check_interval
+        self.max_food_items = max_food_items
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._checked_at = None
+        self._exercises = None # (versione, tupla di ExerciseRecord)
+        self._food_version = None
+        self._foods = OrderedDict()
+        self.counters = {'exercise_hits': 0, 'exercise_misses': 0, 'food_hits': 0, 'food_misses': 0, 'version_checks': 0}
+
+    def version(self, name):
+        """Versione corrente del catalogo `name` (letta dal DB solo se il controllo è scaduto)."""
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            versions = dict(db.session.query(CatalogVersion.name, CatalogVersion.version))
+            with self._lock:
+                self._versions = versions
+                self._checked_at = now
+                self.counters['version_checks'] += 1
+        return self._versions.get(name, 1)
+
+    def invalidate(self, *names):
+        """Dimentica i dati locali e forza la rilettura delle versioni alla prossima richiesta."""
+        with self._lock:
+            self._checked_at = None
+            if EXERCISES in names:
+                self._exercises = None
+            if FOOD_ITEMS in names:
+                self._foods.clear()
+                self._food_version = None
+
+    def exercises(self):
+        """Restituisce (versione, tupla di ExerciseRecord ordinati per id)."""
+        version = self.version(EXERCISES)
+        snapshot = self._exercises
+        if snapshot is not None and snapshot[0] == version:
+            self.counters['exercise_hits'] += 1
+            return snapshot
+
+        records = tuple(
+            ExerciseRecord(*row) for row in db.session.query(
+                Exercise.id, Exercise.name, Exercise.acronym, Exercise.kcal_per_kg_per_min, Exercise.description
+            ).order_by(Exercise.id)
+        )
+        with self._lock:
+            self.counters['exercise_misses'] += 1
+            self._exercises = (version, records)
+        return self._exercises
+
+    def food_items(self, food_item_ids):
+        """
+        Restituisce {id: FoodRecord} per gli id richiesti che esistono: quelli non in
+        cache vengono caricati con un'unica query IN.
+        """
+        version = self.version(FOOD_ITEMS)
+        found = {}
+        missing = []
+        with self._lock:
+            if self._food_version != version:
+                self._foods.clear()
+                self._food_version = version
+            for food_item_id in set(food_item_ids):
+                record = self._foods.get(food_item_id)
+                if record is None:
+                    missing.append(food_item_id)
+                else:
+                    self._foods.move_to_end(food_item_id)
+                    found[food_item_id] = record
+            self.counters['food_hits'] += len(found)
+            self.counters['food_misses'] += len(missing)
+
+        if missing:
+            loaded = [_food_record(item) for item in FoodItem.query.filter(FoodItem.id.in_(missing))]
+            with self._lock:
+                for record in loaded:
+                    found[record.id] = record
+                    if self._food_version == version:
+                        self._foods[record.id] = record
+                while len(self._foods) > self.max_food_items:
+                    self._foods.popitem(last=False)
+        return found
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                versions=dict(self._versions),
+                cached_food_items=len(self._foods),
+                cached_exercises=len(self._exercises[1]) if self._exercises else 0
+            )
+
+catalog_cache = CatalogCache(app.config['CATALOG_VERSION_CHECK_INTERVAL'], app.config['CATALOG_FOOD_CACHE_SIZE'])
@@ -0,0 +1,163 @@
+"""
+Controllo dei piani di esecuzione: crea un database SQLite temporaneo con le
+migrazioni Alembic (stessi indici della produzione), chiama ogni route dell'app
+e passa ogni query eseguita a EXPLAIN QUERY PLAN. Fallisce se una query fa la
+scansione completa di una tabella fuori da ALLOWED_SCANS o se una route non è
+coperta dallo scenario.
+
+Niente ANALYZE: senza statistiche il planner di SQLite ragiona come su tabelle
+grandi, quindi i pochi dati di prova bastano per vedere quali indici userebbe.
+
+Uso: python check_query_plans.py [--verbose]
+Gira anche come test (backend/tests/test_query_plans.py) sul database dei test.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+if 'app' not in sys.modules: # importato dai test l'app c'è già, con il suo database temporaneo
+    _workdir = tempfile.mkdtemp(prefix='query_plans_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'check.db')}"
+    os.environ['REPORT_CACHE_DIR'] = os.path.join(_workdir, 'report_cache')
+    os.environ.pop('READ_DATABASE_URL', None)
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from flask import has_request_context, request
+from sqlalchemy import event
+from app import app, db
+from models import FoodItem
+from catalog_cache import bump_food_version
+
+# Tabelle che è giusto leggere per intero, con il motivo
+ALLOWED_SCANS = {
+    'catalog_version': 'una riga per catalogo, letta tutta insieme',
+    'exercise': 'catalogo piccolo, caricato per intero in catalog_cache',
+    'food_item': 'indice di ricerca e /api/fooditems leggono tutto il catalogo di proposito',
+}
+EXPLAINED = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+SCAN_RE = re.compile(r'^SCAN (\w+)')
+BARCODE = '0000000000017'
+
+_statements = {} # (sql, parametri) -> route che l'ha eseguita
+_exercised = set()
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or request.url_rule is None:
+        return
+    if not statement.lstrip().upper().startswith(EXPLAINED):
+        return
+    if executemany:
+        parameters = parameters[0]
+    route = f'{request.method} {request.url_rule.rule}'
+    _statements.setdefault((statement, tuple(parameters or ())), route)
+
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', _record)
+
+@app.before_request
+def _mark_route():
+    if request.url_rule is not None:
+        _exercised.add((request.method, request.url_rule.rule))
+
+def _call(client, method, url, expected, **kwargs):
+    response = client.open(url, method=method, **kwargs)
+    if response.status_code not in (expected if isinstance(expected, tuple) else (expected,)):
+        sys.exit(f'{method} {url} returned {response.status_code} instead of {expected}: {response.get_data(as_text=True)[:200]}')
+    return response
+
+def run_scenario(client):
+    """Percorso d'uso completo: ogni route viene chiamata almeno una volta."""
+    _call(client, 'GET', '/api/profile', 200) # crea GuestWarrior (id 1) prima degli altri utenti
+    # 200 se i cataloghi ci sono già (i test condividono il database)
+    _call(client, 'POST', '/api/seed_food_items', (200, 201))
+    _call(client, 'POST', '/api/seed_exercises', (200, 201))
+    with app.app_context():
+        db.session.add(FoodItem(name='Query Plan Bar', kcal_per_100g=400.0, carbs_per_100g=50.0,
+                                proteins_per_100g=20.0, fats_per_100g=15.0, barcode_upc=BARCODE,
+                                catalog_version=bump_food_version()))
+        db.session.commit()
+
+    user = {'username': 'planner', 'email': 'planner@example.com', 'password': 'explain-me',
+            'gender': 'F', 'age': 33, 'weight_kg': 62.0, 'height_cm': 168.0}
+    _call(client, 'POST', '/api/register', 201, json=user)
+    token = _call(client, 'POST', '/api/login', 200, json={'username': user['username'], 'password': user['password']}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    _call(client, 'PUT', '/api/profile', 200, headers=headers, json={'weight_kg': 61.5})
+    _call(client, 'GET', '/api/fooditems', 200)
+    page = _call(client, 'GET', '/api/fooditems?limit=5&fields=id,name', 200).get_json()
+    _call(client, 'GET', f"/api/fooditems?limit=5&since=1&cursor={page['next_cursor']}", 200)
+    _call(client, 'GET', '/api/fooditems?page=2&limit=5', 200)
+    _call(client, 'GET', '/api/fooditems/search?q=pizza', 200)
+    _call(client, 'GET', f'/api/fooditems/barcode/{BARCODE}', 200)
+    _call(client, 'POST', '/api/fooditems/barcode/bulk', 200, headers=headers, json={'barcodes': [BARCODE]})
+
+    meal = {'description': 'Piano di esecuzione', 'items': [{'food_item_id': 1, 'grams_consumed': 150}, {'food_item_id': 2, 'grams_consumed': 80}]}
+    _call(client, 'POST', '/api/meals', 201, headers=headers, json=meal)
+    _call(client, 'POST', '/api/meals/batch', 201, headers=headers, json={'meals': [meal, dict(meal, description='Bis')]})
+    _call(client, 'GET', '/api/meals/daily', 200, headers=headers)
+    _call(client, 'GET', '/api/meals/export', 200, headers=headers).get_data()
+    _call(client, 'GET', '/api/meals/export?format=ndjson&from=2000-01-01', 200, headers=headers).get_data()
+
+    workout_ids = [
+        _call(client, 'POST', '/api/generate_workout', 201, headers=headers, json={'kcal_to_burn': kcal}).get_json()['workout']['id']
+        for kcal in (200, 350, 500)
+    ]
+    page = _call(client, 'GET', '/api/workouts/history?limit=2', 200, headers=headers).get_json()
+    _call(client, 'GET', f"/api/workouts/history?limit=2&cursor={page['next_cursor']}", 200, headers=headers)
+    _call(client, 'GET', '/api/workouts/history?from=2000-01-01&format=ndjson', 200, headers=headers).get_data()
+    _call(client, 'GET', '/api/workouts/stats?period=day', 200, headers=headers)
+    _call(client, 'GET', '/api/analytics/nutrition?period=day', 200, headers=headers)
+    _call(client, 'GET', f'/api/workout_report/{workout_ids[0]}/pdf', 200, headers=headers)
+    _call(client, 'GET', '/api/workout_report/export?format=zip', 200, headers=headers).get_data()
+    _call(client, 'GET', '/api/stats', 200)
+    _call(client, 'GET', '/metrics', 200)
+    _call(client, 'POST', '/api/logout', 200, headers=headers)
+
+def full_scans(plan):
+    """Tabelle lette per intero secondo le righe di EXPLAIN QUERY PLAN (alias e subquery esclusi)."""
+    tables = set()
+    for row in plan:
+        match = SCAN_RE.match(row[-1])
+        if match:
+            name = re.sub(r'_\d+$', '', match.group(1)) # alias di SQLAlchemy, es. food_item_1
+            if name in db.metadata.tables:
+                tables.add(name)
+    return tables
+
+def check(verbose=False):
+    problems = []
+    with app.app_context(), db.engine.connect() as conn:
+        for (statement, parameters), route in _statements.items():
+            plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            scans = full_scans(plan) - ALLOWED_SCANS.keys()
+            if verbose or scans:
+                print(f'--- {route}\n{statement}')
+                for row in plan:
+                    print(f'    {row[-1]}')
+            if scans:
+                problems.append(f"{route}: full scan of {', '.join(sorted(scans))}")
+
+    rules = {(method, rule.rule) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+             for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    for method, rule in sorted(rules - _exercised):
+        problems.append(f'{method} {rule}: not covered by the scenario, add it to run_scenario()')
+    return problems
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fail when a route query needs a full table scan.')
+    parser.add_argument('--verbose', action='store_true', help='Print every query plan, not just the bad ones')
+    args = parser.parse_args()
+
+    with app.app_context():
+        command.upgrade(AlembicConfig('alembic.ini'), 'head')
+    run_scenario(app.test_client())
+    problems = check(args.verbose)
+    print(f'{len(_statements)} distinct queries checked over {len(_exercised)} routes.')
+    if problems:
+        print('\n'.join(problems))
+        sys.exit(1)
+    print('No full table scans. The database suffers less than you will.')
@@ -0,0 +1,152 @@
+"""
+Controllo di equivalenza dei serializzatori: crea un database SQLite temporaneo
+con le migrazioni Alembic, lo riempie con dati scomodi (nomi non ASCII ed emoji,
+float piccolissimi e grandissimi, abbastanza workout da riempire più blocchi di
+IN e del cursore) e confronta byte per byte le risposte delle route servite da
+serializers.py con jsonify([obj.to_dict() ...]) sugli oggetti ORM, che restano
+il riferimento. Il confronto gira sia con orjson sia con il json della libreria
+standard (serializers.orjson = None).
+
+Uso: python check_serializers.py
+Gira anche come test (backend/tests/test_serializers.py) sul database dei test.
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+if 'app' not in sys.modules: # importato dai test l'app c'è già, con il suo database temporaneo
+    _workdir = tempfile.mkdtemp(prefix='serializers_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'check.db')}"
+    os.environ['REPORT_CACHE_DIR'] = os.path.join(_workdir, 'report_cache')
+    os.environ.pop('READ_DATABASE_URL', None)
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from flask import jsonify
+from app import app, db
+from models import FoodItem, GeneratedWorkout, GeneratedWorkoutSegment
+from catalog_cache import bump_food_version
+import serializers
+
+WORKOUTS = 1200 # più di SEGMENT_LOOKUP_CHUNK e di WORKOUT_HISTORY_STREAM_CHUNK
+AWKWARD_NAMES = ('Crème brûlée', 'Pâté 🦆', 'Tofu\x7f', 'Té "verde" \\ 1/2', 'Zuppa miso', '7Eleven 3e')
+AWKWARD_FLOATS = (0.0, 1e-05, 0.0001, 0.00012, 1e-7, 1e16, 1.5e22, 351.0, 0.1 + 0.2, 123456789.123)
+NON_FINITE_FLOATS = (float('nan'), float('inf'), float('-inf')) # jsonify: NaN/Infinity, orjson: null
+
+_failures = []
+
+def _compare(label, actual, expected):
+    if actual != expected:
+        at = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b), min(len(actual), len(expected)))
+        _failures.append(f'{label}: differs at byte {at}: {actual[at - 40:at + 40]!r} != {expected[at - 40:at + 40]!r}')
+
+def _reference(obj):
+    return jsonify(obj).get_data()
+
+def seed():
+    """Alimenti e workout con valori scomodi per l'encoder; restituisce il token dell'utente."""
+    rng = random.Random(25)
+    client = app.test_client()
+    client.post('/api/seed_food_items')
+    client.post('/api/seed_exercises')
+    with app.app_context():
+        version = bump_food_version()
+        for i, name in enumerate(AWKWARD_NAMES):
+            value = AWKWARD_FLOATS[i % len(AWKWARD_FLOATS)]
+            db.session.add(FoodItem(name=name, category='Test ✓', kcal_per_100g=value, carbs_per_100g=rng.random() * 100,
+                                    proteins_per_100g=AWKWARD_FLOATS[-i], fats_per_100g=rng.uniform(0, 1e-4),
+                                    sodium_mg_per_100g=None, barcode_upc=f'99{i:011d}', catalog_version=version))
+        db.session.commit()
+
+    user = {'username': 'encoder', 'email': 'encoder@example.com', 'password': 'same-bytes',
+            'gender': 'M', 'age': 40, 'weight_kg': 80.0, 'height_cm': 180.0}
+    client.post('/api/register', json=user)
+    token = client.post('/api/login', json={'username': user['username'], 'password': user['password']}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/api/meals', headers=headers, json={'description': 'Cena à la carte 🍝', 'items': [
+        {'food_item_id': food_id, 'grams_consumed': grams} for food_id, grams in ((1, 150), (2, 33.3), (3, 1e-05))
+    ]})
+    user_id = client.get('/api/profile', headers=headers).get_json()['id']
+
+    with app.app_context():
+        start = datetime(2024, 1, 1)
+        for i in range(WORKOUTS):
+            segments = [
+                {'exercise_id': exercise_id, 'exercise_acronym': f'E{exercise_id}', 'exercise_name': f'Esercizio {exercise_id} ✓',
+                 'duration_min': rng.choice(AWKWARD_FLOATS + (rng.random() * 60,)), 'kcal_burned_segment': rng.random() * 400}
+                for exercise_id in (rng.randint(1, 5) for _ in range(rng.randint(0, 4)))
+            ]
+            db.session.add(GeneratedWorkout(
+                user_id=user_id,
+                # Alcune date uguali, per l'ordinamento su id; alcune senza microsecondi
+                generation_date=start + timedelta(hours=i // 2, microseconds=(i % 3) * 1234),
+                kcal_to_burn=rng.choice(AWKWARD_FLOATS) or 300.0,
+                estimated_total_time_min=sum(s['duration_min'] for s in segments),
+                segments=GeneratedWorkoutSegment.from_plan(segments)
+            ))
+        db.session.commit()
+    return headers
+
+def check_encoder():
+    """dumps contro app.json.dumps su valori generati a caso."""
+    rng = random.Random(7)
+    for _ in range(2000):
+        value = {
+            'float': rng.choice([rng.random(), rng.uniform(-1e-3, 1e-3), rng.uniform(-1e20, 1e20),
+                                 10 ** rng.uniform(-8, 18), float(rng.randint(0, 10 ** 6))]),
+            'text': ''.join(chr(rng.choice([rng.randint(0, 0x7f), rng.randint(0x80, 0xd7ff), rng.randint(0x10000, 0x1ffff)]))
+                            for _ in range(rng.randint(0, 8))),
+            'int': rng.randint(-2 ** 63, 2 ** 63 - 1),
+            'nested': [None, True, False, {'z': 1, 'a': [rng.random()]}]
+        }
+        if rng.random() < 0.1:
+            value['nested'][3]['a'].append(rng.choice(NON_FINITE_FLOATS))
+        _compare(f'dumps({value!r})', serializers.dumps(value), app.json.dumps(value, separators=(',', ':')).encode())
+
+def check_routes(headers):
+    client = app.test_client()
+    with app.app_context():
+        foods = FoodItem.query.order_by(FoodItem.id).all()
+        _compare('GET /api/fooditems/search', client.get('/api/fooditems/search').get_data(),
+                 _reference([item.to_dict() for item in FoodItem.query.limit(20).all()]))
+        for query in ('pizza', 'creme brulee', 'pate', 'té'):
+            response = client.get(f'/api/fooditems/search?q={query}')
+            found = [db.session.get(FoodItem, item['id']).to_dict() for item in response.get_json()]
+            _compare(f'GET /api/fooditems/search?q={query}', response.get_data(), _reference(found))
+
+        snapshot = gzip.decompress(client.get('/api/fooditems', headers={'Accept-Encoding': 'gzip'}).get_data())
+        _compare('GET /api/fooditems', snapshot, _reference([item.to_dict() for item in foods]))
+        page = client.get('/api/fooditems?limit=50&fields=name,kcal_per_100g')
+        _compare('GET /api/fooditems?limit=50', page.get_data(), _reference(page.get_json()))
+
+        user_id = client.get('/api/profile', headers=headers).get_json()['id'] # nei test ci sono anche altri utenti
+        workouts = GeneratedWorkout.query.filter_by(user_id=user_id).order_by(GeneratedWorkout.generation_date.desc(), GeneratedWorkout.id.desc()).all()
+        expected = [workout.to_dict() for workout in workouts]
+        _compare('GET /api/workouts/history', client.get('/api/workouts/history', headers=headers).get_data(), _reference(expected))
+        page = client.get('/api/workouts/history?limit=200', headers=headers)
+        _compare('GET /api/workouts/history?limit=200', page.get_data(),
+                 _reference({'workouts': expected[:200], 'next_cursor': page.get_json()['next_cursor']}))
+        stream = client.get('/api/workouts/history?format=ndjson', headers=headers).get_data()
+        _compare('GET /api/workouts/history?format=ndjson', stream, ''.join(json.dumps(row) + '\n' for row in expected).encode())
+
+        daily = client.get('/api/meals/daily', headers=headers)
+        _compare('GET /api/meals/daily', daily.get_data(), _reference(daily.get_json()))
+
+if __name__ == '__main__':
+    with app.app_context():
+        command.upgrade(AlembicConfig('alembic.ini'), 'head')
+    headers = seed()
+    encoders = ['orjson', 'json'] if serializers.orjson is not None else ['json']
+    for encoder in encoders:
+        if encoder == 'json':
+            serializers.orjson = None
+        check_encoder()
+        check_routes(headers)
+    if _failures:
+        print('\n'.join(_failures[:20]))
+        sys.exit(f'{len(_failures)} serializations differ from jsonify + to_dict.')
+    print(f"Serializers match jsonify + to_dict byte for byte ({', '.join(encoders)}). Same lies, delivered faster.")
@@ -0,0 +1,34 @@
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+
+READ_BIND = 'read' # chiave di SQLALCHEMY_BINDS per la replica di sola lettura
+
+class RoutingSession(Session):
+    """
+    Sessione di Flask-SQLAlchemy che, nelle route marcate con @read_only, manda
+    le query all'engine READ_BIND (se configurato) invece che al database principale.
+    Dentro app.maintenance_context() usa invece l'engine senza timeout dei job batch.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            engine = g.get('db_engine')
+            if engine is not None:
+                return engine
+        if bind is None and has_app_context() and g.get('db_read_only'):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def read_only(f):
+    """
+    Decoratore per le route che non scrivono: da qui in poi la richiesta legge dalla
+    replica. Va messo sotto @login_required, così l'autenticazione (revoche comprese)
+    resta sul database principale.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,170 @@
+"""
+Catalogo degli alimenti per /api/fooditems.
+
+- Snapshot: l'intero catalogo a una versione di catalog_version, costruito una
+  volta per versione (per worker) e tenuto in memoria solo compresso (gzip e, se
+  il modulo brotli è installato, brotli). Servito con ETag, quindi un client
+  aggiornato riceve un 304 vuoto.
+- Pagine e delta: pagine keyset (cursor) o numerate (page), con selezione dei
+  campi e ?since=<versione> per avere solo le righe scritte dopo quella versione.
+
+Ogni scrittura su FoodItem registra in catalog_version la versione che ha
+creato (bump_food_version). La versione viene letta prima delle righe e le righe
+sono filtrate con catalog_version <= versione: una scrittura che arriva a metà
+lettura finisce nel delta successivo invece di andare persa.
+"""
+import threading
+import zlib
+from flask import Response, request
+from sqlalchemy import select
+from app import app, db
+from models import FoodItem
+from catalog_cache import FoodRecord, current_food_version
+from backend.services.cursors import decode_cursor, encode_cursor
+from serializers import dumps
+
+try:
+    import brotli
+except ImportError: # opzionale (requirements-optional.txt): senza brotli si comprime solo con gzip
+    brotli = None
+
+FOOD_FIELDS = FoodRecord._fields # chiavi di FoodItem.to_dict
+SNAPSHOT_CHUNK = 64 * 1024 # byte per pezzo quando lo snapshot va decompresso al volo
+
+class InvalidFields(ValueError):
+    """?fields= contiene campi che FoodItem non ha."""
+
+def parse_fields(value):
+    """
+    Campi richiesti con ?fields=a,b (default: tutti), nell'ordine di to_dict. L'id
+    c'è sempre: serve ai client per applicare i delta.
+    """
+    if not value:
+        return FOOD_FIELDS
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested - set(FOOD_FIELDS)
+    if unknown or not requested:
+        raise InvalidFields(', '.join(sorted(unknown)))
+    return tuple(field for field in FOOD_FIELDS if field in requested or field == 'id')
+
+def food_page(fields, limit, since=None, cursor=None, page=None):
+    """
+    Una pagina del catalogo ordinata per id: {'catalog_version', 'items', 'next_cursor'}.
+    Il cursore fissa la versione della prima pagina, così tutte le pagine vengono
+    dalla stessa versione del catalogo. Solleva InvalidCursor.
+    """
+    if cursor:
+        version, after_id = decode_cursor(cursor, int, int)
+    else:
+        version, after_id = current_food_version(), None
+
+    columns = [getattr(FoodItem, field) for field in fields] # l'id è sempre il primo
+    query = select(*columns).where(FoodItem.catalog_version <= version)
+    if since is not None:
+        query = query.where(FoodItem.catalog_version > since)
+    if after_id is not None:
+        query = query.where(FoodItem.id > after_id)
+    elif page:
+        query = query.offset((page - 1) * limit)
+    rows = db.session.execute(query.order_by(FoodItem.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(version, rows[-1][0])
+    return {
+        'catalog_version': version,
+        'items': [dict(zip(fields, row)) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+class FoodCatalogSnapshot:
+    """Catalogo completo compresso, ricostruito quando cambia la versione di food_item."""
+    def __init__(self, chunk_size=10000):
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._snapshot = None # (versione, {encoding: byte compressi})
+        self.counters = {'builds': 0, 'not_modified': 0, 'served': 0}
+
+    def get(self, version):
+        """Restituisce {encoding: byte} dello snapshot alla versione `version`."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot[0] != version:
+                snapshot = self._snapshot = (version, self._build(version))
+                self.counters['builds'] += 1
+            return snapshot[1]
+
+    def _build(self, version):
+        # Stesso JSON di jsonify([item.to_dict() ...]), compresso man mano che viene scritto
+        compressors = {'gzip': zlib.compressobj(6, zlib.DEFLATED, 31)}
+        if brotli is not None:
+            compressors['br'] = brotli.Compressor(quality=5)
+        parts = {encoding: [] for encoding in compressors}
+
+        def write(data):
+            for encoding, compressor in compressors.items():
+                chunk = compressor.process(data) if encoding == 'br' else compressor.compress(data)
+                if chunk:
+                    parts[encoding].append(chunk)
+
+        columns = [getattr(FoodItem, field) for field in FOOD_FIELDS]
+        result = db.session.execute(
+            select(*columns).where(FoodItem.catalog_version <= version).order_by(FoodItem.id)
+            .execution_options(yield_per=self.chunk_size)
+        )
+        write(b'[')
+        separator = b''
+        for rows in result.partitions():
+            # Un dumps per blocco di righe: per riga costerebbe il doppio
+            items = dumps([dict(zip(FOOD_FIELDS, row)) for row in rows])
+            write(separator + items[1:-1])
+            separator = b','
+        write(b']\n')
+        for encoding, compressor in compressors.items():
+            parts[encoding].append(compressor.finish() if encoding == 'br' else compressor.flush())
+        return {encoding: b''.join(chunks) for encoding, chunks in parts.items()}
+
+    def response(self):
+        """Risposta per la richiesta corrente: 304, corpo compresso o JSON decompresso in streaming."""
+        version = current_food_version()
+        etag = f'food-{version}'
+        if request.if_none_match.contains_weak(etag):
+            # Il client ha già questa versione: non serve nemmeno costruire lo snapshot
+            self.counters['not_modified'] += 1
+            response = Response(status=304)
+        else:
+            bodies = self.get(version)
+            encoding = next((name for name in ('br', 'gzip') if name in bodies and request.accept_encodings[name]), None)
+            if encoding is None:
+                response = Response(_gunzip_chunks(bodies['gzip']), mimetype='application/json')
+            else:
+                response = Response(bodies[encoding], mimetype='application/json')
+                response.headers['Content-Encoding'] = encoding
+            self.counters['served'] += 1
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['X-Catalog-Version'] = str(version)
+        response.cache_control.no_cache = True
+        response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self):
+        snapshot = self._snapshot
+        return dict(
+            self.counters,
+            version=snapshot[0] if snapshot else None,
+            compressed_bytes={encoding: len(body) for encoding, body in snapshot[1].items()} if snapshot else {}
+        )
+
+def _gunzip_chunks(data):
+    decompressor = zlib.decompressobj(31)
+    for start in range(0, len(data), SNAPSHOT_CHUNK):
+        chunk = decompressor.decompress(data[start:start + SNAPSHOT_CHUNK])
+        if chunk:
+            yield chunk
+    yield decompressor.flush()
+
+food_snapshot = FoodCatalogSnapshot(app.config['FOOD_SNAPSHOT_QUERY_CHUNK'])
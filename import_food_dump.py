@@ -0,0 +1,169 @@
+"""
+Import massivo di un dump di Open Food Facts (CSV/TSV o JSONL, anche .gz) nella
+tabella FoodItem. Il dump, anche di diversi GB, viene letto in streaming da
+backend.services.off_dump e scritto a blocchi di FOOD_IMPORT_BATCH_SIZE prodotti:
+un INSERT ... ON CONFLICT (barcode_upc) DO UPDATE eseguito in executemany, una
+transazione per blocco. La memoria usata dipende solo dalla dimensione del blocco.
+
+Un barcode già presente aggiorna nutrienti, categoria e immagine ma non il nome
+(potrebbe essere stato corretto a mano); un nome già usato da un altro alimento
+diventa "nome (barcode)", come in barcode_resolver. Ogni blocco incrementa la
+versione del catalogo e la scrive sulle sue righe: i worker e i client che
+sincronizzano con /api/fooditems?since= vedono l'import man mano che procede.
+
+Uso: python import_food_dump.py DUMP [--format csv|jsonl] [--batch-size N]
+"""
+import argparse
+import os
+import sys
+import time
+from itertools import islice
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from app import app, db, maintenance_context
+from models import FoodItem
+from catalog_cache import bump_food_version
+from backend.services.off_dump import dump_format, food_fields, open_dump, read_products
+
+DIALECT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+# Colonne riscritte quando il barcode esiste già (il nome resta quello salvato)
+UPDATED_COLUMNS = (
+    'category', 'kcal_per_100g', 'carbs_per_100g', 'proteins_per_100g', 'fats_per_100g',
+    'sugars_per_100g', 'fiber_per_100g', 'sodium_mg_per_100g', 'image_url', 'catalog_version'
+)
+LOOKUP_CHUNK = 500 # valori per IN (...), sotto il limite di parametri di SQLite
+NAME_MAX_LENGTH = 128
+
+def _chunks(values, size):
+    values = iter(values)
+    while chunk := list(islice(values, size)):
+        yield chunk
+
+def _existing(column, values):
+    """Valori di `column` già presenti tra `values`, con IN a blocchi."""
+    found = set()
+    for chunk in _chunks(values, LOOKUP_CHUNK):
+        found.update(db.session.execute(select(column).where(column.in_(chunk))).scalars())
+    return found
+
+def _stored_names(barcodes):
+    """{barcode: nome} degli alimenti già presenti tra `barcodes`."""
+    names = {}
+    for chunk in _chunks(barcodes, LOOKUP_CHUNK):
+        names.update(db.session.execute(
+            select(FoodItem.barcode_upc, FoodItem.name).where(FoodItem.barcode_upc.in_(chunk))
+        ).all())
+    return names
+
+def _unique_name(name, barcode):
+    return f"{name[:NAME_MAX_LENGTH - len(barcode) - 3]} ({barcode})"
+
+def upsert_statement():
+    dialect = db.engine.dialect.name
+    if dialect not in DIALECT_INSERTS:
+        sys.exit(f'Upserts are not supported on {dialect}. Use SQLite or PostgreSQL.')
+    stmt = DIALECT_INSERTS[dialect](FoodItem.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=[FoodItem.barcode_upc],
+        set_={column: stmt.excluded[column] for column in UPDATED_COLUMNS}
+    )
+
+def import_batch(stmt, batch):
+    """
+    Scrive un blocco {barcode: campi} in una transazione.
+    Restituisce (inseriti, aggiornati, scartati).
+    """
+    version = bump_food_version()
+    existing = _stored_names(batch)
+    new_names = {fields['name'] for barcode, fields in batch.items() if barcode not in existing}
+    taken = _existing(FoodItem.name, new_names)
+    rows = []
+    for barcode, fields in batch.items():
+        if barcode in existing:
+            # Il nome non cambia: riscriverlo potrebbe scontrarsi con un altro alimento
+            fields['name'] = existing[barcode]
+        else:
+            if fields['name'] in taken:
+                fields['name'] = _unique_name(fields['name'], barcode)
+            taken.add(fields['name'])
+        fields['catalog_version'] = version
+        rows.append(fields)
+
+    try:
+        db.session.execute(stmt, rows)
+        db.session.commit()
+        return len(rows) - len(existing), len(existing), 0
+    except IntegrityError:
+        # Conflitto imprevisto (un altro processo sta scrivendo): riga per riga
+        db.session.rollback()
+
+    inserted = updated = skipped = 0
+    version = bump_food_version() # il rollback ha annullato anche l'incremento
+    for fields in rows:
+        fields['catalog_version'] = version
+        try:
+            with db.session.begin_nested():
+                db.session.execute(stmt, fields)
+        except IntegrityError:
+            skipped += 1
+        else:
+            if fields['barcode_upc'] in existing:
+                updated += 1
+            else:
+                inserted += 1
+    db.session.commit()
+    return inserted, updated, skipped
+
+def run(path, fmt=None, batch_size=None, out=sys.stderr):
+    """Importa il dump `path`; restituisce il dizionario dei contatori."""
+    batch_size = batch_size or app.config['FOOD_IMPORT_BATCH_SIZE']
+    total_bytes = os.path.getsize(path)
+    counters = {'read': 0, 'inserted': 0, 'updated': 0, 'skipped': 0}
+    stmt = upsert_statement()
+    started = time.monotonic()
+    raw, text = open_dump(path)
+
+    def report():
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(
+            f"{counters['read']:,} products read ({raw.tell() / max(total_bytes, 1):.1%} of the dump, "
+            f"{counters['read'] / elapsed:,.0f}/s): {counters['inserted']:,} inserted, "
+            f"{counters['updated']:,} updated, {counters['skipped']:,} skipped",
+            file=out, flush=True
+        )
+
+    def flush(batch):
+        for key, value in zip(('inserted', 'updated', 'skipped'), import_batch(stmt, batch)):
+            counters[key] += value
+
+    with raw, text:
+        batch = {}
+        for barcode, fields in food_fields(read_products(text, fmt or dump_format(path))):
+            counters['read'] += 1
+            if fields is None:
+                counters['skipped'] += 1
+                continue
+            # Un barcode ripetuto nel blocco: vince l'ultima riga, come farebbe il dump
+            if barcode in batch:
+                counters['skipped'] += 1
+            batch[barcode] = fields
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = {}
+                report()
+        if batch:
+            flush(batch)
+            report()
+    return counters
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import an Open Food Facts dump into the food catalog.')
+    parser.add_argument('dump', help='CSV/TSV or JSONL dump, optionally gzipped')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='Dump format (default: from the file extension)')
+    parser.add_argument('--batch-size', type=int, help='Products per transaction (default: FOOD_IMPORT_BATCH_SIZE)')
+    args = parser.parse_args()
+    with maintenance_context(): # senza il timeout sugli statement delle richieste web
+        counters = run(args.dump, args.format, args.batch_size)
+    print(f"Imported {counters['inserted']:,} new foods and updated {counters['updated']:,}. "
+          f"More ways to ruin your diet.")
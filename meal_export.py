@@ -0,0 +1,65 @@
+"""
+Export completo del diario dei pasti di un utente, in streaming: una sola query
+con join (pasto, riga, nome dell'alimento) letta da un cursore lato server a
+blocchi di MEAL_EXPORT_STREAM_CHUNK righe. Niente oggetti ORM e niente lazy
+load, quindi la memoria resta costante anche con anni di pasti.
+"""
+import csv
+import io
+from sqlalchemy import select
+from app import app, db
+from models import FoodItem, Meal, MealItem
+
+CSV_COLUMNS = (
+    'meal_id', 'meal_time', 'description', 'item_id', 'food_item_id', 'food_item_name',
+    'grams_consumed', 'kcal_total_item', 'carbs_item', 'proteins_item', 'fats_item'
+)
+# Chiavi delle righe in NDJSON: quelle di MealItem.to_dict più il nome dell'alimento
+ITEM_KEYS = ('id',) + CSV_COLUMNS[4:]
+CSV_FLUSH_BYTES = 64 * 1024 # byte accumulati prima di spedire un pezzo della risposta
+
+def export_rows(user_id, date_from=None, date_to=None):
+    """Tuple CSV_COLUMNS in ordine di pasto; i pasti senza righe hanno le colonne della riga a None."""
+    query = select(
+        Meal.id, Meal.meal_time, Meal.description, MealItem.id, MealItem.food_item_id, FoodItem.name,
+        MealItem.grams_consumed, MealItem.kcal_total_item, MealItem.carbs_item, MealItem.proteins_item, MealItem.fats_item
+    ).outerjoin(
+        MealItem, MealItem.meal_id == Meal.id
+    ).outerjoin(
+        FoodItem, FoodItem.id == MealItem.food_item_id
+    ).where(Meal.user_id == user_id)
+    if date_from:
+        query = query.where(Meal.meal_time >= date_from)
+    if date_to:
+        query = query.where(Meal.meal_time <= date_to)
+    query = query.order_by(Meal.meal_time, Meal.id, MealItem.id).execution_options(
+        yield_per=app.config['MEAL_EXPORT_STREAM_CHUNK']
+    )
+    for row in db.session.execute(query):
+        yield tuple(row)
+
+def csv_chunks(rows):
+    """Il CSV (intestazione compresa) a pezzi di circa CSV_FLUSH_BYTES."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow((row[0], row[1].isoformat()) + row[2:])
+        if buffer.tell() >= CSV_FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def meal_documents(rows):
+    """Un dizionario per pasto, con le sue righe: le righe dello stesso pasto sono consecutive."""
+    meal = None
+    for meal_id, meal_time, description, item_id, *item in rows:
+        if meal is None or meal['id'] != meal_id:
+            if meal is not None:
+                yield meal
+            meal = {'id': meal_id, 'meal_time': meal_time.isoformat(), 'description': description, 'items': []}
+        if item_id is not None:
+            meal['items'].append(dict(zip(ITEM_KEYS, [item_id] + item)))
+    if meal is not None:
+        yield meal
@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from app import db
+from models import Meal, MealItem
+from catalog_cache import catalog_cache
+from query_budget import allow_statements
+from backend.services.utility import compute_meal_item_rows
+
+class MealValidationError(Exception):
+    """Payload di un pasto non valido: il messaggio finisce direttamente nella risposta."""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def parse_meal(data):
+    """Valida un singolo pasto e restituisce (descrizione, meal_time, [(food_item_id, grammi), ...])."""
+    if not isinstance(data, dict):
+        raise MealValidationError('Invalid meal payload. Check your inputs!')
+    description = data.get('description', 'Pasto non specificato')
+    items_data = data.get('items', [])
+    if description is not None and not isinstance(description, str):
+        raise MealValidationError('Invalid meal description. Words, please!')
+
+    if not items_data:
+        raise MealValidationError('No food items provided for the meal. Are you fasting or just forgetting?')
+
+    meal_time = None
+    if data.get('meal_time'):
+        try:
+            meal_time = datetime.fromisoformat(data['meal_time'])
+        except (TypeError, ValueError):
+            raise MealValidationError('Invalid meal_time. Use ISO 8601, time traveler!')
+        if meal_time.tzinfo is not None: # nel database le date sono in UTC senza fuso, come utcnow
+            meal_time = meal_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+    items = []
+    for item_data in items_data:
+        food_item_id = item_data.get('food_item_id') if isinstance(item_data, dict) else None
+        grams_consumed = item_data.get('grams_consumed') if isinstance(item_data, dict) else None
+        # Gli id vanno in un set e in una query IN: solo interi veri (niente "1", liste o True)
+        if (not isinstance(food_item_id, int) or isinstance(food_item_id, bool) or food_item_id <= 0
+                or not isinstance(grams_consumed, (int, float)) or isinstance(grams_consumed, bool)
+                or grams_consumed <= 0):
+            raise MealValidationError('Invalid food item details in meal. Check your inputs!')
+        items.append((food_item_id, grams_consumed))
+    return description, meal_time, items
+
+def load_food_items(food_item_ids):
+    """Legge i FoodItem richiesti dalla cache del catalogo (al più una query); errore 404 se ne manca uno."""
+    foods_by_id = catalog_cache.food_items(food_item_ids)
+    for food_item_id in food_item_ids:
+        if food_item_id not in foods_by_id:
+            raise MealValidationError(f'Food item with ID {food_item_id} not found. Is it from another dimension?', 404)
+    return foods_by_id
+
+def _meal_item_dict(item_id, row, foods_by_id):
+    """MealItem.to_dict(include_food_item=True) di una riga appena inserita."""
+    return {
+        'id': item_id,
+        'meal_id': row['meal_id'],
+        'food_item_id': row['food_item_id'],
+        'grams_consumed': float(row['grams_consumed']), # colonna Float: 150 torna come 150.0
+        'kcal_total_item': row['kcal_total_item'],
+        'carbs_item': row['carbs_item'],
+        'proteins_item': row['proteins_item'],
+        'fats_item': row['fats_item'],
+        'food_item_details': foods_by_id[row['food_item_id']].to_dict()
+    }
+
+def log_meals(user_id, meals_data):
+    """
+    Registra uno o più pasti in un'unica transazione.
+    Tutto il payload viene validato prima di toccare il database, quindi non
+    servono rollback parziali. Restituisce [(pasto, kcal_totali), ...], con il pasto
+    nella forma di Meal.to_dict(include_items=True) costruita dalle righe inserite:
+    dopo il commit non si rilegge nulla.
+    """
+    parsed = [parse_meal(data) for data in meals_data]
+    foods_by_id = load_food_items([food_item_id for _, _, items in parsed for food_item_id, _ in items])
+    computed = [compute_meal_item_rows(items, foods_by_id) for _, _, items in parsed]
+
+    # sort_by_parameter_order: gli id tornano nell'ordine dei pasti. PostgreSQL resta
+    # un solo INSERT multi-riga; SQLite non lo garantisce e SQLAlchemy fa un INSERT per pasto
+    now = datetime.utcnow()
+    meal_rows = [
+        {'user_id': user_id, 'description': description, 'meal_time': meal_time or now}
+        for description, meal_time, _ in parsed
+    ]
+    allow_statements(len(meal_rows) - 1)
+    meal_ids = db.session.execute(
+        insert(Meal).returning(Meal.id, sort_by_parameter_order=True), meal_rows
+    ).scalars().all()
+
+    item_rows = []
+    for meal_id, (rows, _) in zip(meal_ids, computed):
+        for row in rows:
+            row['meal_id'] = meal_id
+            item_rows.append(row)
+    # Un solo INSERT multi-riga senza contare sull'ordine di RETURNING: ogni id torna con
+    # (pasto, alimento, grammi), che determinano tutto il resto della riga. Due righe con
+    # la stessa chiave sono identiche, quindi non importa quale id va a quale
+    inserted = db.session.execute(
+        insert(MealItem).returning(MealItem.id, MealItem.meal_id, MealItem.food_item_id, MealItem.grams_consumed),
+        item_rows
+    ).all()
+    db.session.commit()
+
+    ids_by_key = defaultdict(list)
+    for item_id, meal_id, food_item_id, grams_consumed in sorted(inserted, reverse=True):
+        ids_by_key[meal_id, food_item_id, float(grams_consumed)].append(item_id)
+    items_by_meal = {meal_id: [] for meal_id in meal_ids}
+    for row in item_rows:
+        item_id = ids_by_key[row['meal_id'], row['food_item_id'], float(row['grams_consumed'])].pop()
+        items_by_meal[row['meal_id']].append(_meal_item_dict(item_id, row, foods_by_id))
+    return [
+        ({
+            'id': meal_id,
+            'user_id': user_id,
+            'meal_time': meal_row['meal_time'].isoformat(),
+            'description': meal_row['description'],
+            'items': items_by_meal[meal_id]
+        }, total_kcal)
+        for meal_id, meal_row, (_, total_kcal) in zip(meal_ids, meal_rows, computed)
+    ]
@@ -0,0 +1,224 @@
+"""
+Strumentazione delle richieste: istogrammi di latenza per route, numero di
+statement SQL e tempo passato nel database per richiesta, durata delle chiamate
+a Open Food Facts e dei rendering PDF. Tutto esposto in formato testo di
+Prometheus da /metrics (vedi routes.py).
+
+I valori sono per processo, come quelli di /api/stats: con più worker ogni
+scrape vede solo il worker che risponde.
+
+Con PROFILE_SAMPLE_RATE > 0 una frazione delle richieste gira sotto cProfile e,
+se supera PROFILE_SLOW_REQUEST_MS, le statistiche finiscono in PROFILE_DIR
+(leggibili con `python -m pstats file.prof` o snakeviz).
+"""
+import cProfile
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+from query_budget import statements_in_request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {} # tupla dei valori delle label -> dato della metrica
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            lines.extend(self._samples(list(zip(self.labelnames, labelvalues)), value))
+        return lines
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def _samples(self, labels, value):
+        return [f'{self.name}_total{_format_labels(labels)} {_format_value(value)}']
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def _samples(self, labels, state):
+        counts, total, count = state
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            samples.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+        samples.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+        samples.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return samples
+
+REQUESTS = Counter('http_requests', 'HTTP requests by route and status.', ('method', 'route', 'status'))
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time spent in the view, per route.', ('method', 'route'))
+REQUEST_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request.', ('method', 'route'), STATEMENT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram('http_request_db_seconds', 'Time spent in SQL statements per request.', ('method', 'route'))
+OPEN_FOOD_FACTS_SECONDS = Histogram(
+    'openfoodfacts_request_duration_seconds', 'Product lookups on Open Food Facts.', ('outcome',)
+)
+PDF_RENDER_SECONDS = Histogram(
+    'pdf_render_duration_seconds', 'Workout report renders (zip, combined_report: one report in the process pool).', ('kind',)
+)
+PROFILES = Counter('slow_request_profiles', 'cProfile dumps written for slow requests.', ('route',))
+ALL_METRICS = (
+    REQUESTS, REQUEST_SECONDS, REQUEST_STATEMENTS, REQUEST_DB_SECONDS,
+    OPEN_FOOD_FACTS_SECONDS, PDF_RENDER_SECONDS, PROFILES
+)
+
+# --- TEMPO NEL DATABASE ---
+# Il numero di statement è già contato da query_budget: qui si misura solo il tempo
+@event.listens_for(Engine, 'before_cursor_execute')
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is not None and has_request_context():
+        g.db_seconds = g.get('db_seconds', 0.0) + time.perf_counter() - started
+
+@contextmanager
+def timed_fetch():
+    """Misura una chiamata a Open Food Facts; l'esito lo imposta il chiamante in outcome[0]."""
+    outcome = ['error']
+    started = time.perf_counter()
+    try:
+        yield outcome
+    finally:
+        OPEN_FOOD_FACTS_SECONDS.observe(time.perf_counter() - started, outcome[0])
+
+# --- HOOK DELLE RICHIESTE ---
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError: # c'è già un altro profiler attivo in questo processo
+            return
+        g.profiler = profiler
+
+@app.after_request
+def _finish_request(response):
+    if 'metrics_started' not in g:
+        return response
+    # Per le risposte in streaming misura la view, non l'invio del corpo
+    elapsed = time.perf_counter() - g.metrics_started
+    method, route = request.method, _route()
+    REQUESTS.inc(method, route, str(response.status_code))
+    REQUEST_SECONDS.observe(elapsed, method, route)
+    REQUEST_STATEMENTS.observe(statements_in_request(), method, route)
+    REQUEST_DB_SECONDS.observe(g.get('db_seconds', 0.0), method, route)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        if elapsed * 1000 >= app.config['PROFILE_SLOW_REQUEST_MS']:
+            try:
+                _dump_profile(profiler, method, route, elapsed)
+            except OSError as e: # il profilo è un extra: la risposta parte comunque
+                app.logger.error('Could not write the profile of %s %s: %s', method, route, e)
+    return response
+
+@app.teardown_request
+def _stop_profiler(exc):
+    # Eccezione non gestita: after_request non è stato chiamato
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+def _dump_profile(profiler, method, route, elapsed):
+    directory = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    slug = ''.join(ch if ch.isalnum() else '_' for ch in route).strip('_') or 'root'
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    path = os.path.join(directory, f'{stamp}-{method}-{slug}-{elapsed * 1000:.0f}ms.prof')
+    profiler.dump_stats(path)
+    PROFILES.inc(route)
+    app.logger.warning('%s %s took %.0f ms, profile written to %s', method, route, elapsed * 1000, path)
+
+# --- ESPOSIZIONE ---
+def _stat_samples(stats):
+    """Contatori numerici di /api/stats come gauge app_stat{component, stat}."""
+    lines = ['# HELP app_stat In-process cache and auth counters, as in /api/stats.', '# TYPE app_stat gauge']
+    for component, values in sorted(stats.items()):
+        for stat, value in sorted(values.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"app_stat{_format_labels([('component', component), ('stat', stat)])} {_format_value(value)}")
+    return lines
+
+def render_metrics(stats=None):
+    """Tutte le metriche nel formato testo di Prometheus (versione 0.0.4)."""
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    if stats:
+        lines.extend(_stat_samples(stats))
+    return '\n'.join(lines) + '\n'
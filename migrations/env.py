@@ -0,0 +1,44 @@
+from logging.config import fileConfig
+from alembic import context
+from app import app, db, maintenance_engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = db.metadata
+
+def run_migrations_offline():
+    """Genera lo SQL senza connettersi al database (alembic upgrade --sql)."""
+    context.configure(
+        url=app.config['SQLALCHEMY_DATABASE_URI'],
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Una connessione passata da chi chiama (config.attributes, es. i test delle migrazioni)
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    # Stesso URL dell'app, ma senza il timeout sugli statement: una migrazione può durare
+    connectable = maintenance_engine()
+    try:
+        with connectable.connect() as connection:
+            # render_as_batch: SQLite non supporta ALTER TABLE completi
+            context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        connectable.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
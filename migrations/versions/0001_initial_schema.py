@@ -0,0 +1,95 @@
+"""Schema iniziale (quello creato finora da db.create_all())
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # I database creati con db.create_all() hanno già queste tabelle: le saltiamo
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(64), nullable=False, unique=True),
+            sa.Column('email', sa.String(120), nullable=False, unique=True),
+            sa.Column('password_hash', sa.String(128), nullable=False),
+            sa.Column('gender', sa.String(10), nullable=False),
+            sa.Column('age', sa.Integer(), nullable=False),
+            sa.Column('weight_kg', sa.Float(), nullable=False),
+            sa.Column('height_cm', sa.Float(), nullable=False),
+            sa.Column('registration_date', sa.DateTime()),
+            sa.Column('profile_picture_url', sa.String(256)),
+        )
+    if 'food_item' not in existing:
+        op.create_table(
+            'food_item',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(128), nullable=False, unique=True),
+            sa.Column('category', sa.String(64)),
+            sa.Column('kcal_per_100g', sa.Float(), nullable=False),
+            sa.Column('carbs_per_100g', sa.Float(), nullable=False),
+            sa.Column('proteins_per_100g', sa.Float(), nullable=False),
+            sa.Column('fats_per_100g', sa.Float(), nullable=False),
+            sa.Column('sugars_per_100g', sa.Float()),
+            sa.Column('fiber_per_100g', sa.Float()),
+            sa.Column('sodium_mg_per_100g', sa.Float()),
+            sa.Column('image_url', sa.String(256)),
+            sa.Column('barcode_upc', sa.String(64)),
+        )
+        op.create_index('ix_food_item_barcode_upc', 'food_item', ['barcode_upc'], unique=True)
+    if 'exercise' not in existing:
+        op.create_table(
+            'exercise',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(64), nullable=False, unique=True),
+            sa.Column('acronym', sa.String(10), nullable=False, unique=True),
+            sa.Column('kcal_per_kg_per_min', sa.Float(), nullable=False),
+            sa.Column('description', sa.Text()),
+        )
+    if 'meal' not in existing:
+        op.create_table(
+            'meal',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+            sa.Column('meal_time', sa.DateTime()),
+            sa.Column('description', sa.String(128)),
+        )
+    if 'meal_item' not in existing:
+        op.create_table(
+            'meal_item',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('meal_id', sa.Integer(), sa.ForeignKey('meal.id'), nullable=False),
+            sa.Column('food_item_id', sa.Integer(), sa.ForeignKey('food_item.id'), nullable=False),
+            sa.Column('grams_consumed', sa.Float(), nullable=False),
+            sa.Column('kcal_total_item', sa.Float(), nullable=False),
+            sa.Column('carbs_item', sa.Float(), nullable=False),
+            sa.Column('proteins_item', sa.Float(), nullable=False),
+            sa.Column('fats_item', sa.Float(), nullable=False),
+        )
+    if 'generated_workout' not in existing:
+        op.create_table(
+            'generated_workout',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+            sa.Column('generation_date', sa.DateTime()),
+            sa.Column('kcal_to_burn', sa.Float(), nullable=False),
+            sa.Column('estimated_total_time_min', sa.Float(), nullable=False),
+            sa.Column('workout_details_json', sa.Text(), nullable=False),
+        )
+
+
+def downgrade():
+    for table in ('generated_workout', 'meal_item', 'meal', 'exercise', 'food_item', 'user'):
+        op.drop_table(table)
@@ -0,0 +1,115 @@
+"""Segmenti dei workout come righe di generated_workout_segment invece del blob JSON
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 1000
+
+workouts = sa.table(
+    'generated_workout',
+    sa.column('id', sa.Integer),
+    sa.column('workout_details_json', sa.Text),
+)
+exercises = sa.table(
+    'exercise',
+    sa.column('id', sa.Integer),
+    sa.column('acronym', sa.String),
+    sa.column('name', sa.String),
+)
+segments = sa.table(
+    'generated_workout_segment',
+    sa.column('workout_id', sa.Integer),
+    sa.column('position', sa.Integer),
+    sa.column('exercise_id', sa.Integer),
+    sa.column('exercise_acronym', sa.String),
+    sa.column('exercise_name', sa.String),
+    sa.column('duration_min', sa.Float),
+    sa.column('kcal_burned_segment', sa.Float),
+)
+
+
+def upgrade():
+    op.create_table(
+        'generated_workout_segment',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('workout_id', sa.Integer(), sa.ForeignKey('generated_workout.id'), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        # NULL se l'esercizio non esiste più: nome e acronimo restano nella copia
+        sa.Column('exercise_id', sa.Integer(), sa.ForeignKey('exercise.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('exercise_acronym', sa.String(10), nullable=True),
+        sa.Column('exercise_name', sa.String(64), nullable=True),
+        sa.Column('duration_min', sa.Float(), nullable=False),
+        sa.Column('kcal_burned_segment', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_generated_workout_segment_workout_id', 'generated_workout_segment', ['workout_id'])
+
+    # Backfill a blocchi (keyset sull'id) per non caricare tutti i blob in memoria.
+    # Nome e acronimo vengono dal blob (com'erano alla generazione), non dal catalogo
+    # di oggi; gli esercizi cancellati perdono solo l'id, che violerebbe la FK
+    conn = op.get_bind()
+    names = {row.id: (row.acronym, row.name) for row in conn.execute(sa.select(exercises))}
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(workouts.c.id, workouts.c.workout_details_json)
+            .where(workouts.c.id > last_id)
+            .order_by(workouts.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        batch = []
+        for workout_id, details_json in rows:
+            for position, item in enumerate(json.loads(details_json or '[]')):
+                exercise_id = item.get('exercise_id')
+                acronym, name = names.get(exercise_id, (None, None))
+                batch.append({
+                    'workout_id': workout_id,
+                    'position': position,
+                    'exercise_id': exercise_id if exercise_id in names else None,
+                    'exercise_acronym': item.get('exercise_acronym') or acronym,
+                    'exercise_name': item.get('exercise_name') or name,
+                    'duration_min': item['duration_min'],
+                    'kcal_burned_segment': item['kcal_burned_segment'],
+                })
+        if batch:
+            conn.execute(segments.insert(), batch)
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('generated_workout') as batch_op:
+        batch_op.drop_column('workout_details_json')
+
+
+def downgrade():
+    with op.batch_alter_table('generated_workout') as batch_op:
+        batch_op.add_column(sa.Column('workout_details_json', sa.Text(), nullable=False, server_default='[]'))
+
+    conn = op.get_bind()
+    details = {}
+    rows = conn.execute(sa.select(segments).order_by(segments.c.workout_id, segments.c.position))
+    for row in rows:
+        details.setdefault(row.workout_id, []).append({
+            'exercise_id': row.exercise_id,
+            'exercise_acronym': row.exercise_acronym,
+            'exercise_name': row.exercise_name,
+            'duration_min': row.duration_min,
+            'kcal_burned_segment': row.kcal_burned_segment,
+        })
+    for workout_id, items in details.items():
+        conn.execute(
+            workouts.update().where(workouts.c.id == workout_id).values(workout_details_json=json.dumps(items))
+        )
+
+    op.drop_index('ix_generated_workout_segment_workout_id', 'generated_workout_segment')
+    op.drop_table('generated_workout_segment')
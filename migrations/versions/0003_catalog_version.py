@@ -0,0 +1,30 @@
+"""Tabella catalog_version per invalidare le cache dei cataloghi tra i worker
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_version = op.create_table(
+        'catalog_version',
+        sa.Column('name', sa.String(32), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+    )
+    op.bulk_insert(catalog_version, [
+        {'name': 'exercise', 'version': 1},
+        {'name': 'food_item', 'version': 1},
+    ])
+
+
+def downgrade():
+    op.drop_table('catalog_version')
@@ -0,0 +1,32 @@
+"""token_version sugli utenti per revocare i JWT, versione 'user' per le cache di auth
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 13:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+catalog_version = sa.table(
+    'catalog_version',
+    sa.column('name', sa.String),
+    sa.column('version', sa.Integer),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+    op.bulk_insert(catalog_version, [{'name': 'user', 'version': 1}])
+
+
+def downgrade():
+    op.execute(catalog_version.delete().where(catalog_version.c.name == 'user'))
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('token_version')
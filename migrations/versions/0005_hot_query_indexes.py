@@ -0,0 +1,31 @@
+"""Indici per le query calde: pasti del giorno, righe dei pasti, storico dei workout
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00
+"""
+from alembic import op
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# (nome, tabella, colonne): gli stessi dichiarati in models.py
+INDEXES = [
+    ('ix_meal_user_id_meal_time', 'meal', ['user_id', 'meal_time']),
+    ('ix_meal_item_meal_id', 'meal_item', ['meal_id']),
+    ('ix_meal_item_food_item_id', 'meal_item', ['food_item_id']),
+    ('ix_generated_workout_user_id_generation_date', 'generated_workout', ['user_id', 'generation_date']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
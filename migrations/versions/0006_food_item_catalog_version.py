@@ -0,0 +1,27 @@
+"""catalog_version sugli alimenti: versione del catalogo in cui ogni riga è stata scritta
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Le righe esistenti fanno parte della prima versione del catalogo
+    with op.batch_alter_table('food_item') as batch_op:
+        batch_op.add_column(sa.Column('catalog_version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_index('ix_food_item_catalog_version', ['catalog_version'])
+
+
+def downgrade():
+    with op.batch_alter_table('food_item') as batch_op:
+        batch_op.drop_index('ix_food_item_catalog_version')
+        batch_op.drop_column('catalog_version')
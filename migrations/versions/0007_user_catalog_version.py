@@ -0,0 +1,27 @@
+"""catalog_version sugli utenti: versione di 'user' dell'ultima modifica di ogni utente
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 21:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Gli utenti esistenti fanno parte della prima versione: nessuna cache li ha ancora
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('catalog_version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_index('ix_user_catalog_version', ['catalog_version'])
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_index('ix_user_catalog_version')
+        batch_op.drop_column('catalog_version')
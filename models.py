@@ -1,7 +1,13 @@
-from app import db
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.orm import joinedload, selectinload, subqueryload
 from werkzeug.security import generate_password_hash, check_password_hash
-import json
+from db_routing import RoutingSession
+
+# Definito qui e non in app.py (che lo lega all'app con init_app): il backend FastAPI
+# importa questi stessi modelli (backend/models.py) senza creare l'app Flask
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -15,12 +21,17 @@ class User(db.Model):
     registration_date = db.Column(db.DateTime, default=datetime.utcnow)
     # Nuovo campo per la foto profilo
     profile_picture_url = db.Column(db.String(256), nullable=True, default='https://via.placeholder.com/150/0000FF/FFFFFF?text=User')
+    # Incrementata al logout: i JWT emessi con una versione precedente non valgono più
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Versione di catalog_version 'user' dell'ultima modifica (vedi auth.invalidate_user):
+    # i worker tolgono dalla cache solo i principal degli utenti cambiati
+    catalog_version = db.Column(db.Integer, nullable=False, default=1, server_default='1', index=True)
 
     meals = db.relationship('Meal', backref='user', lazy=True)
     generated_workouts = db.relationship('GeneratedWorkout', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -56,6 +67,9 @@ class FoodItem(db.Model):
     sodium_mg_per_100g = db.Column(db.Float, default=0.0)
     image_url = db.Column(db.String(256))
     barcode_upc = db.Column(db.String(64), unique=True, nullable=True, index=True)
+    # Versione di catalog_version 'food_item' dell'ultima scrittura (vedi bump_food_version):
+    # /api/fooditems?since= restituisce le righe più nuove della versione del client
+    catalog_version = db.Column(db.Integer, nullable=False, default=1, server_default='1', index=True)
 
     def to_dict(self):
         return {
@@ -82,7 +96,25 @@ class Meal(db.Model):
     meal_time = db.Column(db.DateTime, default=datetime.utcnow)
     description = db.Column(db.String(128))
 
-    meal_items = db.relationship('MealItem', backref='meal', lazy=True)
+    # /api/meals/daily: filtro per utente e intervallo su meal_time, già in ordine
+    __table_args__ = (db.Index('ix_meal_user_id_meal_time', 'user_id', 'meal_time'),)
+
+    meal_items = db.relationship('MealItem', backref='meal', lazy=True, order_by='MealItem.id')
+
+    @classmethod
+    def items_loader(cls, strategy='selectin'):
+        """
+        Opzioni di caricamento di meal_items e dei relativi food_item, da passare a
+        .options() prima di chiamare to_dict(include_items=True) su più pasti.
+        Strategie: 'selectin' (default), 'joined', 'subquery' oppure 'lazy' (N+1).
+        """
+        if strategy == 'joined':
+            return [joinedload(cls.meal_items).joinedload(MealItem.food_item)]
+        if strategy == 'subquery':
+            return [subqueryload(cls.meal_items).joinedload(MealItem.food_item)]
+        if strategy == 'lazy':
+            return []
+        return [selectinload(cls.meal_items).selectinload(MealItem.food_item)]
 
     def to_dict(self, include_items=False):
         data = {
@@ -100,8 +132,8 @@ class Meal(db.Model):
 
 class MealItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), nullable=False)
-    food_item_id = db.Column(db.Integer, db.ForeignKey('food_item.id'), nullable=False)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), nullable=False, index=True)
+    food_item_id = db.Column(db.Integer, db.ForeignKey('food_item.id'), nullable=False, index=True)
     grams_consumed = db.Column(db.Float, nullable=False)
     
     kcal_total_item = db.Column(db.Float, nullable=False)
@@ -154,7 +186,13 @@ class GeneratedWorkout(db.Model):
     generation_date = db.Column(db.DateTime, default=datetime.utcnow)
     kcal_to_burn = db.Column(db.Float, nullable=False)
     estimated_total_time_min = db.Column(db.Float, nullable=False)
-    workout_details_json = db.Column(db.Text, nullable=False)
+
+    # Storico, statistiche ed export: filtro per utente e intervallo su generation_date
+    __table_args__ = (db.Index('ix_generated_workout_user_id_generation_date', 'user_id', 'generation_date'),)
+
+    # I segmenti sono righe vere (non più un blob JSON): si possono aggregare in SQL
+    segments = db.relationship('GeneratedWorkoutSegment', backref='workout', lazy='selectin',
+                               order_by='GeneratedWorkoutSegment.position', cascade='all, delete-orphan')
 
     def to_dict(self):
         return {
@@ -163,8 +201,63 @@ class GeneratedWorkout(db.Model):
             'generation_date': self.generation_date.isoformat(),
             'kcal_to_burn': self.kcal_to_burn,
             'estimated_total_time_min': self.estimated_total_time_min,
-            'workout_details': json.loads(self.workout_details_json)
+            'workout_details': [segment.to_dict() for segment in self.segments]
+        }
+
+    def __repr__(self):
+        return f'<GeneratedWorkout {self.id} for User {self.user_id}>'
+
+class GeneratedWorkoutSegment(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    workout_id = db.Column(db.Integer, db.ForeignKey('generated_workout.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    # NULL se l'esercizio è stato cancellato dopo la generazione
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id', ondelete='SET NULL'), nullable=True)
+    # Nome e acronimo com'erano alla generazione: lo storico e i PDF non cambiano
+    # se l'esercizio viene rinominato o cancellato
+    exercise_acronym = db.Column(db.String(10))
+    exercise_name = db.Column(db.String(64))
+    duration_min = db.Column(db.Float, nullable=False)
+    kcal_burned_segment = db.Column(db.Float, nullable=False)
+
+    exercise = db.relationship('Exercise', lazy=True)
+
+    @classmethod
+    def from_plan(cls, workout_plan):
+        """Crea i segmenti a partire dal piano restituito da generate_workout_logic."""
+        return [
+            cls(
+                position=position,
+                exercise_id=item['exercise_id'],
+                exercise_acronym=item['exercise_acronym'],
+                exercise_name=item['exercise_name'],
+                duration_min=item['duration_min'],
+                kcal_burned_segment=item['kcal_burned_segment']
+            )
+            for position, item in enumerate(workout_plan)
+        ]
+
+    def to_dict(self):
+        # Stessa forma degli elementi del vecchio workout_details_json
+        return {
+            'exercise_id': self.exercise_id,
+            'exercise_acronym': self.exercise_acronym,
+            'exercise_name': self.exercise_name,
+            'duration_min': self.duration_min,
+            'kcal_burned_segment': self.kcal_burned_segment
         }
 
     def __repr__(self):
-        return f'<GeneratedWorkout {self.id} for User {self.user_id}>'
\ No newline at end of file
+        return f'<GeneratedWorkoutSegment {self.position} of Workout {self.workout_id}>'
+
+class CatalogVersion(db.Model):
+    """
+    Versione dei dati tenuti in cache in memoria ('exercise', 'food_item', 'user').
+    Ogni scrittura la incrementa: le cache di tutti i worker (catalog_cache.py,
+    auth.py) la confrontano con la propria e si svuotano se è cambiata.
+    """
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.name}={self.version}>'
\ No newline at end of file
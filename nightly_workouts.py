@@ -0,0 +1,129 @@
+"""
+Job notturno: genera la "punizione" di ogni utente attivo a partire dalle kcal
+mangiate in un giorno. I piani sono calcolati con lo stesso motore di
+/api/generate_workout (WORKOUT_PLANNER, vedi backend.services.batch_planner) e
+scritti con INSERT multi-riga.
+
+Si può rilanciare: i workout di un giorno hanno sempre la stessa generation_date
+(la mezzanotte UTC successiva) e gli utenti che ce l'hanno già vengono saltati.
+
+Uso: python nightly_workouts.py [--date YYYY-MM-DD]
+"""
+import argparse
+from datetime import date, datetime, time, timedelta, timezone
+import numpy as np
+from sqlalchemy import func, insert, select
+from app import app, db, maintenance_context
+from models import User, Meal, MealItem, Exercise, GeneratedWorkout, GeneratedWorkoutSegment
+from backend.services.planner import catalog_from_exercises
+from backend.services.batch_planner import plan_batch
+
+LOOKUP_CHUNK = 500 # user_id per IN (...)
+
+def nightly_generation_date(day):
+    """generation_date dei workout generati per `day`: uguale a ogni esecuzione del job."""
+    return datetime.combine(day + timedelta(days=1), time.min)
+
+def already_generated(user_ids, generation_date):
+    """user_id che hanno già un workout con questa generation_date (job già eseguito)."""
+    done = set()
+    for start in range(0, len(user_ids), LOOKUP_CHUNK):
+        chunk = user_ids[start:start + LOOKUP_CHUNK].tolist()
+        done.update(db.session.execute(
+            select(GeneratedWorkout.user_id).where(
+                GeneratedWorkout.user_id.in_(chunk), GeneratedWorkout.generation_date == generation_date
+            )
+        ).scalars())
+    return done
+
+def daily_intake(day):
+    """(user_id, kcal mangiate, peso) per ogni utente che ha registrato pasti in `day`, con una sola query."""
+    start_of_day = datetime.combine(day, time.min)
+    end_of_day = datetime.combine(day, time.max)
+    rows = db.session.query(
+        Meal.user_id, func.sum(MealItem.kcal_total_item), User.weight_kg
+    ).join(
+        MealItem, MealItem.meal_id == Meal.id
+    ).join(
+        User, User.id == Meal.user_id
+    ).filter(
+        Meal.meal_time >= start_of_day, Meal.meal_time <= end_of_day
+    ).group_by(Meal.user_id, User.weight_kg).order_by(Meal.user_id).all()
+
+    user_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    kcal = np.array([row[1] or 0 for row in rows], dtype=np.float64)
+    weights = np.array([row[2] for row in rows], dtype=np.float64)
+    return user_ids, kcal, weights
+
+def store_plans(user_ids, kcal, plans, catalog, generation_date, chunk_size):
+    """Scrive workout e segmenti a blocchi di `chunk_size` utenti, un commit per blocco."""
+    names = {exercise_id: (acronym, name) for exercise_id, acronym, name, _ in catalog}
+    created = 0
+    for start in range(0, len(user_ids), chunk_size):
+        end = min(start + chunk_size, len(user_ids))
+        chunk = [i for i in range(start, end) if plans.offsets[i + 1] > plans.offsets[i]]
+        if not chunk:
+            continue
+
+        workout_rows = [
+            {
+                'user_id': int(user_ids[i]),
+                'generation_date': generation_date,
+                'kcal_to_burn': float(kcal[i]),
+                'estimated_total_time_min': float(plans.total_time[i]),
+            }
+            for i in chunk
+        ]
+        # Un workout per utente nel blocco: l'id si ritrova dallo user_id, qualunque
+        # sia l'ordine delle righe di RETURNING
+        ids_by_user = dict(db.session.execute(
+            insert(GeneratedWorkout).returning(GeneratedWorkout.user_id, GeneratedWorkout.id), workout_rows
+        ).all())
+        workout_ids = [ids_by_user[row['user_id']] for row in workout_rows]
+
+        # Le colonne dei segmenti escono già pronte dagli array del piano
+        segments = np.concatenate([np.arange(plans.offsets[i], plans.offsets[i + 1]) for i in chunk])
+        counts = [int(plans.offsets[i + 1] - plans.offsets[i]) for i in chunk]
+        columns = (
+            np.repeat(workout_ids, counts).tolist(),
+            plans.position[segments].tolist(),
+            plans.exercise_id[segments].tolist(),
+            plans.duration_min[segments].tolist(),
+            plans.kcal_burned_segment[segments].tolist(),
+        )
+        segment_rows = [
+            {'workout_id': w, 'position': p, 'exercise_id': e, 'exercise_acronym': names[e][0],
+             'exercise_name': names[e][1], 'duration_min': d, 'kcal_burned_segment': k}
+            for w, p, e, d, k in zip(*columns)
+        ]
+        db.session.execute(insert(GeneratedWorkoutSegment), segment_rows)
+        db.session.commit()
+        created += len(chunk)
+    return created
+
+def run(day, generation_date=None):
+    """
+    Genera e salva i workout di `day` per gli utenti che non li hanno ancora;
+    restituisce il numero di workout creati.
+    """
+    generation_date = generation_date or nightly_generation_date(day)
+    user_ids, kcal, weights = daily_intake(day)
+    done = already_generated(user_ids, generation_date)
+    if done:
+        pending = ~np.isin(user_ids, list(done))
+        user_ids, kcal, weights = user_ids[pending], kcal[pending], weights[pending]
+    catalog = catalog_from_exercises(Exercise.query.all())
+    if not len(user_ids) or not catalog:
+        return 0
+    plans = plan_batch(kcal, weights, catalog, app.config['WORKOUT_PLANNER'], app.config['WORKOUT_PLANNER_SEED'])
+    return store_plans(user_ids, kcal, plans, catalog, generation_date, app.config['NIGHTLY_WORKOUT_CHUNK_SIZE'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the nightly punishment for every active user.')
+    # I pasti sono salvati in UTC: anche "ieri" va calcolato in UTC, non nel fuso della macchina
+    parser.add_argument('--date', type=date.fromisoformat, default=datetime.now(timezone.utc).date() - timedelta(days=1),
+                        help='Day whose meals are punished (default: yesterday, UTC)')
+    args = parser.parse_args()
+    with maintenance_context(): # senza il timeout sugli statement delle richieste web
+        created = run(args.date)
+    print(f"Generated {created} workouts for {args.date}. Nobody escapes.")
@@ -0,0 +1,34 @@
+"""
+Righe per backend.services.analytics: una proiezione SQL per le righe dei pasti
+(con la categoria dell'alimento) e una per i workout, solo le colonne che
+servono e nessun oggetto ORM. Entrambe usano gli indici (user_id, data).
+"""
+from sqlalchemy import select
+from app import db
+from models import FoodItem, GeneratedWorkout, Meal, MealItem
+from backend.services.analytics import FREQUENCIES, nutrition_summary
+
+ANALYTICS_PERIODS = tuple(FREQUENCIES)
+
+def nutrition_analytics(user_id, date_from, date_to, period='week'):
+    """Serie, totali e categorie dell'utente tra date_from e date_to (vedi nutrition_summary)."""
+    meal_rows = db.session.execute(
+        select(
+            Meal.meal_time, MealItem.kcal_total_item, MealItem.carbs_item,
+            MealItem.proteins_item, MealItem.fats_item, FoodItem.category
+        ).join(
+            MealItem, MealItem.meal_id == Meal.id
+        ).join(
+            FoodItem, FoodItem.id == MealItem.food_item_id
+        ).where(
+            Meal.user_id == user_id, Meal.meal_time >= date_from, Meal.meal_time <= date_to
+        )
+    ).all()
+    workout_rows = db.session.execute(
+        select(GeneratedWorkout.generation_date, GeneratedWorkout.kcal_to_burn).where(
+            GeneratedWorkout.user_id == user_id,
+            GeneratedWorkout.generation_date >= date_from,
+            GeneratedWorkout.generation_date <= date_to
+        )
+    ).all()
+    return nutrition_summary(meal_rows, workout_rows, date_from, date_to, period)
@@ -0,0 +1,45 @@
+import json
+from datetime import datetime, time, timezone
+from flask import Response, request, stream_with_context
+
+def parse_datetime_arg(name, end_of_day=False):
+    """
+    Legge un parametro di query ISO 8601 (data o data e ora). Se è solo una data e
+    `end_of_day` è vero, restituisce l'ultimo istante di quel giorno. Con un fuso
+    orario viene convertito in UTC senza fuso, come le date nel database (confrontare
+    date con e senza fuso solleverebbe TypeError). Solleva ValueError.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
+
+def parse_limit_arg(default, maximum):
+    """
+    Legge ?limit= (`default` se manca) e lo limita a `maximum`. Solleva ValueError
+    se non è un intero positivo: limit=-3 o limit=abc sono un errore del client,
+    non una pagina da un elemento.
+    """
+    value = request.args.get('limit')
+    limit = default if value is None else int(value)
+    if limit < 1:
+        raise ValueError(f'limit must be positive, got {limit}')
+    return min(limit, maximum)
+
+def wants_ndjson():
+    """Il client ha chiesto lo stream NDJSON (?format=ndjson oppure Accept: application/x-ndjson)."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def ndjson_response(rows, **kwargs):
+    """Risposta in streaming con un oggetto JSON per riga."""
+    def generate():
+        for row in rows:
+            yield json.dumps(row) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', **kwargs)
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from werkzeug.security import check_password_hash, generate_password_hash
+from app import app
+
+class PasswordHasherBusy(Exception):
+    """Pool di hashing saturo: la richiesta va rifiutata subito (503) invece di accodarla."""
+    def __init__(self, retry_after):
+        super().__init__('Password hashing pool is saturated')
+        self.retry_after = retry_after
+
+class PasswordHasher:
+    """
+    Esegue gli hash delle password (volutamente lenti) in un pool di processi
+    dedicato, così un'ondata di login non blocca i thread delle altre route.
+    Al massimo `processes + queue_size` operazioni tra in corso e in attesa:
+    oltre, PasswordHasherBusy.
+    """
+    def __init__(self, method, processes, queue_size, timeout, retry_after):
+        # Forma completa del metodo ('scrypt' -> 'scrypt:32768:8:1'), la stessa
+        # scritta nel prefisso degli hash: needs_rehash la confronta con quella
+        self.method = generate_password_hash('', method).split('$', 1)[0]
+        self.processes = processes
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(processes + queue_size)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.counters = {'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected': 0, 'in_flight': 0}
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._pool
+
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self.counters[name] += value
+
+    def _release(self, _future):
+        self._count('in_flight', -1)
+        self._slots.release()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise PasswordHasherBusy(self.retry_after)
+        self._count('in_flight')
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # Lo slot si libera quando il processo ha finito davvero, anche dopo un timeout
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            raise PasswordHasherBusy(self.retry_after)
+
+    def hash(self, password):
+        """Hash della password con il metodo configurato (PASSWORD_HASH_METHOD)."""
+        self._count('hashed')
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        self._count('verified')
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Vero se l'hash è stato creato con un metodo o un costo diverso da quello configurato."""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def verify_and_update(self, user, password):
+        """
+        Verifica la password di `user`; se è corretta ma l'hash è vecchio lo
+        ricalcola (il commit resta al chiamante). Restituisce True se la password è giusta.
+        """
+        if not self.verify(user.password_hash, password):
+            return False
+        if self.needs_rehash(user.password_hash):
+            user.password_hash = self.hash(password)
+            self._count('rehashed')
+        return True
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self.counters, method=self.method)
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_METHOD'],
+    app.config['PASSWORD_HASH_PROCESSES'],
+    app.config['PASSWORD_HASH_QUEUE_SIZE'],
+    app.config['PASSWORD_HASH_TIMEOUT'],
+    app.config['PASSWORD_HASH_RETRY_AFTER'],
+)
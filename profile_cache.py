@@ -0,0 +1,86 @@
+import hashlib
+import threading
+from functools import lru_cache
+from flask import Response, request
+from app import app, db
+from models import User
+from auth import PRINCIPAL_COLUMNS, Principal
+from catalog_cache import USERS, catalog_cache
+from backend.services.utility import calculate_bmr
+
+# --- GUEST USER CONFIGURATION ---
+# Il guest si riconosce da username ed email, non dall'id: se l'id 1 fosse di un utente
+# vero, il traffico anonimo riceverebbe il suo profilo
+GUEST_USERNAME = 'GuestWarrior'
+GUEST_EMAIL = 'guest1@caloriepunisher.com'
+
+_guest_lock = threading.Lock()
+_guest_profile = None # (versione 'user', body, etag), come i principal di auth.py
+
+def _profile_body(principal, is_guest):
+    """Corpo JSON del profilo (stesse chiavi di User.to_dict più bmr e is_guest) e relativo ETag."""
+    user_data = {
+        'id': principal.id,
+        'username': principal.username,
+        'email': principal.email,
+        'gender': principal.gender,
+        'age': principal.age,
+        'weight_kg': principal.weight_kg,
+        'height_cm': principal.height_cm,
+        'registration_date': principal.registration_date.isoformat(),
+        'profile_picture_url': principal.profile_picture_url,
+        'bmr': round(calculate_bmr(principal.gender, principal.age, principal.weight_kg, principal.height_cm), 2),
+        'is_guest': is_guest
+    }
+    body = app.json.dumps(user_data) + '\n'
+    return body, hashlib.sha256(body.encode()).hexdigest()
+
+@lru_cache(maxsize=app.config['PROFILE_CACHE_SIZE'])
+def user_profile(principal):
+    """
+    (body, etag) del profilo di un utente registrato. La chiave è il Principal stesso:
+    quando update_user_profile invalida l'utente arriva un Principal nuovo e la voce
+    vecchia esce dalla cache per LRU.
+    """
+    return _profile_body(principal, is_guest=False)
+
+def ensure_guest_user():
+    """Crea l'utente GuestWarrior se non esiste ancora e lo restituisce."""
+    guest_user = User.query.filter_by(username=GUEST_USERNAME, email=GUEST_EMAIL).first()
+    if not guest_user:
+        guest_user = User(
+            username=GUEST_USERNAME,
+            email=GUEST_EMAIL,
+            gender='M', age=30, weight_kg=75.0, height_cm=175.0
+        )
+        guest_user.set_password('guestpassword') # Password fittizia
+        db.session.add(guest_user)
+        db.session.commit()
+        print(f"Creato utente GuestWarrior con ID {guest_user.id}")
+    return guest_user
+
+def guest_profile():
+    """
+    (body, etag) del profilo guest. Va calcolato all'avvio (app.py); poi il traffico
+    anonimo legge solo la versione 'user' (ogni CATALOG_VERSION_CHECK_INTERVAL) e il
+    profilo viene ricalcolato quando cambia, in qualunque worker sia stato modificato.
+    """
+    global _guest_profile
+    version = catalog_cache.version(USERS)
+    cached = _guest_profile
+    if cached is None or cached[0] != version:
+        with _guest_lock:
+            cached = _guest_profile
+            if cached is None or cached[0] != version:
+                guest_user = ensure_guest_user()
+                row = db.session.query(*PRINCIPAL_COLUMNS).filter(User.id == guest_user.id).one()
+                cached = _guest_profile = (version, *_profile_body(Principal(*row[:-1], row[-1] or 0), is_guest=True))
+    return cached[1:]
+
+def profile_response(body, etag):
+    """Risposta JSON con ETag forte; 304 se il client ha già questa versione."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True # il client deve sempre rivalidare
+    return response.make_conditional(request)
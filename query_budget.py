@@ -0,0 +1,47 @@
+from functools import wraps
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+
+class QueryBudgetExceeded(Exception):
+    """Una route ha eseguito più statement SQL di quelli previsti dal suo budget."""
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statements = g.get('sql_statements', 0) + 1
+
+def statements_in_request():
+    """Numero di statement SQL eseguiti finora nella richiesta corrente."""
+    return g.get('sql_statements', 0)
+
+def allow_statements(count):
+    """
+    Alza di `count` il budget della richiesta corrente, per il lavoro che cresce
+    con il payload per un motivo noto (non per un N+1).
+    """
+    if has_request_context() and count > 0:
+        g.query_budget_allowance = g.get('query_budget_allowance', 0) + count
+
+def query_budget(max_statements):
+    """
+    Decoratore per le route: conta gli statement SQL eseguiti dalla view.
+    Oltre il budget registra un warning; con QUERY_BUDGET_STRICT (o in testing)
+    solleva QueryBudgetExceeded, così i test falliscono appena torna un N+1.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            start = statements_in_request()
+            response = f(*args, **kwargs)
+            executed = statements_in_request() - start
+            budget = max_statements + g.pop('query_budget_allowance', 0)
+            if executed > budget:
+                message = f'{f.__name__} executed {executed} SQL statements (budget: {budget})'
+                if app.config.get('QUERY_BUDGET_STRICT') or app.testing:
+                    raise QueryBudgetExceeded(message)
+                app.logger.warning(message)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+import threading
+from app import app
+from backend.services.reports import TEMPLATE_VERSION, render_workout_report
+from backend.services.singleflight import SingleFlight
+from metrics import PDF_RENDER_SECONDS
+
+class ReportDiskCache:
+    """
+    Cache su disco dei PDF dei workout, con chiave (workout_id, versione del template).
+    Un GeneratedWorkout non cambia dopo la creazione, quindi un PDF resta valido
+    finché non cambia il template. Oltre `max_bytes` vengono cancellati i file usati
+    meno di recente (l'mtime viene aggiornato a ogni lettura).
+    L'ETag è lo sha256 del contenuto: i PDF sono disegnati in modo invariante, quindi
+    ogni worker e ogni nuovo rendering dello stesso workout danno lo stesso ETag.
+    Un file cancellato dall'LRU mentre lo si legge conta come un miss.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._etags = {}
+        self._estimated_bytes = None
+        self._flights = SingleFlight()
+        self.counters = {'hits': 0, 'misses': 0, 'renders': 0, 'evictions': 0}
+
+    def path_for(self, workout_id):
+        return os.path.join(self.directory, f'workout_{workout_id}_v{TEMPLATE_VERSION}.pdf')
+
+    def _etag_for(self, path):
+        etag = self._etags.get(path)
+        if etag is None:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(65536), b''):
+                    digest.update(block)
+            etag = self._etags[path] = digest.hexdigest()
+        return etag
+
+    def _lookup(self, path):
+        try:
+            os.utime(path) # "tocca" il file: serve all'LRU
+            return self._etag_for(path)
+        except FileNotFoundError: # anche se l'LRU lo cancella tra utime e lettura
+            self._etags.pop(path, None)
+            return None
+
+    def get_or_render(self, workout_id, load_report_data):
+        """
+        Restituisce (path, etag) del PDF; se manca lo disegna con i valori di
+        `load_report_data()`. Le richieste concorrenti per lo stesso workout
+        fanno un solo rendering.
+        """
+        path = self.path_for(workout_id)
+        etag = self._lookup(path)
+        if etag is not None:
+            self.counters['hits'] += 1
+            return path, etag
+        self.counters['misses'] += 1
+        return self._flights.do(path, self._render, path, load_report_data)
+
+    def read(self, workout_id):
+        """Byte del PDF già in cache, oppure None (anche se sparisce mentre lo si apre)."""
+        path = self.path_for(workout_id)
+        try:
+            os.utime(path)
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            self._etags.pop(path, None)
+            return None
+
+    def _render(self, path, load_report_data):
+        etag = self._lookup(path) # un altro worker potrebbe averlo appena scritto
+        if etag is not None:
+            return path, etag
+        report = load_report_data()
+        with PDF_RENDER_SECONDS.time('single'):
+            content = render_workout_report(**report)
+        return self._write(path, content)
+
+    def store(self, workout_id, content):
+        """Salva un PDF disegnato altrove (es. dall'export massivo); restituisce (path, etag)."""
+        return self._write(self.path_for(workout_id), content)
+
+    def _write(self, path, content):
+        os.makedirs(self.directory, exist_ok=True)
+        # Scrittura atomica: chi legge vede il file completo o niente
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        etag = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            self._etags[path] = etag
+            self.counters['renders'] += 1
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += len(content)
+        self._evict_if_needed(keep=path)
+        return path, etag
+
+    def _evict_if_needed(self, keep=None):
+        """Riporta la cache sotto `max_bytes`; `keep` (il file appena scritto) non viene mai cancellato."""
+        with self._lock:
+            if self._estimated_bytes is not None and self._estimated_bytes <= self.max_bytes:
+                return
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.pdf') and entry.path != keep:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries) + (os.path.getsize(keep) if keep else 0)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._etags.pop(path, None)
+                self.counters['evictions'] += 1
+                total -= size
+            self._estimated_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, directory=self.directory, in_flight=self._flights.in_flight())
+
+report_cache = ReportDiskCache(
+    app.config['REPORT_CACHE_DIR'] or os.path.join(app.instance_path, 'report_cache'),
+    app.config['REPORT_CACHE_MAX_BYTES']
+)
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import BytesIO
+from app import app
+from models import GeneratedWorkout
+from backend.services.reports import render_workout_report, render_workout_reports_to_file
+from report_cache import report_cache
+from metrics import PDF_RENDER_SECONDS
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError: # opzionale (requirements-optional.txt): senza, il PDF unico si disegna in un solo processo
+    PdfReader = PdfWriter = None
+
+LOAD_CHUNK = 100 # workout caricati (con i segmenti) per query durante l'export
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_render_pool():
+    """Pool di processi condiviso per il rendering dei PDF (ReportLab è CPU-bound e tiene il GIL)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=app.config['REPORT_EXPORT_PROCESSES'] or os.cpu_count())
+    return _pool
+
+def workout_report_data(workout, username):
+    """Valori stampati nel report: dizionario semplice, serializzabile verso i processi del pool."""
+    return {
+        'username': username,
+        'generation_date': workout.generation_date,
+        'kcal_to_burn': workout.kcal_to_burn,
+        'estimated_total_time_min': workout.estimated_total_time_min,
+        'workout_details': [segment.to_dict() for segment in workout.segments]
+    }
+
+def workout_reports(workout_ids, username):
+    """
+    Genera (workout_id, dati del report) nell'ordine di `workout_ids`, caricando i
+    workout a blocchi di LOAD_CHUNK: l'export non tiene in memoria tutti i workout
+    con i loro segmenti, e lo ZIP parte appena è pronto il primo blocco.
+    """
+    for start in range(0, len(workout_ids), LOAD_CHUNK):
+        chunk = workout_ids[start:start + LOAD_CHUNK]
+        workouts = {workout.id: workout for workout in GeneratedWorkout.query.filter(GeneratedWorkout.id.in_(chunk))}
+        for workout_id in chunk:
+            yield workout_id, workout_report_data(workouts[workout_id], username)
+
+def _render_for_zip(workout_id, report):
+    # Cronometrato nel processo del pool: il tempo in coda non è rendering
+    started = time.perf_counter()
+    content = render_workout_report(**report)
+    return workout_id, content, time.perf_counter() - started
+
+class _ChunkSink:
+    """File write-only e non seekable: ZipFile ci scrive, lo stream HTTP svuota i byte accumulati."""
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def _window():
+    """Rendering in corso al massimo: due per processo del pool, così nessuno resta fermo."""
+    return 2 * (app.config['REPORT_EXPORT_PROCESSES'] or os.cpu_count())
+
+def _rendered_reports(reports, window, kind):
+    """
+    Genera (workout_id, byte del PDF) nell'ordine in cui sono pronti: dalla cache su
+    disco se già presenti, altrimenti disegnati nel pool con al massimo `window`
+    rendering in corso. I PDF nuovi finiscono anche nella cache del singolo report.
+    """
+    queue = iter(reports)
+    pool = get_render_pool()
+    in_flight = set()
+    while True:
+        while len(in_flight) < window:
+            entry = next(queue, None)
+            if entry is None:
+                break
+            workout_id, report = entry
+            cached = report_cache.read(workout_id)
+            if cached is not None:
+                yield workout_id, cached
+                continue
+            in_flight.add(pool.submit(_render_for_zip, workout_id, report))
+        if not in_flight:
+            break
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            workout_id, content, seconds = future.result()
+            PDF_RENDER_SECONDS.observe(seconds, kind)
+            report_cache.store(workout_id, content)
+            yield workout_id, content
+
+def stream_zip(reports):
+    """
+    ZIP in streaming dei report [(workout_id, dati)]: ogni PDF viene spedito appena
+    pronto, senza tenere l'archivio in memoria. I PDF sono già compressi: niente deflate.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for workout_id, content in _rendered_reports(reports, _window(), 'zip'):
+            archive.writestr(f'workout_report_{workout_id}.pdf', content)
+            yield sink.drain()
+    yield sink.drain()
+
+def render_combined_pdf(reports):
+    """
+    Un solo PDF con tutti i report [(workout_id, dati)], scritto su un file
+    temporaneo (il chiamante lo spedisce e poi lo cancella). Restituisce il path.
+    Con pypdf le pagine sono i PDF dei singoli workout, presi dalla cache o disegnati
+    in parallelo nel pool come per lo ZIP, poi accodati nell'ordine dei report.
+    Senza pypdf l'intero documento viene disegnato in un solo processo del pool.
+    """
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        if PdfWriter is None:
+            with PDF_RENDER_SECONDS.time('combined'):
+                return get_render_pool().submit(render_workout_reports_to_file, [report for _, report in reports], path).result()
+
+        order = []
+        def in_order():
+            for workout_id, report in reports:
+                order.append(workout_id)
+                yield workout_id, report
+        rendered = dict(_rendered_reports(in_order(), _window(), 'combined_report'))
+        writer = PdfWriter()
+        for workout_id in order:
+            writer.append(PdfReader(BytesIO(rendered.pop(workout_id))))
+        writer.write(path)
+        return path
+    except BaseException:
+        os.remove(path)
+        raise
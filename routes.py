@@ -1,65 +1,72 @@
-from flask import request, jsonify, make_response
+from flask import request, jsonify, abort, send_file, Response, stream_with_context
 from app import app, db
-from models import User, FoodItem, Meal, MealItem, Exercise, GeneratedWorkout
-from utils import calculate_bmr, generate_workout_logic, get_daily_time_range
-from datetime import datetime, date, timedelta
+from models import User, FoodItem, Meal, MealItem, Exercise, GeneratedWorkout, GeneratedWorkoutSegment
+from backend.services.utility import generate_workout_logic, get_daily_time_range
+from backend.services.food_search import FoodSearchIndex
+from barcode_resolver import resolve_barcode, bulk_resolve
+from meal_logging import MealValidationError, log_meals
+from meal_export import csv_chunks, export_rows, meal_documents
+from query_budget import query_budget
+from metrics import render_metrics
+from db_routing import read_only
+from password_hashing import PasswordHasherBusy, password_hasher
+from auth import (
+    authenticate, bearer_token, current_principal, generate_jwt_token, invalidate_user,
+    login_required, revoke_user_tokens, auth_stats
+)
+from profile_cache import guest_profile, profile_response, user_profile
+from catalog_cache import EXERCISES, FOOD_ITEMS, bump_catalog_version, bump_food_version, catalog_cache
+from food_catalog import InvalidFields, food_page, food_snapshot, parse_fields
+from serializers import food_item_columns, food_item_dicts, json_response, stream_workout_dicts, workout_columns, workout_dicts
+from report_cache import report_cache
+from report_export import render_combined_pdf, stream_zip, workout_report_data, workout_reports
+from backend.services.planner import plan_cache
+from pagination import ndjson_response, parse_datetime_arg, parse_limit_arg, wants_ndjson
+from backend.services.cursors import InvalidCursor, decode_cursor, encode_cursor
+from sqlalchemy import and_, or_, select
+from workout_stats import PERIODS, exercise_totals
+from nutrition_stats import ANALYTICS_PERIODS, nutrition_analytics
+from datetime import datetime, timedelta
 import requests
 import json
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from io import BytesIO
-from functools import wraps
-import jwt # Per i JSON Web Tokens
-from time import time # Per il timestamp del JWT
-
-# --- JWT CONFIGURATION ---
-JWT_SECRET_KEY = app.config['SECRET_KEY']
-JWT_ALGORITHM = 'HS256'
-JWT_EXPIRATION_SECONDS = 3600 # 1 ora di validità per il token
-
-# --- GUEST USER CONFIGURATION ---
-# Useremo un ID fisso per il guest user nel database.
-GUEST_USER_ID = 1
-
-def generate_jwt_token(user_id):
-    """Genera un JWT per l'autenticazione."""
-    payload = {
-        'user_id': user_id,
-        'exp': datetime.utcnow() + timedelta(seconds=JWT_EXPIRATION_SECONDS),
-        'iat': datetime.utcnow()
-    }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
-
-def decode_jwt_token(token):
-    """Decodifica un JWT."""
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload['user_id']
-    except jwt.ExpiredSignatureError:
-        return None # Token scaduto
-    except jwt.InvalidTokenError:
-        return None # Token non valido
-
-# --- DECORATORE DI AUTENTICAZIONE (per utenti registrati) ---
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'message': 'Authorization token is missing or malformed!'}), 401
-        
-        token = auth_header.split(' ')[1]
-        user_id = decode_jwt_token(token)
-        
-        if not user_id:
-            return jsonify({'message': 'Invalid or expired token. Please log in again.'}), 401
-        
-        kwargs['user_id'] = user_id # Passa l'ID utente alla funzione
-        return f(*args, **kwargs)
-    return decorated_function
+import os
+import threading
+
+# --- INDICE DI RICERCA ALIMENTI ---
+# Costruito dalla tabella FoodItem al primo utilizzo (o all'avvio) e ricostruito
+# quando cambia il catalogo, così la ricerca non fa più un full scan con ILIKE.
+food_search_index = FoodSearchIndex()
+_food_index_lock = threading.Lock()
+_food_index_state = {'version': None} # versione di food_item indicizzata
+
+def get_food_search_index():
+    """
+    Restituisce l'indice di ricerca, costruendolo se necessario. Quando la versione
+    di food_item cambia (import_food_dump.py, un barcode salvato da un altro worker,
+    un alimento rinominato o cancellato) lo ricostruisce da capo in un indice nuovo:
+    le ricerche in corso usano il vecchio fino allo scambio.
+    """
+    global food_search_index
+    version = catalog_cache.version(FOOD_ITEMS)
+    if food_search_index.ready and _food_index_state['version'] == version:
+        return food_search_index
+    with _food_index_lock:
+        if food_search_index.ready and _food_index_state['version'] == version:
+            return food_search_index
+        index = FoodSearchIndex()
+        index.build(db.session.query(FoodItem.id, FoodItem.name).yield_per(10000))
+        food_search_index = index
+        _food_index_state['version'] = version
+    return food_search_index
 
 # --- UTENTI ---
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    # Meglio un 503 immediato che tenere il worker appeso dietro a una coda di hash
+    response = jsonify({'message': 'Too many warriors logging in at once. Catch your breath and retry!'})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
 @app.route('/api/register', methods=['POST'])
 def register_user():
     data = request.get_json()
@@ -80,12 +87,12 @@ def register_user():
         weight_kg=data['weight_kg'], 
         height_cm=data['height_cm']
     )
-    new_user.set_password(data['password'])
+    new_user.password_hash = password_hasher.hash(data['password']) # nel pool dedicato
     db.session.add(new_user)
     db.session.commit()
     
     # Genera un token JWT subito dopo la registrazione
-    token = generate_jwt_token(new_user.id)
+    token = generate_jwt_token(new_user)
     return jsonify({'message': 'Registration successful! Welcome, warrior!', 'token': token, 'user': new_user.to_dict()}), 201
 
 @app.route('/api/login', methods=['POST'])
@@ -95,48 +102,33 @@ def login_user():
     password = data.get('password')
 
     user = User.query.filter_by(username=username).first()
-    if user and user.check_password(password):
-        token = generate_jwt_token(user.id)
+    if user and password_hasher.verify_and_update(user, password):
+        db.session.commit() # salva l'eventuale rehash con il metodo configurato
+        token = generate_jwt_token(user)
         return jsonify({'message': 'Login successful!', 'token': token, 'user': user.to_dict()}), 200
     return jsonify({'message': 'Invalid credentials. Try harder!'}), 401
 
+@app.route('/api/logout', methods=['POST'])
+@login_required
+def logout_user(user_id): # user_id viene dal decorator
+    # Revoca tutti i token dell'utente, non solo quello usato per questa richiesta
+    user = User.query.get_or_404(user_id)
+    revoke_user_tokens(user)
+    db.session.commit()
+    return jsonify({'message': 'Logged out everywhere. Running away from your workouts?'}), 200
+
 # Endpoint per ottenere i dati del profilo (sia per registrati che per guest)
 @app.route('/api/profile', methods=['GET'])
 def get_user_profile():
-    # Per gli utenti registrati, usiamo il token JWT
-    auth_header = request.headers.get('Authorization')
-    if auth_header and auth_header.startswith('Bearer '):
-        token = auth_header.split(' ')[1]
-        user_id = decode_jwt_token(token)
-        if user_id:
-            user = User.query.get(user_id)
-            if user:
-                bmr = calculate_bmr(user.gender, user.age, user.weight_kg, user.height_cm)
-                user_data = user.to_dict()
-                user_data['bmr'] = round(bmr, 2)
-                user_data['is_guest'] = False
-                return jsonify(user_data)
-    
-    # Se non c'è token valido o non è presente, trattiamo come guest
-    # Assicurati che l'utente guest esista nel DB, altrimenti lo crea
-    guest_user = User.query.get(GUEST_USER_ID)
-    if not guest_user:
-        guest_user = User(
-            id=GUEST_USER_ID, # Forziamo l'ID
-            username='GuestWarrior',
-            email=f'guest{GUEST_USER_ID}@caloriepunisher.com', # Email unica per test
-            gender='M', age=30, weight_kg=75.0, height_cm=175.0
-        )
-        guest_user.set_password('guestpassword') # Password fittizia
-        db.session.add(guest_user)
-        db.session.commit()
-        print(f"Creato utente GuestWarrior con ID {GUEST_USER_ID}")
-    
-    bmr = calculate_bmr(guest_user.gender, guest_user.age, guest_user.weight_kg, guest_user.height_cm)
-    guest_data = guest_user.to_dict()
-    guest_data['bmr'] = round(bmr, 2)
-    guest_data['is_guest'] = True # Flag per il frontend
-    return jsonify(guest_data)
+    # Per gli utenti registrati, usiamo il token JWT (il Principal è già in cache)
+    token = bearer_token()
+    principal = authenticate(token) if token else None
+    if principal is not None:
+        body, etag = user_profile(principal)
+    else:
+        # Se non c'è token valido o non è presente, trattiamo come guest: profilo già in memoria
+        body, etag = guest_profile()
+    return profile_response(body, etag)
 
 # Endpoint per aggiornare il profilo utente (solo per utenti registrati)
 @app.route('/api/profile', methods=['PUT'])
@@ -150,6 +142,7 @@ def update_user_profile(user_id):
     user.weight_kg = data.get('weight_kg', user.weight_kg)
     user.height_cm = data.get('height_cm', user.height_cm)
     user.profile_picture_url = data.get('profile_picture_url', user.profile_picture_url)
+    invalidate_user(user) # anche il profilo guest, se è lui: è legato alla versione 'user'
     
     # Non permettiamo di cambiare username/email/password da qui per semplicità
     # 'username': data.get('username', user.username),
@@ -163,151 +156,239 @@ def update_user_profile(user_id):
 
 # --- ALIMENTI (Non richiedono login) ---
 @app.route('/api/fooditems', methods=['GET'])
+@read_only
 def get_food_items():
-    food_items = FoodItem.query.all()
-    return jsonify([item.to_dict() for item in food_items])
+    """
+    Senza parametri: tutto il catalogo (lo stesso JSON di sempre) come snapshot
+    compresso, con ETag e X-Catalog-Version. Con limit, page, cursor, since o fields:
+    una pagina {'catalog_version', 'items', 'next_cursor'}; since=<versione> dà solo
+    le righe scritte dopo quella versione, per sincronizzare i client per delta.
+    """
+    if not any(arg in request.args for arg in ('limit', 'page', 'cursor', 'since', 'fields')):
+        return food_snapshot.response()
+
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except InvalidFields as e:
+        return jsonify({'message': f'Unknown fields: {e}. Ask for something food actually has!'}), 400
+    since = request.args.get('since', type=int)
+    page = request.args.get('page', type=int)
+    if ('since' in request.args and since is None) or ('page' in request.args and (page is None or page < 1)):
+        return jsonify({'message': 'since and page must be positive integers. Count like a grown-up!'}), 400
+
+    try:
+        limit = parse_limit_arg(app.config['FOOD_ITEMS_PAGE_SIZE'], app.config['FOOD_ITEMS_MAX_PAGE_SIZE'])
+    except ValueError:
+        return jsonify({'message': 'limit must be a positive integer. Count like a grown-up!'}), 400
+    try:
+        return json_response(food_page(fields, limit, since, request.args.get('cursor'), page))
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor. Stop tampering with the timeline!'}), 400
 
 @app.route('/api/fooditems/search', methods=['GET'])
+@read_only
 def search_food_items():
-    query = request.args.get('q', '').lower()
-    food_items = FoodItem.query.filter(FoodItem.name.ilike(f'%{query}%')).limit(20).all()
-    return jsonify([item.to_dict() for item in food_items])
+    query = request.args.get('q', '')
+    if not query.strip():
+        rows = db.session.execute(select(*food_item_columns()).limit(20)).all()
+        return json_response(food_item_dicts(rows))
+
+    food_ids = get_food_search_index().search(query, limit=20)
+    if not food_ids:
+        return json_response([])
+    found = catalog_cache.food_items(food_ids)
+    return json_response(food_item_dicts(found[food_id] for food_id in food_ids if food_id in found))
 
 @app.route('/api/fooditems/barcode/<string:barcode>', methods=['GET'])
 def get_food_item_by_barcode(barcode):
-    from config import Config
-    food_item = FoodItem.query.filter_by(barcode_upc=barcode).first()
-    if food_item:
-        return jsonify(food_item.to_dict())
-
-    api_url = f"{Config.OPEN_FOOD_FACTS_API_URL}{barcode}.json"
     try:
-        response = requests.get(api_url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get('status') == 1 and 'product' in data:
-            product = data['product']
-            name = product.get('product_name', product.get('product_name_it', 'Nome Sconosciuto'))
-            nutriments = product.get('nutriments', {})
-
-            kcal = nutriments.get('energy-kcal_100g', 0)
-            carbs = nutriments.get('carbohydrates_100g', 0)
-            proteins = nutriments.get('proteins_100g', 0)
-            fats = nutriments.get('fat_100g', 0)
-            sugars = nutriments.get('sugars_100g', 0)
-            fiber = nutriments.get('fiber_100g', 0)
-            sodium = nutriments.get('sodium_100g', 0)
-            if sodium > 0: sodium *= 1000 
-
-            image_url = product.get('image_url', product.get('image_front_url'))
-            category = product.get('categories', 'Non Specificato').split(',')[0].strip()
-
-            new_food_item = FoodItem(
-                name=name, category=category, kcal_per_100g=kcal,
-                carbs_per_100g=carbs, proteins_per_100g=proteins, fats_per_100g=fats,
-                sugars_per_100g=sugars, fiber_per_100g=fiber, sodium_mg_per_100g=sodium,
-                image_url=image_url, barcode_upc=barcode
-            )
-            db.session.add(new_food_item)
-            db.session.commit()
-            return jsonify(new_food_item.to_dict()), 200
-        
-        return jsonify({'message': 'Product not found via barcode or external API issue. Did you scan correctly?'}), 404
+        food_item, created = resolve_barcode(barcode)
     except requests.exceptions.RequestException as e:
         return jsonify({'message': f'Error contacting external API: {str(e)}. Check your internet, rookie!'}), 500
 
+    if not food_item:
+        return jsonify({'message': 'Product not found via barcode or external API issue. Did you scan correctly?'}), 404
+    if created:
+        food_search_index.add(food_item.id, food_item.name)
+    return jsonify(food_item.to_dict()), 200
+
+def _read_bulk_barcodes():
+    """Legge i barcode da un body JSON (lista o {'barcodes': [...]}) oppure NDJSON, senza duplicati."""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        entries = [json.loads(line) for line in request.stream if line.strip()]
+    else:
+        data = request.get_json(silent=True)
+        entries = data.get('barcodes') if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return []
+
+    barcodes = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            entry = entry.get('barcode')
+        if entry is not None and str(entry).strip():
+            barcodes.append(str(entry).strip())
+    return list(dict.fromkeys(barcodes))
+
+@app.route('/api/fooditems/barcode/bulk', methods=['POST'])
+@login_required
+def bulk_import_barcodes(user_id): # user_id viene dal decorator
+    try:
+        barcodes = _read_bulk_barcodes()
+    except ValueError:
+        return jsonify({'message': 'Malformed NDJSON body. One barcode per line, it is not that hard!'}), 400
+    if not barcodes:
+        return jsonify({'message': 'No barcodes provided. Send a JSON list or NDJSON, not your grocery receipt!'}), 400
+
+    max_concurrency = app.config['BULK_BARCODE_MAX_CONCURRENCY']
+    concurrency = request.args.get('concurrency', max_concurrency, type=int)
+    concurrency = max(1, min(concurrency, max_concurrency))
+    batch_size = app.config['BULK_BARCODE_BATCH_SIZE']
+    flush_interval = app.config['BULK_BARCODE_FLUSH_SECONDS']
+
+    def generate():
+        for barcode, status, result in bulk_resolve(barcodes, concurrency, batch_size, flush_interval):
+            line = {'barcode': barcode, 'status': status}
+            if status == 'error':
+                line['message'] = result
+            elif result is not None:
+                line['food_item'] = result.to_dict()
+                if status == 'created':
+                    food_search_index.add(result.id, result.name)
+            yield json.dumps(line) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # --- PASTI (richiede ID utente) ---
 @app.route('/api/meals', methods=['POST'])
+@query_budget(7) # catalog_version, principal e alimenti (cache fredde), utenti cambiati, 2 INSERT
 @login_required
 def add_meal_route(user_id): # user_id viene dal decorator
-    data = request.get_json()
-    description = data.get('description', 'Pasto non specificato')
-    items_data = data.get('items', [])
-
-    if not items_data:
-        return jsonify({'message': 'No food items provided for the meal. Are you fasting or just forgetting?'}), 400
-
-    new_meal = Meal(user_id=user_id, description=description)
-    db.session.add(new_meal)
-    db.session.flush()
-
-    total_meal_kcal = 0
-    for item_data in items_data:
-        food_item_id = item_data.get('food_item_id')
-        grams_consumed = item_data.get('grams_consumed')
-
-        if not food_item_id or not grams_consumed or grams_consumed <= 0:
-            db.session.rollback()
-            return jsonify({'message': 'Invalid food item details in meal. Check your inputs!'}), 400
-
-        food_item = FoodItem.query.get(food_item_id)
-        if not food_item:
-            db.session.rollback()
-            return jsonify({'message': f'Food item with ID {food_item_id} not found. Is it from another dimension?'}), 404
-
-        kcal = (food_item.kcal_per_100g / 100) * grams_consumed
-        carbs = (food_item.carbs_per_100g / 100) * grams_consumed
-        proteins = (food_item.proteins_per_100g / 100) * grams_consumed
-        fats = (food_item.fats_per_100g / 100) * grams_consumed
-        
-        total_meal_kcal += kcal
-
-        new_meal_item = MealItem(
-            meal_id=new_meal.id,
-            food_item_id=food_item_id,
-            grams_consumed=grams_consumed,
-            kcal_total_item=kcal,
-            carbs_item=carbs,
-            proteins_item=proteins,
-            fats_item=fats
-        )
-        db.session.add(new_meal_item)
-    
-    db.session.commit()
+    try:
+        [(new_meal, total_meal_kcal)] = log_meals(user_id, [request.get_json()])
+    except MealValidationError as e:
+        return jsonify({'message': e.message}), e.status_code
+
     return jsonify({
         'message': 'Meal added successfully! Your caloric debt is piling up!', 
-        'meal': new_meal.to_dict(include_items=True),
+        'meal': new_meal,
         'total_meal_kcal': round(total_meal_kcal, 2)
     }), 201
 
-@app.route('/api/meals/daily', methods=['GET'])
+@app.route('/api/meals/batch', methods=['POST'])
+@query_budget(7)
 @login_required
-def get_daily_meals_route(user_id): # user_id viene dal decorator
-    start_of_day, end_of_day = get_daily_time_range()
-    
-    meals = Meal.query.filter(
+def add_meals_batch_route(user_id): # user_id viene dal decorator
+    data = request.get_json(silent=True) or {}
+    meals_data = data.get('meals') if isinstance(data, dict) else None
+    if not meals_data or not isinstance(meals_data, list):
+        return jsonify({'message': 'No meals provided. Did your wearable fall asleep?'}), 400
+
+    try:
+        logged = log_meals(user_id, meals_data)
+    except MealValidationError as e:
+        return jsonify({'message': e.message}), e.status_code
+
+    return jsonify({
+        'message': f'{len(logged)} meals added successfully! Your caloric debt is piling up!',
+        'meals': [meal for meal, _ in logged],
+        'total_kcal': round(sum(total_kcal for _, total_kcal in logged), 2)
+    }), 201
+
+def _daily_meals(user_id, start_of_day, end_of_day):
+    """
+    Pasti del giorno come tuple (meal_id, descrizione, meal_time, [(nome, grammi, kcal, image_url), ...]).
+    Con MEAL_ITEMS_LOADING = 'projection' basta una sola query con join, altrimenti
+    si usano le opzioni di eager loading di Meal.items_loader.
+    """
+    strategy = app.config['MEAL_ITEMS_LOADING']
+    if strategy != 'projection':
+        meals = Meal.query.options(*Meal.items_loader(strategy)).filter(
+            Meal.user_id == user_id,
+            Meal.meal_time >= start_of_day,
+            Meal.meal_time <= end_of_day
+        ).order_by(Meal.meal_time.asc(), Meal.id.asc()).all()
+        return [
+            (meal.id, meal.description, meal.meal_time, [
+                (item.food_item.name, item.grams_consumed, item.kcal_total_item, item.food_item.image_url)
+                for item in meal.meal_items
+            ])
+            for meal in meals
+        ]
+
+    rows = db.session.query(
+        Meal.id, Meal.description, Meal.meal_time,
+        FoodItem.name, MealItem.grams_consumed, MealItem.kcal_total_item, FoodItem.image_url
+    ).outerjoin(MealItem, MealItem.meal_id == Meal.id).outerjoin(FoodItem, FoodItem.id == MealItem.food_item_id).filter(
         Meal.user_id == user_id,
         Meal.meal_time >= start_of_day,
         Meal.meal_time <= end_of_day
-    ).order_by(Meal.meal_time.asc()).all()
+    ).order_by(Meal.meal_time.asc(), Meal.id.asc(), MealItem.id.asc()).all()
+
+    meals = []
+    for meal_id, description, meal_time, name, grams_consumed, kcal_total_item, image_url in rows:
+        if not meals or meals[-1][0] != meal_id:
+            meals.append((meal_id, description, meal_time, []))
+        if kcal_total_item is not None:
+            meals[-1][3].append((name, grams_consumed, kcal_total_item, image_url))
+    return meals
+
+@app.route('/api/meals/daily', methods=['GET'])
+@query_budget(4) # catalog_version, utenti cambiati e principal (cache fredde), pasti del giorno
+@login_required
+@read_only
+def get_daily_meals_route(user_id): # user_id viene dal decorator
+    start_of_day, end_of_day = get_daily_time_range()
 
     total_daily_kcal = 0
     meals_data = []
-    for meal in meals:
+    for meal_id, description, meal_time, items in _daily_meals(user_id, start_of_day, end_of_day):
         meal_items_data = []
-        for item in meal.meal_items:
+        for name, grams_consumed, kcal_total_item, image_url in items:
             meal_items_data.append({
-                'food_item_name': item.food_item.name,
-                'grams_consumed': item.grams_consumed,
-                'kcal_total': round(item.kcal_total_item, 2),
-                'image_url': item.food_item.image_url
+                'food_item_name': name,
+                'grams_consumed': grams_consumed,
+                'kcal_total': round(kcal_total_item, 2),
+                'image_url': image_url
             })
-            total_daily_kcal += item.kcal_total_item
+            total_daily_kcal += kcal_total_item
         
         meals_data.append({
-            'meal_id': meal.id,
-            'description': meal.description,
-            'meal_time': meal.meal_time.isoformat(),
+            'meal_id': meal_id,
+            'description': description,
+            'meal_time': meal_time.isoformat(),
             'items': meal_items_data,
             'total_kcal_in_meal': round(sum(item['kcal_total'] for item in meal_items_data), 2)
         })
     
-    return jsonify({
+    return json_response({
         'meals': meals_data,
         'total_daily_kcal_ingested': round(total_daily_kcal, 2)
     })
 
+@app.route('/api/meals/export', methods=['GET'])
+@login_required
+@read_only
+def export_meals_route(user_id): # user_id viene dal decorator
+    """
+    Tutti i pasti dell'utente (opzionalmente tra from e to, ISO 8601) in streaming:
+    format=csv (default, una riga per alimento) oppure format=ndjson (un pasto per riga).
+    """
+    export_format = 'ndjson' if wants_ndjson() else request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'message': 'Unknown export format. Pick csv or ndjson, not a stone tablet!'}), 400
+    try:
+        date_from = parse_datetime_arg('from')
+        date_to = parse_datetime_arg('to', end_of_day=True)
+    except ValueError:
+        return jsonify({'message': 'Invalid date range. Stop tampering with the timeline!'}), 400
+
+    rows = export_rows(user_id, date_from, date_to)
+    headers = {'Content-Disposition': f'attachment; filename=meals_{user_id}.{export_format}'}
+    if export_format == 'ndjson':
+        return ndjson_response(meal_documents(rows), headers=headers)
+    return Response(stream_with_context(csv_chunks(rows)), mimetype='text/csv', headers=headers)
+
 # --- GENERAZIONE WORKOUT ---
 @app.route('/api/generate_workout', methods=['POST'])
 @login_required
@@ -315,16 +396,22 @@ def generate_workout_route(user_id): # user_id viene dal decorator
     data = request.get_json()
     kcal_to_burn = data.get('kcal_to_burn')
 
-    if not kcal_to_burn or kcal_to_burn <= 0:
+    if not isinstance(kcal_to_burn, (int, float)) or isinstance(kcal_to_burn, bool) or not kcal_to_burn > 0: # anche NaN
         return jsonify({'message': 'Invalid kcal_to_burn value. Did you eat nothing, or are you a ghost?'}), 400
+    if kcal_to_burn > app.config['WORKOUT_MAX_KCAL']:
+        return jsonify({'message': f"At most {app.config['WORKOUT_MAX_KCAL']} kcal per workout. One binge at a time!"}), 400
     
-    user = User.query.get_or_404(user_id)
-    exercises = Exercise.query.all()
+    user = current_principal() # già risolto da login_required: niente query sull'utente
+    catalog_version, exercises = catalog_cache.exercises()
 
     if not exercises:
         return jsonify({'message': 'No exercises defined. How do you expect to suffer?'}), 500
 
-    workout_plan, estimated_time = generate_workout_logic(kcal_to_burn, user.weight_kg, exercises)
+    workout_plan, estimated_time = generate_workout_logic(
+        kcal_to_burn, user.weight_kg, exercises,
+        strategy=app.config['WORKOUT_PLANNER'], seed=app.config['WORKOUT_PLANNER_SEED'],
+        catalog_version=catalog_version
+    )
 
     if not workout_plan:
         return jsonify({'message': 'Could not generate a suitable workout plan. Maybe try eating less or add more brutal exercises!'}), 500
@@ -333,7 +420,7 @@ def generate_workout_route(user_id): # user_id viene dal decorator
         user_id=user_id,
         kcal_to_burn=kcal_to_burn,
         estimated_total_time_min=estimated_time,
-        workout_details_json=json.dumps(workout_plan)
+        segments=GeneratedWorkoutSegment.from_plan(workout_plan)
     )
     db.session.add(new_workout)
     db.session.commit()
@@ -345,79 +432,200 @@ def generate_workout_route(user_id): # user_id viene dal decorator
 
 @app.route('/api/workouts/history', methods=['GET'])
 @login_required
+@read_only
 def get_workout_history_route(user_id): # user_id viene dal decorator
-    workouts = GeneratedWorkout.query.filter_by(user_id=user_id).order_by(GeneratedWorkout.generation_date.desc()).all()
-    return jsonify([w.to_dict() for w in workouts])
+    """
+    Storico dei workout, dal più recente. Parametri opzionali:
+    - from / to: intervallo di date (ISO 8601, estremi inclusi)
+    - limit / cursor: paginazione keyset su (generation_date, id); la risposta
+      diventa {'workouts': [...], 'next_cursor': ...}
+    - format=ndjson: stream di una riga per workout letto con un cursore lato server
+    Senza limit/cursor/ndjson restituisce l'intero array come prima.
+    """
+    try:
+        date_from = parse_datetime_arg('from')
+        date_to = parse_datetime_arg('to', end_of_day=True)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
+    except ValueError:
+        return jsonify({'message': 'Invalid date range or cursor. Stop tampering with the timeline!'}), 400
+
+    # Colonne invece di oggetti GeneratedWorkout: stessa forma di to_dict, vedi serializers.py
+    query = select(*workout_columns()).where(GeneratedWorkout.user_id == user_id)
+    if date_from:
+        query = query.where(GeneratedWorkout.generation_date >= date_from)
+    if date_to:
+        query = query.where(GeneratedWorkout.generation_date <= date_to)
+    if after:
+        last_date, last_id = after
+        query = query.where(or_(
+            GeneratedWorkout.generation_date < last_date,
+            and_(GeneratedWorkout.generation_date == last_date, GeneratedWorkout.id < last_id)
+        ))
+    query = query.order_by(GeneratedWorkout.generation_date.desc(), GeneratedWorkout.id.desc())
+
+    if wants_ndjson():
+        return ndjson_response(stream_workout_dicts(query, app.config['WORKOUT_HISTORY_STREAM_CHUNK']))
+
+    if cursor is None and 'limit' not in request.args:
+        return json_response(workout_dicts(db.session.execute(query).all()))
+
+    try:
+        limit = parse_limit_arg(app.config['WORKOUT_HISTORY_PAGE_SIZE'], app.config['WORKOUT_HISTORY_MAX_PAGE_SIZE'])
+    except ValueError:
+        return jsonify({'message': 'limit must be a positive integer. Count like a grown-up!'}), 400
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].generation_date, rows[-1].id)
+    return json_response({'workouts': workout_dicts(rows), 'next_cursor': next_cursor})
+
+@app.route('/api/workouts/stats', methods=['GET'])
+@login_required
+@read_only
+def get_workout_stats_route(user_id): # user_id viene dal decorator
+    """Totali di minuti e kcal per esercizio, raggruppati per ?period=day|month|year|total (default month)."""
+    period = request.args.get('period', 'month')
+    if period not in PERIODS:
+        return jsonify({'message': f'Invalid period. Choose one of: {", ".join(PERIODS)}.'}), 400
+    try:
+        date_from = parse_datetime_arg('from')
+        date_to = parse_datetime_arg('to', end_of_day=True)
+    except ValueError:
+        return jsonify({'message': 'Invalid date range. Stop tampering with the timeline!'}), 400
+
+    return jsonify({
+        'period': period,
+        'totals': exercise_totals(user_id, date_from, date_to, period)
+    })
+
+# --- ANALISI NUTRIZIONALI ---
+@app.route('/api/analytics/nutrition', methods=['GET'])
+@query_budget(5) # catalog_version, utenti cambiati e principal (cache fredde), andamento, categorie
+@login_required
+@read_only
+def get_nutrition_analytics_route(user_id): # user_id viene dal decorator
+    """
+    Andamento di kcal e macronutrienti per ?period=day|week|month (default week) tra
+    from e to (ISO 8601, default gli ultimi ANALYTICS_DEFAULT_DAYS giorni), bilancio
+    con le kcal da bruciare e ripartizione per categoria di alimento.
+    """
+    period = request.args.get('period', 'week')
+    if period not in ANALYTICS_PERIODS:
+        return jsonify({'message': f'Invalid period. Choose one of: {", ".join(ANALYTICS_PERIODS)}.'}), 400
+    try:
+        date_from = parse_datetime_arg('from')
+        date_to = parse_datetime_arg('to', end_of_day=True)
+    except ValueError:
+        return jsonify({'message': 'Invalid date range. Stop tampering with the timeline!'}), 400
+
+    date_to = date_to or datetime.utcnow()
+    date_from = date_from or date_to - timedelta(days=app.config['ANALYTICS_DEFAULT_DAYS'])
+    if date_from > date_to:
+        return jsonify({'message': 'The range ends before it starts. Time travel is not a diet plan!'}), 400
+    if (date_to - date_from).days > app.config['ANALYTICS_MAX_DAYS']:
+        return jsonify({'message': f"At most {app.config['ANALYTICS_MAX_DAYS']} days per analysis. Your regrets can wait!"}), 400
+
+    return jsonify(nutrition_analytics(user_id, date_from, date_to, period))
 
 # --- REPORT PDF ---
 @app.route('/api/workout_report/<int:workout_id>/pdf', methods=['GET'])
 @login_required
 def get_workout_pdf_report_route(user_id, workout_id): # user_id viene dal decorator
-    workout = GeneratedWorkout.query.filter_by(id=workout_id, user_id=user_id).first_or_404()
-    user = User.query.get_or_404(user_id)
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    p.setFillColor('black')
-    p.rect(0, 0, width, height, fill=1)
-    p.setFillColor('white')
+    # Basta verificare che il workout sia dell'utente: il resto serve solo se il PDF non è in cache
+    owned = db.session.query(GeneratedWorkout.id).filter_by(id=workout_id, user_id=user_id).first()
+    if owned is None:
+        abort(404)
+
+    def load_report_data():
+        return workout_report_data(db.session.get(GeneratedWorkout, workout_id), current_principal().username)
+
+    # send_file serve il file senza copiarlo in memoria e risponde 304 se l'ETag coincide.
+    # Se l'LRU lo cancella tra get_or_render e l'apertura è un miss: lo si ridisegna
+    for attempt in range(2):
+        path, etag = report_cache.get_or_render(workout_id, load_report_data)
+        try:
+            response = send_file(
+                path, mimetype='application/pdf', as_attachment=True,
+                download_name=f'workout_report_{workout_id}.pdf', etag=etag, conditional=True
+            )
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+    response.cache_control.private = True
+    return response
 
-    p.setFont("Helvetica-Bold", 24)
-    p.drawCentredString(width / 2, height - inch, "🔥 IL TUO REPORT DI BATTAGLIA 🔥")
-    
-    p.setStrokeColorRGB(1, 0, 0)
-    p.line(inch, height - inch - 0.2 * inch, width - inch, height - inch - 0.2 * inch)
+@app.route('/api/workout_report/export', methods=['GET'])
+@login_required
+def export_workout_reports_route(user_id): # user_id viene dal decorator
+    """
+    Tutti i report dei workout dell'utente in un intervallo di date (from / to, ISO 8601).
+    format=zip (default): archivio in streaming, un PDF per workout disegnato nel pool di processi.
+    format=pdf: un unico PDF con tutti i report.
+    """
+    export_format = request.args.get('format', 'zip')
+    if export_format not in ('zip', 'pdf'):
+        return jsonify({'message': 'Unknown export format. Pick zip or pdf, not a papyrus scroll!'}), 400
+    try:
+        date_from = parse_datetime_arg('from')
+        date_to = parse_datetime_arg('to', end_of_day=True)
+    except ValueError:
+        return jsonify({'message': 'Invalid date range or cursor. Stop tampering with the timeline!'}), 400
+
+    # Solo gli id: i workout con i segmenti si caricano a blocchi mentre l'export procede
+    query = select(GeneratedWorkout.id).where(GeneratedWorkout.user_id == user_id)
+    if date_from:
+        query = query.where(GeneratedWorkout.generation_date >= date_from)
+    if date_to:
+        query = query.where(GeneratedWorkout.generation_date <= date_to)
+    max_workouts = app.config['REPORT_EXPORT_MAX_WORKOUTS']
+    query = query.order_by(GeneratedWorkout.generation_date, GeneratedWorkout.id).limit(max_workouts + 1)
+    workout_ids = db.session.execute(query).scalars().all()
+    if not workout_ids:
+        return jsonify({'message': 'No workouts in this range. Nothing to report, slacker!'}), 404
+    if len(workout_ids) > max_workouts:
+        return jsonify({'message': f'More than {max_workouts} workouts in this range. Narrow it down, you overachiever!'}), 400
+
+    reports = workout_reports(workout_ids, current_principal().username)
+
+    if export_format == 'pdf':
+        path = render_combined_pdf(reports)
+        response = send_file(path, mimetype='application/pdf', as_attachment=True, download_name='workout_reports.pdf')
+        # Con direct_passthrough il server riceve il file così com'è e non chiama
+        # mai le funzioni di call_on_close: il file temporaneo non verrebbe cancellato
+        response.direct_passthrough = False
+        response.call_on_close(lambda: os.remove(path))
+        return response
+
+    return Response(
+        stream_with_context(stream_zip(reports)), mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=workout_reports.zip'}
+    )
 
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(inch, height - inch - 0.7 * inch, f"Guerriero: {user.username}")
-    p.drawString(inch, height - inch - 1.0 * inch, f"Data del Giudizio: {workout.generation_date.strftime('%d/%m/%Y %H:%M')}")
-    
-    p.setFont("Helvetica", 14)
-    p.drawString(inch, height - inch - 1.5 * inch, f"Kcal da Bruciare (Il Tuo Debito):")
-    p.setFont("Helvetica-Bold", 20)
-    p.setFillColor('red')
-    p.drawString(inch + 0.5 * inch, height - inch - 1.9 * inch, f"{workout.kcal_to_burn:.2f} Kcal")
-    p.setFillColor('white')
-
-    p.setFont("Helvetica", 14)
-    p.drawString(inch, height - inch - 2.5 * inch, f"Tempo Stimato di Agonia:")
-    p.setFont("Helvetica-Bold", 20)
-    p.setFillColor('red')
-    p.drawString(inch + 0.5 * inch, height - inch - 2.9 * inch, f"{workout.estimated_total_time_min:.1f} minuti")
-    p.setFillColor('white')
-
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(inch, height - inch - 3.5 * inch, "💀 IL TUO PIANO DI TORTURA 💀")
-    
-    y_position = height - inch - 4.0 * inch
-    p.setFont("Helvetica", 12)
-    workout_details = json.loads(workout.workout_details_json)
-    
-    for item in workout_details:
-        if y_position < inch:
-            p.showPage()
-            p.setFillColor('black')
-            p.rect(0, 0, width, height, fill=1)
-            p.setFillColor('white')
-            y_position = height - inch
-            p.setFont("Helvetica-Bold", 18)
-            p.drawString(inch, y_position, "💀 CONTINUA IL PIANO 💀")
-            y_position -= 0.5 * inch
-            p.setFont("Helvetica", 12)
-        
-        p.drawString(inch + 0.2 * inch, y_position, f"• {item['exercise_name']} ({item['exercise_acronym']}): {item['duration_min']:.1f} minuti (Brucerai: {item['kcal_burned_segment']:.2f} kcal)")
-        y_position -= 0.25 * inch
+# --- STATISTICHE DI SERVIZIO ---
+def service_stats():
+    """Contatori delle cache in memoria di questo worker."""
+    return {
+        'catalog_cache': catalog_cache.stats(),
+        'workout_plan_cache': plan_cache.stats(),
+        'report_cache': report_cache.stats(),
+        'auth': auth_stats(),
+        'password_hashing': password_hasher.stats(),
+        'food_snapshot': food_snapshot.stats()
+    }
 
-    p.showPage()
-    p.save()
+@app.route('/api/stats', methods=['GET'])
+def get_service_stats():
+    return jsonify(service_stats())
 
-    buffer.seek(0)
-    response = make_response(buffer.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=workout_report_{workout.id}.pdf'
-    return response
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Metriche di questo worker in formato Prometheus, solo per chi gira sulla stessa macchina."""
+    if request.remote_addr not in app.config['METRICS_ALLOWED_IPS']:
+        return jsonify({'message': 'Metrics are for the staff. Go count your own calories.'}), 403
+    return Response(render_metrics(service_stats()), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # --- POPOLAMENTO INIZIALE DEL DATABASE (Endpoint per test) ---
 @app.route('/api/seed_food_items', methods=['POST'])
@@ -438,10 +646,12 @@ def seed_food_items():
             {'name': 'Insalata Mista (senza condimento)', 'category': 'Verdura', 'kcal_per_100g': 15.0, 'carbs_per_100g': 3.0, 'proteins_per_100g': 1.0, 'fats_per_100g': 0.2, 'fiber_per_100g': 1.5, 'image_url': 'https://static.my-personaltrainer.it/2.0/alimentazione/ricette/insalata-mista/insalata-mista.jpeg'}
         ]
         
-        for data in food_items_data:
-            food_item = FoodItem(**data)
-            db.session.add(food_item)
+        version = bump_food_version()
+        food_items = [FoodItem(**data, catalog_version=version) for data in food_items_data]
+        db.session.add_all(food_items)
         db.session.commit()
+        for food_item in food_items:
+            food_search_index.add(food_item.id, food_item.name)
         return jsonify({'message': 'Sample food items seeded successfully!'}), 201
     except Exception as e:
         db.session.rollback()
@@ -467,70 +677,9 @@ def seed_exercises():
         for data in exercises_data:
             exercise = Exercise(**data)
             db.session.add(exercise)
+        bump_catalog_version(EXERCISES)
         db.session.commit()
         return jsonify({'message': 'Sample exercises seeded successfully!'}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Error seeding exercises: {str(e)}. Your database is weak!'}), 500
-    ```
-
-**Installa PyJWT:** `pip install PyJWT`
-
----
-
-### Frontend: Guida Step-by-Step e Codice
-
-#### 1. Configurazione Iniziale (vedi istruzioni di Step 1 sopra per `tailwind.config.js` e `index.css`)
-
-#### 2. `frontend/src/api/backendApi.ts` (Aggiornato con le nuove API di autenticazione)
-
-```typescript
-import axios from 'axios';
-
-const API_BASE_URL = 'http://127.0.0.1:5000/api';
-
-const backendApi = axios.create({
-    baseURL: API_BASE_URL,
-    headers: {
-        'Content-Type': 'application/json',
-    },
-});
-
-// Interceptor per aggiungere il token JWT alle richieste autenticate
-backendApi.interceptors.request.use((config) => {
-    const token = localStorage.getItem('jwt_token');
-    if (token) {
-        config.headers.Authorization = `Bearer ${token}`;
-    }
-    return config;
-});
-
-// Endpoint per Autenticazione e Profilo Utente
-export const auth = {
-    register: (userData: any) => backendApi.post('/register', userData),
-    login: (credentials: any) => backendApi.post('/login', credentials),
-    getProfile: () => backendApi.get('/profile'), // Ottiene il profilo dell'utente (registrato o guest)
-    updateProfile: (profileData: any) => backendApi.put('/profile', profileData), // Aggiorna solo per registrati
-};
-
-// Endpoint per Alimenti (accessibili a tutti)
-export const food = {
-    getAll: () => backendApi.get('/fooditems'),
-    search: (query: string) => backendApi.get(`/fooditems/search?q=${query}`),
-    getByBarcode: (barcode: string) => backendApi.get(`/fooditems/barcode/${barcode}`),
-    seed: () => backendApi.post('/seed_food_items'),
-};
-
-// Endpoint per Pasti (richiedono ID utente gestito dal backend tramite JWT o fisso)
-export const meals = {
-    add: (mealData: any) => backendApi.post(`/meals`, mealData),
-    getDaily: () => backendApi.get(`/meals/daily`),
-};
-
-// Endpoint per Workout (richiedono ID utente gestito dal backend)
-export const workout = {
-    generate: (kcalToBurn: number) => backendApi.post(`/generate_workout`, { kcal_to_burn: kcalToBurn }),
-    getHistory: () => backendApi.get(`/workouts/history`),
-    getReportPdf: (workoutId: number) => backendApi.get(`/workout_report/${workoutId}/pdf`, { responseType: 'blob' }),
-    seedExercises: () => backendApi.post('/seed_exercises'),
-};
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Serializzazione veloce per le route che restituiscono liste (ricerca alimenti,
+storico workout, pasti del giorno): query a colonne invece di oggetti ORM,
+righe trasformate direttamente nei dizionari di to_dict e JSON scritto con
+orjson.
+
+Il risultato è identico byte per byte a jsonify([obj.to_dict() ...]): i to_dict
+di models.py restano il riferimento e check_serializers.py confronta le due
+strade su ogni route coinvolta.
+
+orjson è opzionale: senza, dumps usa lo stesso encoder di jsonify. Anche con
+orjson i casi che scriverebbe diversamente (float in notazione esponenziale, NaN
+e infiniti, che orjson trasforma in null) passano dal json della libreria standard.
+"""
+import json
+import math
+import re
+from flask import Response
+from sqlalchemy import select
+from app import app, db
+from models import FoodItem, GeneratedWorkout, GeneratedWorkoutSegment
+from catalog_cache import FoodRecord
+
+try:
+    import orjson
+except ImportError: # opzionale (requirements-optional.txt): senza orjson si usa il json della libreria standard
+    orjson = None
+
+# Chiavi di to_dict, nello stesso ordine delle colonne proiettate
+FOOD_ITEM_FIELDS = FoodRecord._fields
+WORKOUT_FIELDS = ('id', 'user_id', 'generation_date', 'kcal_to_burn', 'estimated_total_time_min')
+SEGMENT_FIELDS = ('exercise_id', 'exercise_acronym', 'exercise_name', 'duration_min', 'kcal_burned_segment')
+SEGMENT_LOOKUP_CHUNK = 500 # id per IN (...), come il selectin di GeneratedWorkout.segments
+
+# jsonify scrive come \uXXXX tutto quello che non è ASCII stampabile; orjson
+# lascia in UTF-8 solo i caratteri da DEL in su (i controlli li escapa già uguale)
+_NOT_ASCII = re.compile('[\x7f-\U0010ffff]')
+# Float che il json della libreria standard scrive in notazione esponenziale
+# (1e-05, 1e+16) e orjson no, o in un altro modo (1e-7): rari, si delega a json.
+# Il pattern guarda solo dove può iniziare un numero; dentro una stringa al massimo
+# manda a json un oggetto che non ne aveva bisogno
+_EXPONENT_FLOAT = re.compile(rb'[:,\[]-?(?:\d+(?:\.\d+)?[eE]|0\.0000)')
+
+def _has_non_finite(obj):
+    """True se obj contiene NaN o infiniti: jsonify li scrive come NaN/Infinity, orjson come null."""
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+def _escape(match):
+    code = ord(match.group())
+    if code > 0xFFFF: # fuori dal BMP: coppia di surrogati, come json.dumps
+        code -= 0x10000
+        return '\\u{0:04x}\\u{1:04x}'.format(0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return '\\u{0:04x}'.format(code)
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode()
+
+def dumps(obj):
+    """JSON compatto, chiavi ordinate e solo ASCII: gli stessi byte di jsonify fuori da debug."""
+    if orjson is None:
+        return _stdlib_dumps(obj)
+    data = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    if _EXPONENT_FLOAT.search(data):
+        return _stdlib_dumps(obj)
+    # null può essere None o un float non finito: si guarda l'oggetto solo se ce n'è uno
+    if b'null' in data and _has_non_finite(obj):
+        return _stdlib_dumps(obj)
+    if not data.isascii() or b'\x7f' in data:
+        data = _NOT_ASCII.sub(_escape, data.decode()).encode()
+    return data
+
+def json_response(obj, status=200):
+    """Come jsonify(obj), ma codificato con dumps."""
+    if app.debug: # in debug jsonify indenta l'output: la forma resta la sua
+        response = app.json.response(obj)
+        response.status_code = status
+        return response
+    return Response(dumps(obj) + b'\n', status=status, mimetype=app.json.mimetype)
+
+# --- PROIEZIONI ---
+def food_item_columns():
+    return [getattr(FoodItem, field) for field in FOOD_ITEM_FIELDS]
+
+def food_item_dicts(rows):
+    """FoodItem.to_dict per righe FOOD_ITEM_FIELDS (anche FoodRecord di catalog_cache)."""
+    return [dict(zip(FOOD_ITEM_FIELDS, row)) for row in rows]
+
+def workout_columns():
+    return [getattr(GeneratedWorkout, field) for field in WORKOUT_FIELDS]
+
+def _segment_rows(workout_ids):
+    """(workout_id, SEGMENT_FIELDS...) in ordine di posizione, con IN a blocchi."""
+    for start in range(0, len(workout_ids), SEGMENT_LOOKUP_CHUNK):
+        yield from db.session.execute(
+            select(
+                GeneratedWorkoutSegment.workout_id, GeneratedWorkoutSegment.exercise_id,
+                GeneratedWorkoutSegment.exercise_acronym, GeneratedWorkoutSegment.exercise_name,
+                GeneratedWorkoutSegment.duration_min, GeneratedWorkoutSegment.kcal_burned_segment
+            ).where(
+                GeneratedWorkoutSegment.workout_id.in_(workout_ids[start:start + SEGMENT_LOOKUP_CHUNK])
+            ).order_by(GeneratedWorkoutSegment.workout_id, GeneratedWorkoutSegment.position)
+        )
+
+def workout_dicts(rows):
+    """GeneratedWorkout.to_dict per righe WORKOUT_FIELDS; i segmenti arrivano da una query a parte."""
+    workouts = []
+    details = {} # workout_id -> lista workout_details
+    for workout_id, user_id, generation_date, kcal_to_burn, estimated_total_time_min in rows:
+        details[workout_id] = []
+        workouts.append({
+            'id': workout_id,
+            'user_id': user_id,
+            'generation_date': generation_date.isoformat(),
+            'kcal_to_burn': kcal_to_burn,
+            'estimated_total_time_min': estimated_total_time_min,
+            'workout_details': details[workout_id]
+        })
+    if details:
+        for workout_id, *segment in _segment_rows(list(details)):
+            details[workout_id].append(dict(zip(SEGMENT_FIELDS, segment)))
+    return workouts
+
+def stream_workout_dicts(query, chunk_size):
+    """workout_dicts su un cursore lato server: una query dei segmenti per blocco di chunk_size workout."""
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    for rows in result.partitions():
+        yield from workout_dicts(rows)
@@ -0,0 +1,58 @@
+from sqlalchemy import func, literal
+from app import db
+from models import Exercise, GeneratedWorkout, GeneratedWorkoutSegment
+
+PERIODS = ('day', 'month', 'year', 'total')
+
+def _period_expression(period):
+    """Espressione SQL che raggruppa generation_date per giorno/mese/anno."""
+    column = GeneratedWorkout.generation_date
+    if period == 'total':
+        return literal('total')
+    if db.engine.dialect.name == 'sqlite':
+        return func.strftime({'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}[period], column)
+    return func.to_char(column, {'day': 'YYYY-MM-DD', 'month': 'YYYY-MM', 'year': 'YYYY'}[period])
+
+def exercise_totals(user_id=None, date_from=None, date_to=None, period='month'):
+    """
+    Minuti, kcal e numero di segmenti per esercizio e per periodo, calcolati
+    interamente nel database (GROUP BY) senza caricare i workout in Python.
+    Con user_id=None aggrega su tutti gli utenti.
+    """
+    if period not in PERIODS:
+        raise ValueError(f'Unknown period {period!r}')
+
+    period_expr = _period_expression(period).label('period')
+    query = db.session.query(
+        period_expr,
+        Exercise.id,
+        Exercise.acronym,
+        Exercise.name,
+        func.sum(GeneratedWorkoutSegment.duration_min),
+        func.sum(GeneratedWorkoutSegment.kcal_burned_segment),
+        func.count(GeneratedWorkoutSegment.id)
+    ).join(
+        GeneratedWorkout, GeneratedWorkout.id == GeneratedWorkoutSegment.workout_id
+    ).join(
+        Exercise, Exercise.id == GeneratedWorkoutSegment.exercise_id
+    )
+    if user_id is not None:
+        query = query.filter(GeneratedWorkout.user_id == user_id)
+    if date_from:
+        query = query.filter(GeneratedWorkout.generation_date >= date_from)
+    if date_to:
+        query = query.filter(GeneratedWorkout.generation_date <= date_to)
+
+    rows = query.group_by(period_expr, Exercise.id, Exercise.acronym, Exercise.name).order_by(period_expr, Exercise.acronym)
+    return [
+        {
+            'period': row_period,
+            'exercise_id': exercise_id,
+            'exercise_acronym': acronym,
+            'exercise_name': name,
+            'total_minutes': round(total_minutes or 0, 1),
+            'total_kcal': round(total_kcal or 0, 2),
+            'segments': segments
+        }
+        for row_period, exercise_id, acronym, name, total_minutes, total_kcal, segments in rows
+    ]